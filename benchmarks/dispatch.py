@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Measure the end to end overhead of running a script through sv rather than from its venv directly.
+
+Builds real venvs offline (without pip), registers a trivial script in each, and times
+``sv SCRIPT`` against ``VENV/bin/SCRIPT`` with a cold config cache, a warm one, and
+with N callers running at once. Also reports the memory of sv when it stays resident
+as the script's parent, as it does while recording stats.
+
+Usage::
+
+    python benchmarks/dispatch.py [--runs N] [--callers N] [--venvs N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple  # noqa: F401
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from script_venv.stats import percentile  # noqa: E402
+
+SV = 'import sys; from script_venv.launcher import main; sys.exit(main())'
+
+# Reports the resident memory of its parent, which is sv itself when sv doesn't exec the script
+SCRIPT = """#!/bin/sh
+if [ -n "$SV_BENCH_RSS" ]; then
+    grep VmRSS "/proc/$PPID/status" 2>/dev/null
+fi
+exit 0
+"""
+
+
+def make_tree(root: str, venvs: int) -> List[Tuple[str, str]]:
+    """Venvs, each with one script, in a config at root. Returns the (script, path) of each"""
+    import venv
+
+    from script_venv.config import VenvConfig
+    from script_venv.factory import ConfigDependenciesImpl
+
+    with open(os.path.join(root, '.sv_cfg'), 'w') as cfg:
+        cfg.write("[SCRIPTS]\n")
+        cfg.writelines("tool%d = venv%d\n" % (i, i) for i in range(venvs))
+        cfg.writelines("\n[venv%d]\n" % i for i in range(venvs))
+
+    scripts = []
+    old_cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        config = VenvConfig(deps=ConfigDependenciesImpl())
+        config.load()
+        for i in range(venvs):
+            env = config.venvs['venv%d' % i]
+            venv.EnvBuilder(with_pip=False, symlinks=os.name != 'nt').create(str(env.abs_path))
+            script = os.path.join(str(env.abs_path), 'bin', 'tool%d' % i)
+            with open(script, 'w') as out_script:
+                out_script.write(SCRIPT)
+            os.chmod(script, 0o755)
+            env.mark_ready()
+            scripts.append(('tool%d' % i, script))
+    finally:
+        os.chdir(old_cwd)
+    return scripts
+
+
+class Harness(object):
+    def __init__(self, root: str, scripts: List[Tuple[str, str]]) -> None:
+        self.root = root
+        self.scripts = scripts
+        self.env = dict(os.environ)
+        self.env['PYTHONPATH'] = os.pathsep.join(p for p in [ROOT, self.env.get('PYTHONPATH')] if p)
+        self.env['SV_SOCKET'] = os.path.join(root, 'no-daemon.sock')
+        for name in ('SV_STATS', 'SV_TRACE', 'SV_NO_CACHE'):
+            self.env.pop(name, None)
+
+    def _run(self, cmd: List[str], env: Dict[str, str]) -> Tuple[float, str]:
+        start = time.perf_counter()
+        out = subprocess.run(cmd, cwd=self.root, env=env, check=True, stdout=subprocess.PIPE).stdout
+        return time.perf_counter() - start, out.decode('utf-8', 'replace')
+
+    def sv(self, script: str, cache_dir: str, **extra_env: str) -> Tuple[float, str]:
+        env = dict(self.env, SV_CACHE_DIR=cache_dir, **extra_env)
+        return self._run([sys.executable, '-c', SV, script], env)
+
+    def direct(self, path: str) -> float:
+        return self._run([path], self.env)[0]
+
+    def serial(self, runs: int, cold: bool) -> Tuple[List[float], List[float]]:
+        sv_times, direct_times = [], []
+        warm_cache = os.path.join(self.root, 'warm-cache')
+        for i in range(runs):
+            script, path = self.scripts[i % len(self.scripts)]
+            cache_dir = os.path.join(self.root, 'cold-cache-%d' % i) if cold else warm_cache
+            sv_times.append(self.sv(script, cache_dir)[0])
+            direct_times.append(self.direct(path))
+        return sv_times, direct_times
+
+    def concurrent(self, runs: int, callers: int) -> Tuple[List[float], List[float]]:
+        warm_cache = os.path.join(self.root, 'warm-cache')
+        with ThreadPoolExecutor(max_workers=callers) as pool:
+            sv_times = list(pool.map(lambda i: self.sv(self.scripts[i % len(self.scripts)][0], warm_cache)[0],
+                                     range(runs)))
+            direct_times = list(pool.map(lambda i: self.direct(self.scripts[i % len(self.scripts)][1]),
+                                         range(runs)))
+        return sv_times, direct_times
+
+    def resident_rss(self) -> Optional[int]:
+        """The resident memory in kB of sv while it waits for the script, as it does when recording stats"""
+        script = self.scripts[0][0]
+        out = self.sv(script, os.path.join(self.root, 'warm-cache'),
+                      SV_STATS=os.path.join(self.root, 'stats.jsonl'), SV_BENCH_RSS='1')[1]
+        fields = out.split()
+        return int(fields[1]) if len(fields) > 1 and fields[0] == 'VmRSS:' else None
+
+
+def report(name: str, sv_times: List[float], direct_times: List[float]) -> None:
+    sv_p50, sv_p99 = percentile(sv_times, 50), percentile(sv_times, 99)
+    direct_p50, direct_p99 = percentile(direct_times, 50), percentile(direct_times, 99)
+    print("%-12s sv p50 %7.1f ms  p99 %7.1f ms | direct p50 %6.1f ms  p99 %6.1f ms | "
+          "overhead p50 %7.1f ms  p99 %7.1f ms" % (
+              name, sv_p50 * 1000, sv_p99 * 1000, direct_p50 * 1000, direct_p99 * 1000,
+              (sv_p50 - direct_p50) * 1000, (sv_p99 - direct_p99) * 1000))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=50, help='Calls of each kind to time (Default is 50)')
+    parser.add_argument('--callers', type=int, default=8, help='Concurrent callers (Default is 8)')
+    parser.add_argument('--venvs', type=int, default=4, help='Venvs to spread the calls over (Default is 4)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as root:
+        root = os.path.realpath(root)
+        os.environ['SV_CACHE_DIR'] = os.path.join(root, 'setup-cache')
+        scripts = make_tree(root, args.venvs)
+        harness = Harness(root, scripts)
+        harness.serial(2, cold=False)
+
+        report('cold cache', *harness.serial(args.runs, cold=True))
+        report('warm cache', *harness.serial(args.runs, cold=False))
+        report('%d callers' % args.callers, *harness.concurrent(args.runs, args.callers))
+
+        rss = harness.resident_rss()
+        print("resident sv parent: %s" % ('%d kB' % rss if rss else 'unknown (needs /proc)'))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Compare sv startup overhead of the launcher fast path against the full click entry point.
+
+Usage::
+
+    python benchmarks/startup.py [RUNS]
+
+Overhead is the median time over a bare ``python -c pass``. On a Linux dev box, with the config
+cache warm, the launcher took about 27ms of overhead against about 60ms for the click entry point
+(45%). Without bytecode caching (``PYTHONDONTWRITEBYTECODE``) every module is compiled on each
+run, and the figures were 57ms against 107ms (53%).
+
+The launcher still imports pathlib2 and sv's own config, venv, cache, stats and trace modules,
+which the config cache lookup and the venv check need.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List  # noqa: F401
+
+ENTRY_POINTS = {
+    'python': 'pass',
+    'cli': 'import sys; from script_venv.cli import main; sys.exit(main())',
+    'launcher': 'import sys; from script_venv.launcher import main; sys.exit(main())',
+}
+
+
+def make_tree(root: str) -> None:
+    """A ready demo venv with a hello script, in a config at root"""
+    from script_venv.config import VenvConfig
+    from script_venv.factory import ConfigDependenciesImpl
+
+    with open(os.path.join(root, '.sv_cfg'), 'w') as cfg:
+        cfg.write("[SCRIPTS]\nhello = demo\n\n[demo]\n")
+    bin_dir = os.path.join(root, '.sv', 'demo', 'bin')
+    os.makedirs(bin_dir)
+    hello = os.path.join(bin_dir, 'hello')
+    with open(hello, 'w') as script:
+        script.write("#!/bin/sh\nexit 0\n")
+    os.chmod(hello, 0o755)
+
+    # Without the stamp, the launcher falls back to the full entry point to set the venv up
+    old_cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        config = VenvConfig(deps=ConfigDependenciesImpl())
+        config.load()
+        config.venvs['demo'].mark_ready()
+    finally:
+        os.chdir(old_cwd)
+
+
+def time_runs(code: str, cwd: str, env: Dict[str, str], runs: int) -> List[float]:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code, 'hello'], cwd=cwd, env=env, check=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main(runs: int = 20) -> int:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                         env.get('PYTHONPATH', '')])
+    with tempfile.TemporaryDirectory() as root:
+        root = os.path.realpath(root)
+        env['SV_CACHE_DIR'] = os.environ['SV_CACHE_DIR'] = os.path.join(root, 'cache')
+        make_tree(root)
+        medians = {}
+        for name, code in ENTRY_POINTS.items():
+            time_runs(code, root, env, 2)
+            medians[name] = statistics.median(time_runs(code, root, env, runs))
+
+    base = medians['python']
+    for name in ('cli', 'launcher'):
+        print("%-10s %7.1f ms  (overhead %6.1f ms)" % (name, medians[name] * 1000, (medians[name] - base) * 1000))
+    ratio = (medians['launcher'] - base) / max(medians['cli'] - base, 1e-9)
+    print("launcher overhead is %.0f%% of cli overhead" % (ratio * 100))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(a) for a in sys.argv[1:2])))
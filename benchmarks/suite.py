@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Benchmark config loading, dispatch and :list on large synthetic config trees.
+
+Each case runs against an in-memory filesystem, to measure sv's own code, and against
+real files in a temporary directory. The times are compared with the stored baseline,
+and the run fails if any case is slower than the baseline by more than the threshold.
+Cases that take less than ``MIN_RUN`` are repeated until each timed run takes at least that long.
+
+Times are stored and compared as multiples of a fixed calibration loop, timed just before each run
+of a case, so a baseline saved on one machine can be checked on a faster, slower or busier one.
+
+Usage::
+
+    python benchmarks/suite.py [--runs N] [--threshold FRACTION] [--save] [--baseline FILE] [CASE ...]
+
+Re-run with ``--save`` to store the results as the new baseline after an intended change.
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from io import StringIO
+from pathlib2 import Path
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple  # noqa: F401
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from script_venv.cache import ConfigCache  # noqa: E402
+from script_venv.config import ConfigDependencies, VenvConfig  # noqa: E402
+from script_venv.factory import ConfigDependenciesImpl, VEnvDependenciesImpl  # noqa: E402
+from script_venv.venv import VEnvDependencies  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+DEPTH = 40
+SCRIPTS = 10000
+VENVS = 500
+
+# The shortest timed run, in seconds
+MIN_RUN = 0.02
+
+
+def parents_tree(depth: int = DEPTH) -> Tuple[List[str], Dict[str, str]]:
+    """A chain of directories depth deep, with a small config every fifth level"""
+    dirs = [os.path.join(*['d%02d' % i for i in range(1, n + 1)]) for n in range(1, depth + 1)]
+    files = {os.path.join(d, '.sv_cfg'): "[SCRIPTS]\ntool%d = venv%d\n\n[venv%d]\nrequirements = pkg%d\n" % (
+        i, i, i, i) for i, d in enumerate(dirs) if i % 5 == 4}
+    return dirs, files
+
+
+def scripts_tree(scripts: int = SCRIPTS, venvs: int = VENVS) -> Tuple[List[str], Dict[str, str]]:
+    """One config with many scripts spread over many venvs"""
+    lines = ["[SCRIPTS]"]
+    lines.extend("tool%d = venv%d" % (i, i % venvs) for i in range(scripts))
+    for v in range(venvs):
+        lines.append("\n[venv%d]\nprerequisites = wheel\nrequirements =\n\tpkg%d\n\tcommon>=1.0" % (v, v))
+    return [], {'.sv_cfg': '\n'.join(lines) + '\n'}
+
+
+# Each tree, with the script load_script looks for: the one furthest from where the search starts
+TREES = {
+    'parents': (parents_tree, 'tool4'),
+    'scripts': (scripts_tree, 'tool%d' % (SCRIPTS - 1)),
+}  # type: Dict[str, Tuple[Callable[[], Tuple[List[str], Dict[str, str]]], str]]
+
+
+class MemoryVEnvDependencies(VEnvDependencies):
+    def __init__(self, files: Dict[str, str]) -> None:
+        self.files = files
+
+    def exists(self, path: Path) -> bool:
+        return os.path.normpath(str(path)) in self.files
+
+    def read_text(self, path: Path) -> Optional[str]:
+        return self.files.get(os.path.normpath(str(path)))
+
+
+class MemoryDependencies(ConfigDependencies):
+    """Config files held in a dict by absolute path, so only sv's own code is measured"""
+
+    def __init__(self, files: Dict[str, str]) -> None:
+        self.files = files
+        self._venv_deps = MemoryVEnvDependencies(files)
+
+    def echo(self, msg: str) -> None:
+        pass
+
+    def exists(self, path: Path) -> bool:
+        return os.path.normpath(str(path)) in self.files
+
+    def read(self, path: Path) -> IO[Any]:
+        return StringIO(self.files[os.path.normpath(str(path))])
+
+    def venv_deps(self) -> VEnvDependencies:
+        return self._venv_deps
+
+    def config_cache(self) -> Optional[ConfigCache]:
+        return None
+
+    def dir_cache(self) -> None:
+        return None
+
+    def script_index(self) -> None:
+        return None
+
+
+class DiskDependencies(ConfigDependenciesImpl):
+    """The real dependencies, without output and with the caches only where a case asks for them"""
+
+    def __init__(self, cache_path: Optional[Path] = None) -> None:
+        self.cache_path = cache_path
+
+    def echo(self, msg: str) -> None:
+        pass
+
+    def venv_deps(self) -> VEnvDependencies:
+        return VEnvDependenciesImpl()
+
+    def config_cache(self) -> Optional[ConfigCache]:
+        return ConfigCache(self.cache_path) if self.cache_path else None
+
+    def dir_cache(self) -> None:
+        return None
+
+    def script_index(self) -> None:
+        return None
+
+
+class Tree(object):
+    """A synthetic tree laid out under root, with the working directory at its deepest directory"""
+
+    def __init__(self, root: str, name: str) -> None:
+        make_tree, self.script = TREES[name]
+        dirs, files = make_tree()
+        self.root = os.path.join(root, name)
+        self.cwd = os.path.join(self.root, dirs[-1]) if dirs else self.root
+        os.makedirs(self.cwd, exist_ok=True)
+        self.files = {os.path.join(self.root, f): text for f, text in files.items()}
+        for file, text in self.files.items():
+            with open(file, 'w') as out_file:
+                out_file.write(text)
+        self.cache_path = Path(self.root) / '.cache'
+
+    def deps(self, fs: str) -> ConfigDependencies:
+        if fs == 'memory':
+            return MemoryDependencies(self.files)
+        return DiskDependencies(self.cache_path if fs == 'disk-cached' else None)
+
+    @staticmethod
+    def config(deps: ConfigDependencies) -> VenvConfig:
+        config = VenvConfig(deps=deps)
+        config.search_path(['$PARENTS', '$CWD'])
+        return config
+
+
+def _load(tree: Tree, fs: str) -> Callable[[], Any]:
+    deps = tree.deps(fs)
+    return lambda: tree.config(deps).load()
+
+
+def _load_script(tree: Tree, fs: str) -> Callable[[], Any]:
+    deps = tree.deps(fs)
+    return lambda: tree.config(deps).load(script=tree.script)
+
+
+def _config_paths(tree: Tree, fs: str) -> Callable[[], Any]:
+    config = tree.config(tree.deps(fs))
+    return lambda: config.config_files()
+
+
+def _get_command(tree: Tree, fs: str) -> Callable[[], Any]:
+    import click
+    from script_venv.cli import main
+
+    config = tree.config(tree.deps(fs))
+    config.load()
+    ctx = click.Context(main, obj=config)
+    names = sorted(config.scripts)[:100]
+
+    def dispatch() -> None:
+        for name in names:
+            main.get_command(ctx, name)
+            config.venvs[config.script_venv(name) or name]
+    return dispatch
+
+
+def _list(tree: Tree, fs: str) -> Callable[[], Any]:
+    config = tree.config(tree.deps(fs))
+    config.load()
+    return config.list
+
+
+CASES = {
+    'load': _load,
+    'load_script': _load_script,
+    'config_paths': _config_paths,
+    'get_command': _get_command,
+    'list': _list,
+}  # type: Dict[str, Callable[[Tree, str], Callable[[], Any]]]
+
+FILESYSTEMS = ('memory', 'disk', 'disk-cached')
+
+
+def cases(root: str, selected: Iterable[str]) -> Iterator[Tuple[str, Callable[[], Any]]]:
+    selected = set(selected)
+    for tree_name in TREES:
+        tree = None
+        for case_name, make_case in CASES.items():
+            for fs in FILESYSTEMS:
+                if fs == 'disk-cached' and case_name not in ('load', 'load_script'):
+                    continue
+                key = '%s/%s/%s' % (tree_name, case_name, fs)
+                if selected and not selected & {tree_name, case_name, fs, key}:
+                    continue
+                tree = tree or Tree(root, tree_name)
+                old_cwd = os.getcwd()
+                os.chdir(tree.cwd)
+                try:
+                    yield key, make_case(tree, fs)
+                finally:
+                    os.chdir(old_cwd)
+
+
+def _calibration() -> None:
+    """Plain python work of the kind config loading does: string formatting, splitting and dict updates"""
+    values = {}  # type: Dict[str, List[str]]
+    for i in range(20000):
+        line = 'tool%d = venv%d' % (i, i % 500)
+        name, _, venv = line.partition(' = ')
+        values.setdefault(venv, []).append(name.strip().lower())
+
+
+def _timed(case: Callable[[], Any], repeat: int = 1) -> float:
+    """The time of one call of case, averaged over repeat calls, with the garbage collector paused"""
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            case()
+        return (time.perf_counter() - start) / repeat
+    finally:
+        gc.enable()
+
+
+def measure(case: Callable[[], Any], runs: int) -> Tuple[float, float]:
+    """The fastest time of case over runs after a warm up run, and its median time in units of
+    the calibration loop, timed just before each run so both see the machine in the same state.
+
+    Cases quicker than MIN_RUN are repeated within each run, so timer and scheduler noise
+    doesn't swamp them"""
+    case()
+    repeat = max(1, int(math.ceil(MIN_RUN / max(_timed(case), 1e-9))))
+    times = []
+    ratios = []
+    for _ in range(runs):
+        unit = _timed(_calibration)
+        elapsed = _timed(case, repeat)
+        times.append(elapsed)
+        ratios.append(elapsed / unit)
+    return min(times), statistics.median(ratios)
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """The cases slower than their baseline by more than threshold"""
+    return [k for k, t in sorted(results.items()) if k in baseline and t > baseline[k] * (1 + threshold)]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('cases', nargs='*', help='Trees, cases, filesystems or tree/case/fs keys to run')
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='Allowed slowdown against the baseline, as a fraction (Default is 0.5)')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save', action='store_true', help='Store the results as the new baseline')
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.baseline) as in_baseline:
+            baseline = json.load(in_baseline)  # type: Dict[str, float]
+    except (OSError, ValueError):
+        baseline = {}
+
+    results = {}  # type: Dict[str, float]
+    elapsed = {}  # type: Dict[str, float]
+    with tempfile.TemporaryDirectory() as root:
+        root = os.path.realpath(root)
+        for key, case in cases(root, args.cases):
+            elapsed[key], results[key] = measure(case, args.runs)
+            base = baseline.get(key)
+            change = " (%+.0f%%)" % ((results[key] / base - 1) * 100) if base else ""
+            print("%-36s %10.3f ms%s" % (key, elapsed[key] * 1000, change))
+
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, 'w') as out_baseline:
+            json.dump({k: round(v, 6) for k, v in sorted(baseline.items())}, out_baseline, indent=2)
+            out_baseline.write('\n')
+        return 0
+
+    slower = compare(results, baseline, args.threshold)
+    for key in slower:
+        print("REGRESSION %s: %.3f ms against a baseline of %.3f ms" %
+              (key, elapsed[key] * 1000, elapsed[key] * baseline[key] / results[key] * 1000))
+    return 1 if slower else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,7 +3,7 @@
 """Top-level package for Script Venv."""
 import sys
 
-from script_venv.cli import main
+from script_venv.launcher import main
 
 __author__ = """Struan Lyall Judd"""
 __email__ = 'sv@scifi.geek.nz'
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+""" Compiled config caching """
+
+import marshal
+import os
+import time
+import zlib
+from pathlib2 import Path
+from typing import Any, Dict, Iterable, Optional, Tuple  # noqa: F401
+
+_VERSION = 4
+
+CacheKey = Tuple[Tuple[str, ...], Tuple[Tuple[str, int, int], ...]]
+
+# Directory mtimes this recent may not yet reflect changes made within the same timestamp tick
+_RACY_SECONDS = 2
+_MAX_DIRS = 4096
+
+
+def cache_dir() -> Path:
+    env_dir = os.environ.get('SV_CACHE_DIR')
+    if env_dir:
+        return Path(env_dir).expanduser()
+    xdg_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join('~', '.cache')
+    return Path(xdg_dir).expanduser() / 'script_venv'
+
+
+def file_signature(file: Path) -> Tuple[str, int, int]:
+    try:
+        st = os.stat(str(file))
+    except OSError:
+        return str(file), -1, -1
+    return str(file), st.st_size, st.st_mtime_ns
+
+
+class ConfigCache(object):
+    """Merged config maps stored in marshal form,
+    keyed by the config file paths and their size and mtime, and by the context they were read in"""
+
+    def __init__(self, cache_path: Path) -> None:
+        self.cache_path = cache_path
+
+    @staticmethod
+    def key(files: Iterable[Path], context: Iterable[str] = ()) -> CacheKey:
+        """The key of files, read in context: anything else the merged config depends on,
+        such as the working directory that relative config paths are stored against"""
+        return tuple(context), tuple(file_signature(f) for f in files)
+
+    def _cache_file(self, key: CacheKey) -> Path:
+        context, files = key
+        paths = '\0'.join(list(context) + [p for p, _, _ in files])
+        digest = zlib.crc32(paths.encode('utf-8'))
+        return self.cache_path / ('config-%08x.bin' % digest)
+
+    def lookup(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        try:
+            with self._cache_file(key).open('rb') as in_cache:
+                data = marshal.load(in_cache)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+        if not isinstance(data, dict) or data.get('version') != _VERSION:
+            return None
+        if data.get('key') != key:
+            return None
+        return data.get('config')
+
+    def store(self, key: CacheKey, config: Dict[str, Any]) -> None:
+        cache_file = self._cache_file(key)
+        temp_file = cache_file.with_name('%s.%d' % (cache_file.name, os.getpid()))
+        data = dict(version=_VERSION, key=key, config=config)
+        try:
+            self.cache_path.mkdir(parents=True, exist_ok=True)
+            with temp_file.open('wb') as out_cache:
+                marshal.dump(data, out_cache)
+            os.replace(str(temp_file), str(cache_file))
+        except (OSError, ValueError):
+            try:
+                temp_file.unlink()
+            except OSError:
+                pass
+
+
+class DirCache(object):
+    """Which of a few names each directory holds, validated by the directory's mtime,
+    so looking for config files and root markers in the parents of the working directory
+    costs a stat of each directory rather than a lookup of each missing name"""
+
+    def __init__(self, cache_path: Path) -> None:
+        self.cache_file = cache_path / 'dirs.bin'
+        self._entries = None  # type: Optional[Dict[str, Tuple[int, Tuple[str, ...], Tuple[bool, ...]]]]
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Tuple[int, Tuple[str, ...], Tuple[bool, ...]]]:
+        if self._entries is None:
+            try:
+                with self.cache_file.open('rb') as in_cache:
+                    data = marshal.load(in_cache)
+            except (OSError, EOFError, ValueError, TypeError):
+                data = None
+            if isinstance(data, dict) and data.get('version') == _VERSION:
+                self._entries = data.get('dirs') or {}
+            else:
+                self._entries = {}
+        return self._entries
+
+    def holds(self, dir_path: str, names: Tuple[str, ...]) -> Tuple[bool, ...]:
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return tuple(False for _ in names)
+
+        entries = self._load()
+        entry = entries.get(dir_path)
+        if entry and entry[0] == mtime_ns and tuple(entry[1]) == names:
+            return tuple(entry[2])
+
+        found = tuple(os.path.exists(os.path.join(dir_path, n)) for n in names)
+        if time.time() - mtime_ns / 1e9 > _RACY_SECONDS:
+            if len(entries) >= _MAX_DIRS:
+                entries.clear()
+            entries[dir_path] = (mtime_ns, names, found)
+            self._dirty = True
+        return found
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        temp_file = self.cache_file.with_name('%s.%d' % (self.cache_file.name, os.getpid()))
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with temp_file.open('wb') as out_cache:
+                marshal.dump(dict(version=_VERSION, dirs=self._entries), out_cache)
+            os.replace(str(temp_file), str(self.cache_file))
+            self._dirty = False
+        except (OSError, ValueError):
+            try:
+                temp_file.unlink()
+            except OSError:
+                pass
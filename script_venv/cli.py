@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
 
 """Console script for script_venv."""
-from typing import Iterable, cast  # noqa: F401
+from os import path
+from typing import Any, Dict, Iterable, List, Tuple, cast  # noqa: F401
 
 import click
 
 from script_venv.factory import ConfigDependenciesImpl
+from . import trace
 from .config import VenvConfig, ConfigDependencies
 from .script_venv import ScriptVenvGroup
 
@@ -17,9 +19,15 @@ _IGNORE_UNKNOWN = dict(ignore_unknown_options=True, )
 @click.option('--config-search-path', '-S', type=click.STRING,
               help='Path to load .sv_cfg files from')
 @click.option('--verbose', '-V', is_flag=True, help="Show messages")
+@click.option('--trace', 'trace_file', type=click.STRING, envvar='SV_TRACE',
+              help='Write a Chrome trace of where sv spends its time to this file')
+@click.option('--trace-profile', is_flag=True, envvar='SV_TRACE_PROFILE',
+              help='Also write a cProfile of sv to the trace file name with .prof appended')
 @click.pass_context
-def main(ctx, config_search_path: str, verbose: bool) -> None:
+def main(ctx, config_search_path: str, verbose: bool, trace_file: str, trace_profile: bool) -> None:
     """Console script for script_venv."""
+    if trace_file:
+        trace.start(trace_file, profile=trace_profile)
     if ctx.invoked_subcommand is None:
         click.echo(ctx.get_help())
         return
@@ -45,31 +53,150 @@ def list_venvs(obj) -> None:
 @main.command(name=":create", context_settings=_IGNORE_UNKNOWN)  # type: ignore
 @click.option('--clean', '-C', is_flag=True, help='If the venv exists, clean it before applying requirements')
 @click.option('--update', '-U', is_flag=True, help='Update prerequisites, requirements, and pip')
-@click.argument('venv_or_script', required=True)
+@click.option('--all', '-A', 'all_venvs', is_flag=True, help='Create all known venvs')
+@click.option('--jobs', '-j', type=click.INT, help='Number of venvs to create concurrently')
+@click.option('--also', multiple=True, metavar='VENV_OR_SCRIPT',
+              help='Another venv or script to create along with VENV_OR_SCRIPT, may be repeated')
+@click.argument('venv_or_script', required=False)
 @click.argument('install_params', nargs=-1)
 @click.pass_obj
 def create_venv(obj, venv_or_script: str,
                 install_params: Iterable[str],
-                clean: bool, update: bool) -> None:
-    """Create, update or clean venv and apply requirements
+                clean: bool, update: bool, all_venvs: bool, jobs: int, also: Iterable[str]) -> None:
+    """Create, update or clean venvs and apply requirements
     appending any install parameters provided"""
     if not isinstance(obj, VenvConfig):  # pragma: no cover
         raise TypeError("ctx.obj must be a VEnvConfig")
-    obj.create(venv_or_script, *install_params, clean=clean, update=update)
+    options = dict(clean=clean, update=update)  # type: Dict[str, Any]
+    if jobs:
+        options['jobs'] = jobs
+    if also:
+        options['also'] = list(also)
+    if all_venvs:
+        obj.create_all(*([venv_or_script] if venv_or_script else []), *install_params, **options)
+    elif venv_or_script:
+        obj.create(venv_or_script, *install_params, **options)
+    else:
+        raise click.UsageError("Missing argument 'VENV_OR_SCRIPT'.")
+
+
+def _split_packages(packages: str) -> List[str]:
+    """PACKAGE[,PACKAGE...] split on the commas between packages, leaving those within
+    extras like ``foo[a,b]`` and version ranges like ``foo>=1,<2`` in place"""
+    parts = []  # type: List[str]
+    depth = start = 0
+    for i, c in enumerate(packages):
+        if c == '[':
+            depth += 1
+        elif c == ']':
+            depth = max(depth - 1, 0)
+        elif c == ',' and not depth and not packages[i + 1:].lstrip().startswith(('<', '>', '=', '!', '~')):
+            parts.append(packages[start:i])
+            start = i + 1
+    parts.append(packages[start:])
+    return [p.strip() for p in parts if p.strip()]
 
 
 @main.command(name=":register", context_settings=_IGNORE_UNKNOWN)  # type: ignore
 @click.option('--config-path', '-P', type=click.STRING)
 @click.option('--venv-path', '-V', type=click.STRING)
+@click.option('--jobs', '-j', type=click.INT, help='Number of venvs to install into concurrently')
 @click.argument('venv', required=True)
-@click.argument('package', nargs=-1, required=True)
+@click.argument('package', nargs=-1)
 @click.pass_obj
 def register_package(obj, venv: str,
                      package: Iterable[str],
                      config_path: str,
-                     venv_path: str) -> int:
-    """Register packages and their scripts in venv"""
+                     venv_path: str,
+                     jobs: int) -> int:
+    """Register packages and their scripts in venv,
+    or in each venv of VENV=PACKAGE[,PACKAGE...] groups"""
     if not isinstance(obj, VenvConfig):  # pragma: no cover
         raise TypeError("ctx.obj must be a VEnvConfig")
-    obj.register(venv, package, config_path=config_path, venv_path=venv_path)
+    if '=' not in venv:
+        if not package:
+            raise click.UsageError("Missing argument 'PACKAGE...'.")
+        obj.register(venv, package, config_path=config_path, venv_path=venv_path)
+        return 0
+
+    groups = {}  # type: Dict[str, List[str]]
+    for group in (venv, *package):
+        name, _, packages = group.partition('=')
+        if not name or not packages:
+            raise click.UsageError("Expected VENV=PACKAGE[,PACKAGE...] but got '%s'." % group)
+        venv_packages = groups.setdefault(name, [])
+        venv_packages.extend(p for p in _split_packages(packages) if p not in venv_packages)
+    obj.register_all(groups, config_path=config_path, venv_path=venv_path, jobs=jobs)
     return 0
+
+
+@main.command(name=":shims")  # type: ignore
+@click.option('--bin-dir', '-B', type=click.STRING, default=path.join('~', '.local', 'bin'),
+              help='Directory to write the shims into')
+@click.pass_obj
+def write_shims(obj, bin_dir: str) -> None:
+    """Write executable shims for all known scripts"""
+    if not isinstance(obj, VenvConfig):  # pragma: no cover
+        raise TypeError("ctx.obj must be a VEnvConfig")
+    obj.shims(bin_dir)
+
+
+@main.command(name=":prefetch")  # type: ignore
+@click.option('--wheelhouse', '-W', type=click.STRING,
+              help='Directory to build wheels into (Default is $SV_WHEELHOUSE or wheelhouse in the cache directory)')
+@click.option('--jobs', '-j', type=click.INT, help='Number of requirements to build concurrently')
+@click.pass_obj
+def prefetch(obj, wheelhouse: str, jobs: int) -> None:
+    """Build wheels for the requirements of all known venvs"""
+    if not isinstance(obj, VenvConfig):  # pragma: no cover
+        raise TypeError("ctx.obj must be a VEnvConfig")
+    obj.prefetch(wheelhouse, jobs=jobs)
+
+
+@main.command(name=":lock")  # type: ignore
+@click.option('--jobs', '-j', type=click.INT, help='Number of venvs to resolve concurrently')
+@click.argument('venv_or_scripts', nargs=-1)
+@click.pass_obj
+def lock_venvs(obj, venv_or_scripts: Tuple[str, ...], jobs: int) -> None:
+    """Pin the requirements of venvs (Default is all known venvs)"""
+    if not isinstance(obj, VenvConfig):  # pragma: no cover
+        raise TypeError("ctx.obj must be a VEnvConfig")
+    obj.lock(*venv_or_scripts, jobs=jobs)
+
+
+@main.command(name=":dedupe")  # type: ignore
+@click.option('--store', '-s', 'store_dir', type=click.STRING,
+              help='Directory of the shared store (Default is $SV_STORE or ~/.sv/.store)')
+@click.argument('venv_or_scripts', nargs=-1)
+@click.pass_obj
+def dedupe_venvs(obj, venv_or_scripts: Tuple[str, ...], store_dir: str) -> None:
+    """Hardlink identical files across venvs (Default is all known venvs)"""
+    if not isinstance(obj, VenvConfig):  # pragma: no cover
+        raise TypeError("ctx.obj must be a VEnvConfig")
+    obj.dedupe(*venv_or_scripts, store_dir=store_dir)
+
+
+@main.command(name=":stats")  # type: ignore
+@click.option('--file', '-f', 'stats_file', type=click.STRING,
+              help='Stats file to summarize (Default is $SV_STATS or stats.jsonl in the cache directory)')
+@click.option('--prometheus', '-p', type=click.STRING, help='Also write the summary as a Prometheus textfile')
+@click.option('--top', '-n', type=click.INT, default=10, help='Number of scripts and venvs to show')
+@click.pass_obj
+def show_stats(obj, stats_file: str, prometheus: str, top: int) -> None:
+    """Summarize the runs recorded with SV_STATS set"""
+    if not isinstance(obj, VenvConfig):  # pragma: no cover
+        raise TypeError("ctx.obj must be a VEnvConfig")
+    obj.stats(stats_file=stats_file, prometheus=prometheus, top=top)
+
+
+@main.command(name=":serve")  # type: ignore
+@click.option('--socket', '-s', 'socket_file', type=click.STRING,
+              help='Unix socket to listen on (Default is $SV_SOCKET or sv.sock in the cache directory)')
+@click.option('--idle-timeout', '-t', type=click.INT, default=0,
+              help='Exit after this many seconds without a request')
+@click.pass_obj
+def serve(obj, socket_file: str, idle_timeout: int) -> None:
+    """Serve script lookups to sv clients over a Unix socket"""
+    if not isinstance(obj, VenvConfig):  # pragma: no cover
+        raise TypeError("ctx.obj must be a VEnvConfig")
+    obj.serve(socket_file, idle_timeout=idle_timeout)
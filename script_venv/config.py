@@ -1,14 +1,21 @@
 # -*- coding: utf-8 -*-
 
 """ Config file processing """
-from configparser import ConfigParser
-
+import os
 from os import getcwd, path
 from pathlib2 import Path
+import time
 from types import MappingProxyType
-from typing import Mapping, Set, Dict, Iterable, Tuple, Any, IO, Union  # noqa: F401
+from typing import TYPE_CHECKING
+from typing import Mapping, Set, Dict, Iterable, Iterator, Tuple, Any, IO, Union, List, Optional  # noqa: F401
+
+from .cache import ConfigCache, DirCache
+from . import stats, trace
+from .venv import VEnv, VEnvDependencies, abs_path, _bin
 
-from .venv import VEnv, VEnvDependencies, abs_path
+if TYPE_CHECKING:  # pragma: no cover
+    from configparser import ConfigParser  # noqa: F401
+    from .index import ScriptIndex  # noqa: F401
 
 # noinspection SpellCheckingInspection
 """
@@ -24,11 +31,14 @@ requirements:
 """
 
 _s = "SCRIPTS"
+_CFG = '.sv_cfg'
 _SECTIONS = [_s]
 
 _p = "prerequisites"
 _r = "requirements"
 _l = "location"
+_b = "base"
+_z = "zygote"
 
 
 class ConfigDependencies(object):
@@ -44,21 +54,60 @@ class ConfigDependencies(object):
     def scripts(self, venv: VEnv, packages: Iterable[str]) -> Iterable[Tuple[str, str]]:
         raise NotImplementedError()
 
-    def write(self, config: ConfigParser, path: Path):
+    def write(self, config: 'ConfigParser', path: Path):
         raise NotImplementedError()
 
     def venv_deps(self) -> VEnvDependencies:
         raise NotImplementedError()
 
+    def config_cache(self) -> Optional[ConfigCache]:
+        raise NotImplementedError()
+
+    def dir_cache(self) -> Optional[DirCache]:
+        raise NotImplementedError()
+
+    def script_index(self) -> Optional['ScriptIndex']:
+        raise NotImplementedError()
+
+
+class _LazyVenvs(Mapping[str, VEnv]):
+    """The config's venvs, each built from its spec the first time it is looked up"""
+
+    def __init__(self, config: 'VenvConfig') -> None:
+        self._config = config
+        self._built = {}  # type: Dict[str, VEnv]
+
+    def __getitem__(self, name: str) -> VEnv:
+        venv = self._built.get(name)
+        if venv is None:
+            venv = self._built[name] = self._config._build_venv(name)
+            base = self._config._bases.get(name)
+            if base:
+                venv.base = self[base]
+        return venv
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._config._venv_specs
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._config._venv_specs)
+
+    def __len__(self) -> int:
+        return len(self._config._venv_specs)
+
 
 class VenvConfig(object):
     def __init__(self, deps: ConfigDependencies) -> None:
         self.deps = deps
         self._search_path = [path.join('~', '.config'), "$PARENTS", "$CWD"]
         self._scripts = {}  # type: Dict[str, str]
-        self._venvs = {}  # type: Dict[str, VEnv]
+        self._venv_specs = {}  # type: Dict[str, List[Any]]
+        self._bases = {}  # type: Dict[str, str]
+        self._venvs = _LazyVenvs(self)
+        self._venv_deps = None  # type: Optional[VEnvDependencies]
+        self._script_index = None  # type: Optional['ScriptIndex']
+        self._messages = []  # type: List[str]
         self._scripts_proxy = MappingProxyType(self._scripts)
-        self._venvs_proxy = MappingProxyType(self._venvs)
         self._verbose = False
 
     @staticmethod
@@ -67,33 +116,111 @@ class VenvConfig(object):
         return config_file.as_posix(), abs_path(config_file)
 
     @staticmethod
-    def _packages_section(config: ConfigParser, venv: str, section: str) -> Set[str]:
+    def _packages_section(config: 'ConfigParser', venv: str, section: str) -> Set[str]:
         value = config.get(venv, section, fallback='') or ''
         return {r for r in value.splitlines() if r}
 
+    @staticmethod
+    def _zygote_modules(config: 'ConfigParser', venv: str) -> Optional[List[str]]:
+        """The modules the venv's zygote preloads, or None if the venv doesn't have a zygote"""
+        if not config.has_option(venv, _z):
+            return None
+        value = config.get(venv, _z) or ''
+        return value.split()
+
+    def _parent_paths(self) -> List[str]:
+        """The parents of the working directory (below the filesystem root) from the top down.
+
+        With a root marker, the walk up stops at the first directory holding the marker.
+        With a dir cache, parents known not to hold a config file are left out,
+        without looking for the config file again until the directory changes"""
+        cwd = getcwd()
+        drive, full_path = path.splitdrive(cwd)
+        parts = full_path.split(path.sep)
+        parents = [path.join(drive + path.sep, *parts[:i]) for i in range(2, len(parts))]
+
+        marker = os.environ.get('SV_ROOT_MARKER')
+        dir_cache = self.deps.dir_cache()
+        if not marker and not dir_cache:
+            return [path.relpath(p, start=cwd) for p in parents]
+
+        names = (_CFG, marker) if marker else (_CFG,)
+
+        def holds(dir_path: str, dir_names: Tuple[str, ...]) -> Tuple[bool, ...]:
+            if dir_cache:
+                return dir_cache.holds(dir_path, dir_names)
+            return tuple(self.deps.exists(Path(dir_path) / n) for n in dir_names)
+
+        found = []  # type: List[str]
+        if not marker or not holds(cwd, (marker,))[0]:
+            for parent in reversed(parents):
+                held = holds(parent, names)
+                if held[0] or not dir_cache:
+                    found.append(parent)
+                if marker and held[-1]:
+                    break
+        if dir_cache:
+            dir_cache.save()
+        return [path.relpath(p, start=cwd) for p in reversed(found)]
+
     def _config_paths(self):
         for p in self._search_path:
             if p.upper() == '$PARENTS':
-                cwd = getcwd()
-                drive, full_path = path.splitdrive(cwd)
-                parts = full_path.split(path.sep)
-                for i in range(2, len(parts)):
-                    this_path = path.join(drive + path.sep, *parts[:i])
-                    yield path.join(path.relpath(this_path, start=cwd))
+                yield from self._parent_paths()
             elif p.upper() == '$CWD':
                 yield '.'
             else:
                 yield p
 
+    def _add_venv(self, name: str, path: str,
+                  requirements: Iterable[str] = (), prerequisites: Iterable[str] = (),
+                  location: str | None = None, base: str | None = None,
+                  zygote: Iterable[str] | None = None) -> None:
+        if name in self._venv_specs:
+            return
+        self._venv_specs[name] = [path, sorted(requirements), sorted(prerequisites), location, base,
+                                  None if zygote is None else list(zygote)]
+
+    def _build_venv(self, name: str) -> VEnv:
+        cfg_path, requirements, prerequisites, location, _, zygote = self._venv_specs[name]
+        if self._venv_deps is None:
+            self._venv_deps = self.deps.venv_deps()
+        return VEnv(name, self._venv_deps, cfg_path,
+                    requirements=requirements,
+                    prerequisites=prerequisites,
+                    location=location,
+                    zygote=zygote)
+
+    def _link_bases(self) -> None:
+        """Find the base of each venv, once every config file is loaded"""
+        for name, spec in self._venv_specs.items():
+            base_name = spec[4]
+            if not base_name:
+                continue
+            chain = [name]
+            current = base_name  # type: str | None
+            while current and current in self._venv_specs and current not in chain:
+                chain.append(current)
+                current = self._venv_specs[current][4]
+            if base_name not in self._venv_specs:
+                self.deps.echo("Ignored unknown base %s of venv %s" % (base_name, name))
+            elif current in chain:
+                self.deps.echo("Ignored base %s of venv %s, as its bases loop back to %s" % (base_name, name, current))
+            else:
+                self._bases[name] = base_name
+
+    def _load_venv_section(self, config, path, v):
+        self._add_venv(v, path,
+                       requirements=self._packages_section(config, v, _r),
+                       prerequisites=self._packages_section(config, v, _p),
+                       location=config.get(v, _l, fallback=''),
+                       base=config.get(v, _b, fallback='') or None,
+                       zygote=self._zygote_modules(config, v))
+
     def _load_venvs(self, config, path):
         for v in config:
             if v.islower():
-                new_venv = VEnv(v, self.deps.venv_deps(), path,
-                                requirements=self._packages_section(config, v, _r),
-                                prerequisites=self._packages_section(config, v, _p),
-                                location=config.get(v, _l, fallback='')
-                                )
-                self._venvs.setdefault(v, new_venv)
+                self._load_venv_section(config, path, v)
 
     def _load_scripts(self, config, path):
         if not config.has_section(_s):
@@ -103,26 +230,59 @@ class VenvConfig(object):
         for s in scripts:
             v = scripts[s] or s
             self._scripts[s] = v
-            new_venv = VEnv(v, self.deps.venv_deps(), path)
-            self._venvs.setdefault(v, new_venv)
+            self._add_venv(v, path)
+
+    def _load_venv(self, config: 'ConfigParser', path: str, name: str) -> bool:
+        """Add just the venv name, as a full load of config would. Returns whether config mentions it"""
+        if name.islower() and config.has_section(name):
+            self._load_venv_section(config, path, name)
+            return True
+        if config.has_section(_s) and any((v or s) == name for s, v in config.items(_s)):
+            self._add_venv(name, path)
+            return True
+        return False
+
+    def _read_file(self, path: str) -> Optional['ConfigParser']:
+        from configparser import ConfigParser
 
-    def _load_file(self, path: str):
-        config_file, config_file_path = self._file_path(Path(path))
+        _, config_file_path = self._file_path(Path(path))
 
         if not self.deps.exists(config_file_path):  # pragma: no cover
-            return
+            return None
 
         config = ConfigParser(allow_no_value=True)
         with self.deps.read(config_file_path) as in_config:
             config.read_file(in_config)
-
-        self._load_venvs(config, path)
-        self._load_scripts(config, path)
-
-        ignored = [s for s in config.sections() if not (s.islower() or s in _SECTIONS)]
-
-        if ignored:
-            self.deps.echo("Ignored the following sections of %s: %s" % (config_file, ', '.join(sorted(ignored))))
+        return config
+
+    def _load_file(self, path: str, config: Optional['ConfigParser'] = None):
+        with trace.span('config.load_file', path=path):
+            config_file, _ = self._file_path(Path(path))
+            if config is None:
+                config = self._read_file(path)
+                if config is None:  # pragma: no cover
+                    return
+
+            self._load_venvs(config, path)
+            self._load_scripts(config, path)
+
+            ignored = [s for s in config.sections() if not (s.islower() or s in _SECTIONS)]
+
+            if ignored:
+                msg = "Ignored the following sections of %s: %s" % (config_file, ', '.join(sorted(ignored)))
+                self._messages.append(msg)
+                self.deps.echo(msg)
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return dict(scripts=dict(self._scripts), venvs=self._venv_specs, messages=self._messages)
+
+    def _restore(self, snapshot: Dict[str, Any]) -> None:
+        for name, spec in snapshot['venvs'].items():
+            self._venv_specs.setdefault(name, spec)
+        self._scripts.update(snapshot['scripts'])
+        for msg in snapshot['messages']:
+            self._messages.append(msg)
+            self.deps.echo(msg)
 
     def search_path(self, full_path : str | list[str]) -> None:
         if isinstance(full_path, str):
@@ -130,9 +290,90 @@ class VenvConfig(object):
         elif full_path:
             self._search_path = list(full_path)
 
-    def load(self) -> None:
-        for p in self._config_paths():
+    def config_files(self) -> List[Path]:
+        return [self._file_path(p)[1] for p in self._config_paths()]
+
+    def _load_script(self, paths: List[str], script: str) -> None:
+        parsed = {}  # type: Dict[str, Optional[ConfigParser]]
+
+        def read(p: str) -> Optional['ConfigParser']:
+            if p not in parsed:
+                parsed[p] = self._read_file(p)
+            return parsed[p]
+
+        # A script runs in the venv given by the last file that lists it...
+        name = script.lower()
+        registered = True
+        for p in reversed(paths):
+            config = read(p)
+            if config is not None and config.has_option(_s, name):
+                venv_name = config.get(_s, name) or name
+                break
+        else:
+            # ...unless it is a venv, given a command to run in it...
+            for p in paths:
+                config = read(p)
+                if config is not None and self._load_venv(config, p, name):
+                    return
+            # ...or, if it isn't registered, the venv the script index has it in
+            indexed = self._indexed(script)
+            if not indexed:
+                return
+            venv_name, registered = indexed, False
+
+        # ...which is defined, like each of its bases, by the first file that mentions it.
+        # Only those venvs are loaded, not everything else in the files that define them
+        venv = venv_name  # type: str | None
+        seen = set()  # type: Set[str]
+        while venv and venv not in seen:
+            seen.add(venv)
+            if venv not in self._venv_specs:
+                for p in paths:
+                    config = read(p)
+                    if config is not None and self._load_venv(config, p, venv):
+                        break
+                else:
+                    break
+            venv = self._venv_specs[venv][4]
+        if registered:
+            self._scripts[name] = venv_name
+
+    def load(self, script: str | None = None) -> None:
+        """Load the config files on the search path, or their merged contents from the cache
+        if none of them changed.
+
+        Without a cache, loading for a script reads only the files needed to find it, its venv
+        and their bases, and loads only those"""
+        with trace.span('config.load', script=script):
+            self._load(script)
+
+    def _load(self, script: str | None) -> None:
+        with trace.span('config.paths'):
+            paths = list(self._config_paths())
+        cache = self.deps.config_cache()
+        if not cache:
+            if script:
+                self._load_script(paths, script)
+            else:
+                for p in paths:
+                    self._load_file(p)
+            self._link_bases()
+            return
+
+        # The venvs keep the config paths as found on the search path, which may be relative
+        key = cache.key((self._file_path(p)[1] for p in paths), context=[getcwd()] + paths)
+        with trace.span('config.cache'):
+            snapshot = cache.lookup(key)
+        stats.note(cache='miss' if snapshot is None else 'hit')
+        if snapshot is not None:
+            self._restore(snapshot)
+            self._link_bases()
+            return
+
+        for p in paths:
             self._load_file(p)
+        cache.store(key, self._snapshot())
+        self._link_bases()
 
     def list(self) -> None:
         self.deps.echo("Config Paths: %s" % list(self._config_paths()))
@@ -144,18 +385,122 @@ class VenvConfig(object):
             self.deps.echo(str(venv))
             if v in scripts:
                 self.deps.echo("\tScripts: %s" % ', '.join(sorted(scripts[v])))
+            if venv.base:
+                self.deps.echo("\tBase: %s" % venv.base.name)
             if venv.prerequisites:
                 self.deps.echo("\tPrerequisites: %s" % "\n\t\t".join(sorted(venv.prerequisites)))
             if venv.requirements:
                 self.deps.echo("\tRequirements: %s" % "\n\t\t".join(sorted(venv.requirements)))
 
+    def shims(self, bin_dir: str) -> None:
+        if os.name == 'nt':  # pragma: no cover
+            self.deps.echo("Shims are only supported on POSIX systems")
+            return
+
+        from .shims import Shims, shim_script
+        bin_path = abs_path(Path(bin_dir))
+        source = path.pathsep.join(str(abs_path(Path(p))) for p in self._config_paths())
+        shims = {s: shim_script(self.venvs[v], s, source) for s, v in self._shim_scripts().items()}
+
+        written, unchanged, removed, skipped = Shims(bin_path, source).update(shims)
+        for s in written:
+            self.info("Wrote shim for %s" % s)
+        for s in removed:
+            self.info("Removed shim for %s" % s)
+        for s in skipped:
+            self.deps.echo("Skipped %s, not generated by sv" % (bin_path / s))
+        self.deps.echo("Shims in %s: %d written, %d unchanged, %d removed" %
+                       (bin_path, len(written), len(unchanged), len(removed)))
+
+    def _shim_scripts(self) -> Dict[str, str]:
+        """The scripts sv can run by name, with their venvs: those registered,
+        and those the script index has in a known venv"""
+        scripts = dict(self.scripts)
+        index = self._index()
+        if index:
+            for v in self.venvs:
+                for s in index.scripts(v):
+                    if s not in scripts and self.script_venv(s) == v:
+                        scripts[s] = v
+        return scripts
+
+    def prefetch(self, wheelhouse_dir: str | None = None, jobs: int | None = None) -> None:
+        from .wheelhouse import Wheelhouse, wheelhouse_path
+        wheelhouse_dir_path = abs_path(Path(wheelhouse_dir)) if wheelhouse_dir else wheelhouse_path()
+        wheelhouse = Wheelhouse.load(wheelhouse_dir_path) or Wheelhouse(wheelhouse_dir_path)
+        requirements = {'pip', 'wheel'}
+        for venv in self.venvs.values():
+            requirements |= venv.requirements | venv.prerequisites
+
+        self.deps.echo("Prefetching %d requirements into %s" % (len(requirements), wheelhouse.path))
+        results = wheelhouse.prefetch(requirements, self.deps.venv_deps().runner, jobs=jobs)
+        failed = sorted(r for r, result in results.items() if result != 0)
+        if failed:
+            self.deps.echo("Unable to prefetch: %s" % ', '.join(failed))
+        self.deps.echo("Wheelhouse %s holds %d requirements in %d wheels" %
+                       (wheelhouse.path, len(wheelhouse.requirements), len(wheelhouse.wheels)))
+
+    def lock(self, *venv_or_scripts: str, jobs: int | None = None) -> None:
+        """Resolve and pin the prerequisites and requirements of the given venvs (or all known venvs)"""
+        venvs = self._find_venvs(venv_or_scripts or sorted(self._venvs))
+        if venvs is None:
+            return
+        if not venvs:
+            self.deps.echo("No venvs to lock")
+            return
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+            results = list(pool.map(lambda v: v.lock(), venvs))
+        failed = sorted(v.name for v, result in zip(venvs, results) if result != 0)
+        if failed:
+            self.deps.echo("Unable to lock: %s" % ', '.join(failed))
+
+    def dedupe(self, *venv_or_scripts: str, store_dir: str | None = None) -> None:
+        """Share identical files between the given venvs (or all known venvs) through the store"""
+        from .store import Store, format_size, store_path
+        store = Store(abs_path(Path(store_dir)) if store_dir else store_path())
+
+        venvs = self._find_venvs(venv_or_scripts or sorted(self._venvs))
+        if venvs is None:
+            return
+
+        for venv in (v for v in venvs if v.exists()):
+            self.deps.echo("Deduplicated venv %s: %s" % (venv.name, store.dedupe(venv.abs_path)))
+        removed = store.prune()
+        files, saved = store.usage()
+        self.deps.echo("Store %s holds %d files (%d unused removed), saving %s" %
+                       (store.path, files, removed, format_size(saved)))
+
+    def stats(self, stats_file: str | None = None, prometheus: str | None = None, top: int = 10) -> None:
+        """Summarize the stats recorded by runs with SV_STATS set"""
+        from .stats import Summary, read, stats_path, write_text
+        path = abs_path(Path(stats_file)) if stats_file else stats_path(default=True)
+        assert path is not None
+        records = read(path)
+        if not records:
+            self.deps.echo("No stats in %s, set SV_STATS=1 to record them" % path)
+            return
+
+        summary = Summary(records)
+        for line in summary.lines(top=top):
+            self.deps.echo(line)
+        if prometheus:
+            write_text(abs_path(Path(prometheus)), summary.prometheus())
+
+    def serve(self, socket_file: str | None = None, idle_timeout: int = 0) -> None:
+        from .daemon import serve, socket_path
+        sock_path = abs_path(Path(socket_file)) if socket_file else socket_path()
+        self.deps.echo("Serving sv requests on %s" % sock_path)
+        serve(self.deps, sock_path, idle_timeout=idle_timeout)
+
     @property
     def scripts(self) -> Mapping[str, str]:
         return self._scripts_proxy
 
     @property
     def venvs(self) -> Mapping[str, VEnv]:
-        return self._venvs_proxy
+        return self._venvs
 
     @property
     def verbose(self) -> bool:
@@ -170,6 +515,15 @@ class VenvConfig(object):
 
     def register(self, name: str, packages: Iterable[str],
                  config_path: str | None = None, venv_path: str | None = None) -> None:
+        self.register_all({name: packages}, config_path=config_path, venv_path=venv_path)
+
+    def register_all(self, groups: Mapping[str, Iterable[str]],
+                     config_path: str | None = None, venv_path: str | None = None,
+                     jobs: int | None = None) -> None:
+        """Register the packages of each venv, installing into different venvs concurrently,
+        then write the config file once, with the venvs whose packages installed"""
+        from configparser import ConfigParser
+
         if not config_path:
             config_path = self._search_path[-1]
             self.info("Defaulting config_path to %s" % config_path)
@@ -182,35 +536,159 @@ class VenvConfig(object):
 
         if not config.has_section(_s):
             config.add_section(_s)
-        requirements = self._packages_section(config, name, _r)
 
-        venv = VEnv(name, self.deps.venv_deps(), config_path,
-                    requirements=requirements,
-                    prerequisites=self._packages_section(config, name, _p),
-                    location=venv_path)
+        registering = []  # type: List[Tuple[VEnv, Set[str], List[str]]]
+        for name, packages in groups.items():
+            requirements = self._packages_section(config, name, _r)
+            venv = VEnv(name, self.deps.venv_deps(), config_path,
+                        requirements=requirements,
+                        prerequisites=self._packages_section(config, name, _p),
+                        location=venv_path)
+            registering.append((venv, requirements, list(packages)))
+
+        def venv_scripts(venv: VEnv, packages: List[str]) -> Optional[List[Tuple[str, str]]]:
+            try:
+                return list(self.deps.scripts(venv, packages))
+            except Exception as exc:
+                self.deps.echo("Error registering %s into venv %s: %s" % (', '.join(packages), venv.name, exc))
+                return None
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(jobs or os.cpu_count() or 1, len(registering) or 1)) as pool:
+            results = list(pool.map(lambda r: venv_scripts(r[0], r[2]), registering))
+
+        failed = sorted(venv.name for (venv, _, _), scripts in zip(registering, results) if scripts is None)
+        if failed:
+            self.deps.echo("Unable to register into: %s" % ', '.join(failed))
+        if len(failed) == len(registering):
+            return
 
-        for p, s in self.deps.scripts(venv, packages):
-            self.deps.echo("Registering %s from %s into %s" % (s, p, name))
-            config.set(_s, s, name)
+        for (venv, requirements, packages), scripts in zip(registering, results):
+            if scripts is None:
+                continue
+            for p, s in scripts:
+                self.deps.echo("Registering %s from %s into %s" % (s, p, venv.name))
+                config.set(_s, s, venv.name)
 
-        if not config.has_section(name):
-            config.add_section(name)
-        config.set(name, _r, '\n'.join(sorted(requirements | set(packages))))
+            if not config.has_section(venv.name):
+                config.add_section(venv.name)
+            config.set(venv.name, _r, '\n'.join(sorted(requirements | set(packages))))
 
         self.deps.write(config, config_file_path)
 
-    def create(self, venv_or_script: str, *extra_params: str,
-               clean: bool = False, update: bool = False) -> None:
+    def _index(self) -> Optional['ScriptIndex']:
+        if self._script_index is None:
+            self._script_index = self.deps.script_index()
+        return self._script_index
+
+    def _indexed(self, script: str) -> str | None:
+        index = self._index()
+        return index.lookup(script) if index else None
+
+    def script_venv(self, script: str) -> str | None:
+        """The name of the venv a script runs in: the one it is registered to,
+        otherwise the one the script index last saw it installed into.
+        None if the name is a venv's, as ``sv VENV CMD`` runs CMD in that venv"""
+        venv_name = self._scripts.get(script.lower())
+        if venv_name:
+            return venv_name
+        if script.lower() in self._venvs:
+            return None
+
+        venv_name = self._indexed(script)
+        if venv_name and venv_name in self._venvs and \
+                self.deps.exists(self._venvs[venv_name].abs_path / _bin / script):
+            return venv_name
+        return None
+
+    def _find_venv(self, venv_or_script: str) -> VEnv | None:
         if venv_or_script in self._venvs:
-            venv = self._venvs[venv_or_script]
-        elif venv_or_script in self._scripts:
-            v = self._scripts[venv_or_script]
-            venv = self._venvs[v]
+            return self._venvs[venv_or_script]
+        if venv_or_script in self._scripts:
+            return self._venvs[self._scripts[venv_or_script]]
+        return None
+
+    def _find_venvs(self, venv_or_scripts: Iterable[str]) -> List[VEnv] | None:
+        venvs = []  # type: List[VEnv]
+        for target in venv_or_scripts:
+            venv = self._find_venv(target)
+            if not venv:
+                self.deps.echo("Unable to find venv or script %s" % target)
+                return None
+            if venv not in venvs:
+                venvs.append(venv)
+        return venvs
+
+    def _create_one(self, venv: VEnv, extra_params: Iterable[str], clean: bool, update: bool) -> int:
+        from .install import InstallPlan
+        with venv.deps.locked(venv.abs_path):
+            plan = InstallPlan()
+            if not venv.create(clean=clean, update=update, plan=plan):
+                self.info("Using venv %s at %s" % (venv.name, venv.env_path))
+                # Its base may have changed since it was created, and the stamp vouches for that too
+                venv.layer()
+            venv.plan_requirements(plan, update=update, extra=extra_params)
+            result = venv.install_plan(plan)
+            if result == 0:
+                venv.mark_ready()
+            return result
+
+    def _create_logged(self, venv: VEnv, extra_params: Iterable[str], clean: bool, update: bool) -> Tuple[int, float]:
+        log_path = venv.abs_path.parent / (venv.name + '.log')
+        start = time.monotonic()
+        try:
+            with venv.deps.log_to(log_path):
+                result = self._create_one(venv, extra_params, clean, update)
+        except Exception as exc:
+            self.deps.echo("Error creating venv %s: %s" % (venv.name, exc))
+            result = -1
+        return result, time.monotonic() - start
+
+    def _create_many(self, venvs: List[VEnv], extra_params: Iterable[str],
+                     clean: bool, update: bool, jobs: int | None) -> None:
+        from concurrent.futures import ThreadPoolExecutor
+
+        jobs = jobs or os.cpu_count() or 1
+        self.deps.echo("Creating %d venvs with %d jobs" % (len(venvs), jobs))
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = [(venv, pool.submit(self._create_logged, venv, list(extra_params), clean, update))
+                       for venv in venvs]
+            results = [(venv, future.result()) for venv, future in futures]
+
+        failed = 0
+        for venv, (result, elapsed) in results:
+            status = 'ok' if result == 0 else 'FAILED'
+            failed += result != 0
+            self.deps.echo("\t%s: %s in %.1fs (log: %s)" %
+                           (venv.name, status, elapsed, venv.abs_path.parent / (venv.name + '.log')))
+        self.deps.echo("Created %d venvs, %d failed, in %.1fs" %
+                       (len(results) - failed, failed, time.monotonic() - start))
+
+    def create(self, venv_or_script: str, *extra_params: str, also: Iterable[str] = (),
+               clean: bool = False, update: bool = False, jobs: int | None = None) -> None:
+        """Create the named venv, or the venv of the named script, and apply its requirements.
+        The venvs or scripts named in also are created concurrently with it"""
+        venvs = []  # type: List[VEnv]
+        params = list(extra_params)
+        for target in [venv_or_script] + list(also):
+            venv = self._find_venv(target)
+            if not venv:
+                self.deps.echo("Unable to find venv or script %s" % target)
+                return
+            if venv not in venvs:
+                venvs.append(venv)
+
+        if len(venvs) == 1 and not jobs:
+            self._create_one(venvs[0], params, clean, update)
         else:
-            self.deps.echo("Unable to find venv or script %s" % venv_or_script)
+            self._create_many(venvs, params, clean, update, jobs)
+
+    def create_all(self, *extra_params: str, clean: bool = False, update: bool = False,
+                   jobs: int | None = None) -> None:
+        """Create all known venvs concurrently"""
+        venvs = [self._venvs[v] for v in sorted(self._venvs)]
+        if not venvs:
+            self.deps.echo("No venvs to create")
             return
-
-        if not venv.create(clean=clean, update=update):
-            self.info("Using venv %s at %s" % (venv.name, venv.env_path))
-        install_params = (['-U'] if update else []) + list(sorted(venv.requirements)) + list(extra_params)
-        venv.install(*install_params)
+        self._create_many(venvs, extra_params, clean, update, jobs)
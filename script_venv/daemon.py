@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+""" Persistent sv server and its thin client """
+
+import os
+from pathlib2 import Path
+from typing import Any, Dict, List, Optional, Tuple  # noqa: F401
+
+from .cache import CacheKey, ConfigCache, cache_dir  # noqa: F401
+from .config import VenvConfig, ConfigDependencies
+from .venv import VEnv
+
+_TIMEOUT = 5.0
+
+_Resolved = Dict[str, Tuple[VEnv, List[str]]]
+
+
+def socket_path() -> Path:
+    env_socket = os.environ.get('SV_SOCKET')
+    if env_socket:
+        return Path(env_socket).expanduser()
+    return cache_dir() / 'sv.sock'
+
+
+def request(sock_path: Path, argv: List[str], cwd: str, env: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """Ask the server to resolve argv, returning the command and environment to exec,
+    or None when the client should handle the invocation itself"""
+    import json
+    import socket
+
+    message = json.dumps(dict(argv=argv, cwd=cwd, env=env)).encode('utf-8') + b'\n'
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(_TIMEOUT)
+            client.connect(str(sock_path))
+            client.sendall(message)
+            with client.makefile('rb') as in_reply:
+                reply = json.loads(in_reply.readline().decode('utf-8'))
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(reply, dict) or not reply.get('cmd'):
+        return None
+    return reply
+
+
+class SvServer(object):
+    """Keeps loaded configs per working directory, reloading them when any config file changes,
+    and remembers the commands resolved in each venv. Whether the venv is ready is checked on every request,
+    as it may have been locked or rebuilt since"""
+
+    def __init__(self, deps: ConfigDependencies) -> None:
+        self.deps = deps
+        self._configs = {}  # type: Dict[Tuple[str, str], Tuple[CacheKey, VenvConfig, _Resolved]]
+
+    def resolve(self, argv: List[str], cwd: str, env: Dict[str, str]) -> Dict[str, Any]:
+        if not argv or argv[0].startswith(('-', ':')):
+            return {}
+
+        old_cwd, old_env = os.getcwd(), dict(os.environ)
+        try:
+            os.chdir(cwd)
+            os.environ.clear()
+            os.environ.update(env)
+            os.environ['CWD'] = cwd
+            return self._resolve(argv, cwd)
+        except OSError:
+            return {}
+        finally:
+            os.chdir(old_cwd)
+            os.environ.clear()
+            os.environ.update(old_env)
+
+    def _resolve(self, argv: List[str], cwd: str) -> Dict[str, Any]:
+        config_key = (cwd, os.environ.get('HOME', ''))
+        config = VenvConfig(deps=self.deps)
+        key = ConfigCache.key(config.config_files())
+
+        state = self._configs.get(config_key)
+        if not state or state[0] != key:
+            config.load()
+            state = (key, config, {})
+            self._configs[config_key] = state
+        _, config, resolved = state
+
+        name = argv[0]
+        if name not in resolved:
+            venv_name = config.script_venv(name)
+            if not venv_name:
+                return {}
+            venv = config.venvs[venv_name]
+            if not venv.is_ready():
+                return {}
+            resolved[name] = (venv, venv.command(name))
+        elif not resolved[name][0].is_ready():
+            del resolved[name]
+            return {}
+
+        venv, cmd = resolved[name]
+        reply = dict(cmd=cmd + argv[1:], env=venv._run_env())  # type: Dict[str, Any]
+        if venv.zygote is not None:
+            reply['zygote'] = venv.zygote
+        return reply
+
+
+def serve(deps: ConfigDependencies, sock_path: Path, idle_timeout: int = 0) -> None:
+    import json
+    import socketserver
+
+    server_state = SvServer(deps)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            try:
+                message = json.loads(self.rfile.readline().decode('utf-8'))
+                reply = server_state.resolve(list(message['argv']), str(message['cwd']), dict(message['env']))
+            except (ValueError, KeyError, TypeError):
+                reply = {}
+            self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+
+    sock_path.parent.mkdir(parents=True, exist_ok=True)
+    if sock_path.exists():
+        sock_path.unlink()
+
+    old_umask = os.umask(0o077)
+    try:
+        server = socketserver.UnixStreamServer(str(sock_path), Handler)
+    finally:
+        os.umask(old_umask)
+
+    idle = [False]
+
+    def handle_timeout() -> None:
+        idle[0] = True
+
+    server.timeout = idle_timeout or None
+    server.handle_timeout = handle_timeout  # type: ignore
+    try:
+        with server:
+            while not idle[0]:
+                server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if sock_path.exists():
+            sock_path.unlink()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+""" Installed distribution metadata """
+
+from configparser import ConfigParser
+import os
+import re
+import sys
+from pathlib2 import Path
+from typing import Dict, Iterable, List, Optional, Tuple  # noqa: F401
+
+_NAME_SEP = re.compile(r'[-_.]+')
+_REQUIREMENT_NAME = re.compile(r'\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+
+
+def normalize_name(name: str) -> str:
+    return _NAME_SEP.sub('-', name).lower()
+
+
+def python_version(venv_path: Path) -> Optional[str]:
+    """The venv's "X.Y" python version, as recorded in its pyvenv.cfg"""
+    try:
+        with (venv_path / 'pyvenv.cfg').open() as in_cfg:
+            lines = in_cfg.read().splitlines()
+    except OSError:
+        return None
+    for line in lines:
+        key, _, value = line.partition('=')
+        if key.strip() in ('version', 'version_info'):
+            return '.'.join(value.strip().split('.')[:2])
+    return None
+
+
+def site_packages(venv_path: Path) -> Path:
+    if os.name == 'nt':  # pragma: no cover
+        return venv_path / 'Lib' / 'site-packages'
+    version = python_version(venv_path) or '%d.%d' % sys.version_info[:2]
+    return venv_path / 'lib' / ('python%s' % version) / 'site-packages'
+
+
+def parse_entry_points(text: str) -> Dict[str, Dict[str, str]]:
+    config = ConfigParser(delimiters=('=',), interpolation=None)
+    config.optionxform = str  # type: ignore
+    config.read_string(text)
+    return {s: dict(config.items(s)) for s in config.sections()}
+
+
+def dist_infos(site_path: Path) -> Dict[str, Path]:
+    """The .dist-info directories in site_path by normalized distribution name"""
+    try:
+        entries = list(site_path.iterdir())
+    except OSError:
+        return {}
+    return {normalize_name(e.stem.split('-')[0]): e for e in entries if e.suffix == '.dist-info'}
+
+
+def find_dist_info(site_path: Path, name: str) -> Optional[Path]:
+    return dist_infos(site_path).get(normalize_name(name))
+
+
+def _read_text(path: Path) -> Optional[str]:
+    try:
+        with path.open(encoding='utf-8') as in_file:
+            return in_file.read()
+    except OSError:
+        return None
+
+
+def dist_scripts(dist_info: Path) -> List[str]:
+    """The console scripts of an installed distribution, along with
+    any other scripts its RECORD lists in the venv's bin directory"""
+    import csv
+    scripts = []  # type: List[str]
+    entry_points = _read_text(dist_info / 'entry_points.txt')
+    if entry_points:
+        try:
+            scripts.extend(parse_entry_points(entry_points).get('console_scripts', {}))
+        except ValueError:
+            pass
+
+    record = _read_text(dist_info / 'RECORD')
+    if record:
+        bin_dir = 'Scripts' if os.name == 'nt' else 'bin'
+        for row in csv.reader(record.splitlines()):
+            # Paths in RECORD are relative to site-packages, so scripts are under ../../../bin
+            parts = row[0].replace('\\', '/').split('/') if row else []
+            if len(parts) > 1 and parts[-2] == bin_dir and parts[0] == '..':
+                name = parts[-1]
+                if name.endswith('.exe'):  # pragma: no cover
+                    name = name[:-len('.exe')]
+                if name not in scripts:
+                    scripts.append(name)
+    return scripts
+
+
+def package_scripts(venv_path: Path, packages: Iterable[str]) -> List[Tuple[str, str]]:
+    """The (package, script) pairs of the scripts installed in the venv by each of the packages.
+
+    Reading each package's metadata costs a few small file reads, done in parallel across packages"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    packages = list(packages)
+    infos = dist_infos(site_packages(venv_path))
+    names = [_REQUIREMENT_NAME.match(p) for p in packages]
+    found = [infos.get(normalize_name(n.group(1))) if n else None for n in names]
+    with ThreadPoolExecutor(max_workers=min(8, len(packages) or 1)) as pool:
+        scripts = list(pool.map(lambda d: dist_scripts(d) if d else [], found))
+    return [(p, s) for p, package_scripts in zip(packages, scripts) for s in package_scripts]
@@ -2,25 +2,44 @@
 
 """ Config file processing """
 
-import click
-from click import echo
-from configparser import ConfigParser
+from contextlib import contextmanager
 import os
 from pathlib2 import Path
-import subprocess
-from sys import version_info, platform
-from typing import Iterable, Tuple, Dict, Any, IO, Mapping  # noqa: F401
-import venv
+import sys
+import threading
+from typing import TYPE_CHECKING, Iterable, Iterator, Tuple, Dict, Any, IO, List, Mapping, Optional  # noqa: F401
 
+from . import stats, trace
+from .cache import ConfigCache, DirCache, cache_dir
 from .config import ConfigDependencies
-from .venv import VEnv, VEnvDependencies
+from .venv import VEnv, VEnvDependencies, _STAMP, _bin
+
+if TYPE_CHECKING:  # pragma: no cover
+    from configparser import ConfigParser  # noqa: F401
+    from .index import ScriptIndex  # noqa: F401
+    from .wheelhouse import Wheelhouse  # noqa: F401
 
 
 class ConfigDependenciesImpl(ConfigDependencies):  # pragma: no cover
     def venv_deps(self) -> VEnvDependencies:
         return VEnvDependenciesImpl()
 
+    def config_cache(self) -> Optional[ConfigCache]:
+        if os.environ.get('SV_NO_CACHE'):
+            return None
+        return ConfigCache(cache_dir())
+
+    def dir_cache(self) -> Optional[DirCache]:
+        if os.environ.get('SV_NO_CACHE'):
+            return None
+        return DirCache(cache_dir())
+
+    def script_index(self) -> Optional['ScriptIndex']:
+        from .index import ScriptIndex, index_path
+        return ScriptIndex(index_path(cache_dir()))
+
     def echo(self, msg: str):
+        import click
         click.echo(msg)
 
     def exists(self, path: Path) -> bool:
@@ -30,52 +49,209 @@ class ConfigDependenciesImpl(ConfigDependencies):  # pragma: no cover
         return path.open()
 
     def scripts(self, venv: VEnv, packages: Iterable[str]) -> Iterable[Tuple[str, str]]:
-        if venv.create(update=True):
-            if venv.requirements:
-                venv.install(*venv.requirements)
-        venv.install(*packages)
+        # An existing venv is kept as it is, rather than updated, and only gets the new packages.
+        # A new one gets its requirements installed along with them, in the same pip run
+        from .distributions import package_scripts
+        from .install import InstallPlan
+        with venv.deps.locked(venv.abs_path):
+            plan = InstallPlan()
+            if venv.create(plan=plan):
+                venv.plan_requirements(plan)
+            plan.add(*packages)
+            venv.install_plan(plan)
 
-        try:
-            import pkg_resources
-        except ImportError:
-            echo("Unable to import pkg_resources to register %s into %s" % (sorted(packages), venv))
-            return []
+        return package_scripts(venv.abs_path, packages)
 
-        if platform == 'win32':
-            libpath = venv.abs_path / 'lib' / 'site-packages'
-        else:
-            ver_path = 'python%d.%d' % version_info[:2]
-            libpath = venv.abs_path / 'lib' / ver_path
+    def write(self, config: 'ConfigParser', path: Path):
+        with path.open('w') as out_config:
+            config.write(out_config)
 
-        pkg_env = pkg_resources.Environment(search_path=[str(libpath / 'site-packages')])
 
-        def pkg_scripts(p: str) -> Iterable[str]:
-            scripts = {}  # type: Dict
-            dist = pkg_env[p]
-            if len(dist):
-                scripts = dist[0].get_entry_map().get('console_scripts') or {}
-            return scripts.keys()
+class VEnvDependenciesImpl(VEnvDependencies):  # pragma: no cover
+    _log = threading.local()
 
-        return ((s, p) for p in packages for s in pkg_scripts(p))
+    def _log_file(self) -> Optional[IO[Any]]:
+        return getattr(self._log, 'file', None)
 
-    def write(self, config: ConfigParser, path: Path):
-        with path.open('w') as out_config:
-            config.write(out_config)
+    @contextmanager
+    def log_to(self, path: Path) -> Iterator[None]:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open('w') as log_file:
+            self._log.file = log_file
+            try:
+                yield
+            finally:
+                self._log.file = None
 
+    @contextmanager
+    def locked(self, path: Path) -> Iterator[None]:
+        if os.name == 'nt':
+            yield
+            return
+
+        import fcntl
+        import shutil
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with (path.parent / ('.%s.lock' % path.name)).open('a') as lock_file:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self.echo("Waiting for another sv to set up venv %s" % path)
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            # Locks die with their process, so build directories left now are from crashed builds
+            for stale_build in path.parent.glob('.%s.*.tmp' % path.name):
+                # Leave the builds of other venvs whose names start the same, such as .name.other.<pid>.tmp
+                if not stale_build.name[len(path.name) + 2:-len('.tmp')].isdigit():
+                    continue
+                self.echo("Removing stale build %s" % stale_build)
+                shutil.rmtree(str(stale_build), ignore_errors=True)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def promote(self, build_path: Path, path: Path) -> None:
+        from .template import relocate
+        if path.exists():
+            # Only a broken venv or template is replaced, so it can go before the new one is in place
+            import shutil
+            shutil.rmtree(str(path))
+        os.rename(str(build_path), str(path))
+        relocate(path, _bin, build_path)
 
-class VEnvDependenciesImpl(VEnvDependencies):  # pragma: no cover
     def creator(self, path: Path, clear: bool = False) -> None:
+        import venv
         venv.create(str(path), with_pip=True, clear=clear)
 
+    def cloner(self, template: Path, path: Path) -> bool:
+        import shutil
+        from .template import clone
+        try:
+            clone(template, path, _bin, ignore={_STAMP})
+        except OSError as e:
+            self.echo("Unable to clone template %s: %s" % (template, e))
+            shutil.rmtree(str(path), ignore_errors=True)
+            return False
+        return True
+
+    def template_dir(self) -> Optional[Path]:
+        if os.environ.get('SV_NO_TEMPLATES'):
+            return None
+        from .template import template_path
+        return template_path()
+
     def echo(self, msg: str):
+        log_file = self._log_file()
+        if log_file:
+            log_file.write(msg + '\n')
+            log_file.flush()
+            return
+        import click
         click.echo(msg)
 
     def exists(self, path: Path) -> bool:
         return path.exists()
 
+    def unpacker(self, wheels: Mapping[Path, List[str]], path: Path) -> int:
+        import zipfile
+        from .wheels import install_wheels
+
+        try:
+            install_wheels(wheels, path)
+        except (OSError, ValueError, StopIteration, zipfile.BadZipFile) as e:
+            self.echo("Unable to unpack wheels, falling back to pip: %s" % e)
+            return 1
+        self.echo("Unpacked %d wheels into %s" % (len(wheels), path))
+        return 0
+
+    def wheelhouse(self) -> Optional['Wheelhouse']:
+        from .wheelhouse import Wheelhouse, wheelhouse_path
+        return Wheelhouse.load(wheelhouse_path())
+
+    def post_install(self, path: Path) -> None:
+        if not os.environ.get('SV_DEDUPE'):
+            return
+        from .store import Store, store_path
+        self.echo("Deduplicated %s: %s" % (path, Store(store_path()).dedupe(path)))
+
+    def index_scripts(self, name: str, path: Path) -> None:
+        from .index import ScriptIndex, index_path, venv_scripts
+        try:
+            ScriptIndex(index_path(cache_dir())).update(name, venv_scripts(path / _bin))
+        except OSError as e:
+            self.echo("Unable to index the scripts of venv %s: %s" % (name, e))
+
+    def read_text(self, path: Path) -> Optional[str]:
+        try:
+            with path.open() as in_file:
+                return in_file.read()
+        except OSError:
+            return None
+
+    def write_text(self, path: Path, text: str) -> None:
+        # Replace rather than rewrite the file, as it may be linked from the store
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name('.%s.%d' % (path.name, os.getpid()))
+        with temp_path.open('w') as out_file:
+            out_file.write(text)
+        os.replace(str(temp_path), str(path))
+
+    def capture(self, cmd: Iterable[str], env: Mapping[str, str] | None = None) -> Tuple[int, str]:
+        new_env = dict(os.environ)  # type: Dict[str, str]
+        if env:
+            new_env.update(env)
+
+        import subprocess
+        log_file = self._log_file()
+        completed = subprocess.run(list(cmd), env=new_env, stdout=subprocess.PIPE,
+                                   stderr=log_file or None, universal_newlines=True)
+        return completed.returncode, completed.stdout
+
     def runner(self, cmd: Iterable[str], env: Mapping[str, str] | None = None) -> int:
         new_env = dict(os.environ)  # type: Dict[str, str]
         if env:
             new_env.update(env)
 
+        import subprocess
+        log_file = self._log_file()
+        if log_file:
+            return subprocess.call(list(cmd), env=new_env, stdout=log_file, stderr=subprocess.STDOUT)
         return subprocess.call(list(cmd), env=new_env)
+
+    def execer(self, cmd: Iterable[str], env: Mapping[str, str] | None = None) -> int:
+        if os.name == 'nt':
+            return self.runner(cmd, env=env)
+
+        new_env = dict(os.environ)  # type: Dict[str, str]
+        if env:
+            new_env.update(env)
+
+        args = list(cmd)
+        trace.flush()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        stats_file = stats.stats_path()
+        if stats_file:
+            return stats.spawn(args, new_env, stats_file)
+        os.execve(args[0], args, new_env)
+
+    def forker(self, cmd: Iterable[str], env: Mapping[str, str] | None = None,
+               modules: Iterable[str] = ()) -> Optional[int]:
+        if os.name == 'nt' or os.environ.get('SV_NO_ZYGOTES'):
+            return None
+
+        new_env = dict(os.environ)  # type: Dict[str, str]
+        if env:
+            new_env.update(env)
+
+        from .zygote import ZygotePool
+        pool = ZygotePool.from_env(cache_dir() / 'zygotes')
+        args, modules = list(cmd), list(modules)
+        trace.flush()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        stats_file = stats.stats_path()
+        if stats_file:
+            stats.note(zygote=True)
+            return stats.handed_off(lambda: pool.run(args, new_env, modules), stats_file)
+        return pool.run(args, new_env, modules)
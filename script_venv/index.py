@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+""" Index of the scripts installed in every venv """
+
+import marshal
+import os
+import re
+from contextlib import contextmanager
+from pathlib2 import Path
+from typing import Dict, Iterable, Iterator, List, Optional  # noqa: F401
+
+_VERSION = 1
+
+# Executables every venv has, which would otherwise all map to whichever venv was installed into last
+_GENERIC = re.compile(r'^(python[0-9.]*w?|pythonw|pip[0-9.]*|easy_install(-[0-9.]+)?|wheel|'
+                      r'activate(_this\.py|\.[a-z0-9]+)?|Activate\.ps1|deactivate\.bat|__pycache__)$',
+                      re.IGNORECASE)
+
+
+def index_path(cache_path: Path) -> Path:
+    return cache_path / 'scripts.bin'
+
+
+def venv_scripts(bin_path: Path) -> List[str]:
+    """The executables in a venv's bin directory, other than those every venv has"""
+    try:
+        entries = list(os.scandir(str(bin_path)))
+    except OSError:
+        return []
+    scripts = []
+    for entry in entries:
+        name = entry.name[:-len('.exe')] if entry.name.lower().endswith('.exe') else entry.name
+        if _GENERIC.match(name):
+            continue
+        try:
+            if entry.is_file() and os.access(entry.path, os.X_OK):
+                scripts.append(name)
+        except OSError:
+            continue
+    return sorted(scripts)
+
+
+class ScriptIndex(object):
+    """Maps each script to the venv it was last installed into, with a single dict lookup.
+
+    Each venv's scripts are kept alongside, so reindexing a venv drops the scripts it no longer has"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._scripts = None  # type: Optional[Dict[str, str]]
+        self._venvs = None  # type: Optional[Dict[str, List[str]]]
+
+    def _load(self) -> None:
+        if self._scripts is not None:
+            return
+        try:
+            with self.path.open('rb') as in_index:
+                data = marshal.load(in_index)
+        except (OSError, EOFError, ValueError, TypeError):
+            data = None
+        if isinstance(data, dict) and data.get('version') == _VERSION:
+            self._scripts, self._venvs = data['scripts'], data['venvs']
+        else:
+            self._scripts, self._venvs = {}, {}
+
+    def lookup(self, script: str) -> Optional[str]:
+        """The name of the venv that provides script, if any"""
+        self._load()
+        assert self._scripts is not None
+        return self._scripts.get(script)
+
+    def scripts(self, venv_name: str) -> List[str]:
+        """The scripts indexed for venv_name"""
+        self._load()
+        assert self._venvs is not None
+        return list(self._venvs.get(venv_name, []))
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        if os.name == 'nt':  # pragma: no cover
+            yield
+            return
+        import fcntl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.with_name(self.path.name + '.lock').open('a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            yield
+
+    def update(self, venv_name: str, scripts: Iterable[str]) -> None:
+        """Replace the scripts indexed for venv_name, re-reading the index under a lock
+        so concurrent updates for other venvs aren't lost"""
+        with self._locked():
+            self._scripts = None
+            self._load()
+            assert self._scripts is not None and self._venvs is not None
+            for script in self._venvs.pop(venv_name, []):
+                if self._scripts.get(script) == venv_name:
+                    del self._scripts[script]
+            scripts = sorted(scripts)
+            if scripts:
+                self._venvs[venv_name] = scripts
+            for script in scripts:
+                self._scripts[script] = venv_name
+
+            temp_file = self.path.with_name('%s.%d' % (self.path.name, os.getpid()))
+            with temp_file.open('wb') as out_index:
+                marshal.dump(dict(version=_VERSION, scripts=self._scripts, venvs=self._venvs), out_index)
+            os.replace(str(temp_file), str(self.path))
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+""" Install planning """
+
+from typing import List, Iterable, Tuple  # noqa: F401
+
+
+class _Step(object):
+    def __init__(self, options: Tuple[str, ...], extra: Tuple[str, ...], prerequisite: bool) -> None:
+        self.options = options
+        self.extra = extra
+        self.prerequisite = prerequisite
+        self.packages = []  # type: List[str]
+
+    def accepts(self, options: Tuple[str, ...], extra: Tuple[str, ...], prerequisite: bool) -> bool:
+        return (self.options, self.extra, self.prerequisite) == (options, extra, prerequisite)
+
+    def command(self) -> List[str]:
+        return list(self.options) + self.packages + list(self.extra)
+
+
+class InstallPlan(object):
+    """Collects the installs needed to set up a venv and merges them into as few pip runs as possible.
+
+    Installs are merged with the previous one when they share the same pip options.
+    Prerequisites are never merged with other installs, so they are importable before anything after them"""
+
+    def __init__(self) -> None:
+        self.requested = 0
+        self._steps = []  # type: List[_Step]
+
+    def add(self, *packages: str, options: Iterable[str] = (), extra: Iterable[str] = (),
+            prerequisite: bool = False) -> None:
+        options, extra = tuple(options), tuple(extra)
+        if not packages and not extra:
+            return
+
+        self.requested += 1
+        if not self._steps or not self._steps[-1].accepts(options, extra, prerequisite):
+            self._steps.append(_Step(options, extra, prerequisite))
+        step = self._steps[-1]
+        step.packages.extend(p for p in packages if p not in step.packages)
+
+    @property
+    def commands(self) -> List[List[str]]:
+        return [step.command() for step in self._steps]
+
+    @property
+    def saved(self) -> int:
+        return self.requested - len(self._steps)
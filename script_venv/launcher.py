@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+"""Fast path entry point for script_venv.
+
+Runs registered scripts without importing click,
+falling back to the full click ``main`` for everything else.
+
+The config, venv, factory, lock and daemon modules import what only other commands need
+(click, configparser, subprocess, hashlib, ...) inside the functions that use it, to keep it off this path."""
+
+import os
+import sys
+from typing import List, Optional  # noqa: F401
+
+from . import stats, trace
+from .config import VenvConfig, ConfigDependencies
+from .factory import ConfigDependenciesImpl
+
+
+def _full_main(args: List[str]) -> int:
+    from .cli import main as cli_main
+    return cli_main.main(args=args, prog_name='sv')
+
+
+def _daemon_main(args: List[str], deps: ConfigDependencies) -> Optional[int]:
+    from .daemon import request, socket_path
+
+    sock_path = socket_path()
+    if not sock_path.exists():
+        return None
+
+    reply = request(sock_path, args, os.getcwd(), dict(os.environ))
+    if not reply:
+        return None
+
+    venv_deps = deps.venv_deps()
+    try:
+        if reply.get('zygote') is not None:
+            result = venv_deps.forker(reply['cmd'], env=reply['env'], modules=reply['zygote'])
+            if result is not None:
+                return result
+        return venv_deps.execer(reply['cmd'], env=reply['env'])
+    except OSError:
+        return None
+
+
+def main(argv: Optional[List[str]] = None, deps: Optional[ConfigDependencies] = None) -> int:
+    """Console script for script_venv."""
+    args = sys.argv[1:] if argv is None else list(argv)
+    if not args or args[0].startswith(('-', ':')):
+        return _full_main(args)
+
+    trace.start_from_env()
+    deps = deps or ConfigDependenciesImpl()
+    stats.note(script=args[0])
+    with trace.span('daemon.request'):
+        result = _daemon_main(args, deps)
+    if result is not None:
+        return result
+
+    config = VenvConfig(deps=deps)
+    config.load(script=args[0])
+
+    venv_name = config.script_venv(args[0])
+    if not venv_name:
+        return _full_main(args)
+
+    stats.note(venv=venv_name)
+    venv = config.venvs[venv_name]
+    if not venv.is_ready():
+        return _full_main(args)
+
+    return venv.exec(args[0], *args[1:])
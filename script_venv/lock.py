@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+""" Pinned requirement locks """
+
+import sys
+from typing import Any, Dict, Iterable, List, Optional  # noqa: F401
+
+LOCK_DIR = '.sv_lock'
+
+_HEADER = '# Locked by sv :lock for venv %s (%s)\n'
+_INTERPRETER = '# interpreter: '
+_INPUTS = '# inputs: '
+
+
+def interpreter_tag() -> str:
+    import sysconfig
+    return '%s-%s' % (sys.implementation.cache_tag, sysconfig.get_platform())
+
+
+def inputs_hash(prerequisites: Iterable[str], requirements: Iterable[str]) -> str:
+    import hashlib
+    parts = ['prerequisite %s' % p for p in sorted(prerequisites)]
+    parts.extend('requirement %s' % r for r in sorted(requirements))
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def report_pins(report: Dict[str, Any]) -> List[str]:
+    """Requirement lines pinning everything a ``pip install --report`` would install"""
+    from .distributions import normalize_name
+    pins = []
+    for item in report.get('install', []):
+        name = normalize_name(item['metadata']['name'])
+        download_info = item.get('download_info') or {}
+        archive_info = download_info.get('archive_info')
+        if archive_info is None:
+            pins.append('%s @ %s' % (name, download_info['url']))
+            continue
+
+        pin = '%s==%s' % (name, item['metadata']['version'])
+        sha256 = (archive_info.get('hashes') or {}).get('sha256')
+        if not sha256 and archive_info.get('hash', '').startswith('sha256='):
+            sha256 = archive_info['hash'][len('sha256='):]
+        pins.append(pin + (' --hash=sha256:%s' % sha256 if sha256 else ''))
+    return sorted(pins)
+
+
+class Lock(object):
+    """Requirements pinned for one interpreter, as a pip requirements file
+    with the interpreter and a hash of the config they were resolved from in its header"""
+
+    def __init__(self, interpreter: str, inputs: str, pins: Iterable[str]) -> None:
+        self.interpreter = interpreter
+        self.inputs = inputs
+        self.pins = list(pins)
+
+    @classmethod
+    def parse(cls, text: str) -> Optional['Lock']:
+        interpreter = inputs = None
+        pins = []
+        for line in text.splitlines():
+            if line.startswith(_INTERPRETER):
+                interpreter = line[len(_INTERPRETER):].strip()
+            elif line.startswith(_INPUTS):
+                inputs = line[len(_INPUTS):].strip()
+            elif line and not line.startswith('#'):
+                pins.append(line)
+        if not interpreter or not inputs:
+            return None
+        return cls(interpreter, inputs, pins)
+
+    def render(self, venv_name: str, section: str) -> str:
+        return ''.join([_HEADER % (venv_name, section),
+                        _INTERPRETER + self.interpreter + '\n',
+                        _INPUTS + self.inputs + '\n'] +
+                       ['%s\n' % p for p in self.pins])
+
+    def matches(self, inputs: str) -> bool:
+        return self.inputs == inputs and self.interpreter == interpreter_tag()
+
+    @property
+    def install_options(self) -> List[str]:
+        """pip options to install exactly the pinned requirements, without resolving anything"""
+        if self.pins and all(' --hash=' in p for p in self.pins):
+            return ['--no-deps', '--require-hashes']
+        return ['--no-deps']
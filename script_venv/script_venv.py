@@ -7,6 +7,7 @@ from typing import Any, List, Optional
 from click import Context, Command, Group, echo
 
 from script_venv.factory import ConfigDependenciesImpl
+from . import stats
 from .config import VenvConfig, ConfigDependencies
 
 
@@ -30,17 +31,23 @@ class ScriptVenvCommand(Command):
                 echo('Insufficient parameters', err=True)
                 return
             cmd = args.pop(0)
-        else:  # pragma: no cover
-            echo('Unknown script or venv: "%s"' % ctx.info_name, err=True)
-            return
+        else:
+            indexed = ctx.obj.script_venv(cmd)
+            if not indexed:  # pragma: no cover
+                echo('Unknown script or venv: "%s"' % ctx.info_name, err=True)
+                return
+            v = indexed
 
+        stats.note(script=cmd, venv=v)
         venv = ctx.obj.venvs[v]
-        if venv.create():
-            venv.install(*venv.requirements)
-        else:
+        setup = venv.ensure()
+        if setup is None:
             ctx.obj.info("Using venv %s at %s" % (venv.name, venv.env_path))
+        elif setup != 0:
+            echo('Unable to set up venv %s' % venv.name, err=True)
+            ctx.exit(setup)
 
-        result = venv.run(cmd, *args)
+        result = venv.exec(cmd, *args)
         ctx.exit(result)
 
 
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+""" Script shim generation """
+
+import os
+from pathlib2 import Path
+from shlex import quote
+from typing import Dict, List, Tuple  # noqa: F401
+
+from .venv import VEnv, _bin, _exe
+
+_MARKER = '# Generated by sv :shims from '
+
+_SHIM = """#!/bin/sh
+{marker}{source}
+# Runs {script} from venv {venv} as sv resolved it when the shim was written, falling back to sv if that is missing
+if [ -f {target} ]; then
+    VIRTUAL_ENV={venv_path}
+    PATH={venv_path}:"$PATH"
+    export VIRTUAL_ENV PATH
+{installed}    exec {command} "$@"
+fi
+exec sv -S {source} {script} "$@"
+"""
+
+_INSTALLED = """    if [ -x {cmd_path} ]; then
+        exec {cmd_path} "$@"
+    fi
+"""
+
+
+def shim_script(venv: VEnv, script: str, source: str) -> str:
+    """A shim running the command ``sv script`` resolves to now, in the venv or one of its bases.
+    A script installed into the venv itself later is still picked up, as sv looks there first"""
+    command = venv.command(script)
+    cmd_path = str(venv.abs_path / _bin / (script + _exe))
+    # The python fallback runs the script from the working directory, so it needs only the venv's python
+    target = command[-1] if os.path.isabs(command[-1]) else command[0]
+    installed = '' if command == [cmd_path] else _INSTALLED.format(cmd_path=quote(cmd_path))
+    return _SHIM.format(marker=_MARKER, source=quote(source), script=quote(script), venv=venv.name,
+                        venv_path=quote(str(venv.abs_path)), target=quote(target), installed=installed,
+                        command=' '.join(quote(c) for c in command))
+
+
+class Shims(object):
+    def __init__(self, bin_dir: Path, source: str) -> None:
+        self.bin_dir = bin_dir
+        self.source = source
+
+    def _generated(self, shim_path: Path) -> str | None:
+        try:
+            with shim_path.open() as shim:
+                shim.readline()
+                marker = shim.readline()
+        except (OSError, UnicodeDecodeError):
+            return None
+        if not marker.startswith(_MARKER):
+            return None
+        return marker[len(_MARKER):].strip()
+
+    def update(self, shims: Dict[str, str]) -> Tuple[List[str], List[str], List[str], List[str]]:
+        """Write changed shims and remove stale ones generated from the same source.
+        Returns the names written, unchanged, removed and skipped"""
+        written, unchanged, removed, skipped = [], [], [], []  # type: List[str], List[str], List[str], List[str]
+        self.bin_dir.mkdir(parents=True, exist_ok=True)
+        our_source = quote(self.source)
+
+        for name in sorted(shims):
+            shim_path = self.bin_dir / name
+            if shim_path.exists():
+                if self._generated(shim_path) is None:
+                    skipped.append(name)
+                    continue
+                if shim_path.read_text() == shims[name]:
+                    unchanged.append(name)
+                    continue
+
+            temp_path = self.bin_dir / ('.%s.%d' % (name, os.getpid()))
+            temp_path.write_text(shims[name])
+            temp_path.chmod(0o755)
+            os.replace(str(temp_path), str(shim_path))
+            written.append(name)
+
+        for shim_path in sorted(self.bin_dir.iterdir()):
+            if shim_path.name in shims or not shim_path.is_file():
+                continue
+            if self._generated(shim_path) == our_source:
+                shim_path.unlink()
+                removed.append(shim_path.name)
+
+        return written, unchanged, removed, skipped
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+""" Usage and cost statistics of sv runs """
+
+import math
+import os
+import time
+from pathlib2 import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple  # noqa: F401
+
+from .cache import cache_dir
+
+_imported = time.perf_counter()
+_started = None  # type: Optional[float]
+_record = {}  # type: Dict[str, Any]
+
+
+def stats_path(default: bool = False) -> Optional[Path]:
+    """The stats file, or None unless SV_STATS is set (or default is).
+    SV_STATS=1 keeps the stats in the cache directory, any other value is the path of the file"""
+    env_path = os.environ.get('SV_STATS')
+    if not env_path and not default:
+        return None
+    if not env_path or env_path == '1':
+        return cache_dir() / 'stats.jsonl'
+    return Path(env_path).expanduser()
+
+
+def note(**fields: Any) -> None:
+    """Add fields to the record of this run"""
+    _record.update(fields)
+
+
+def add_time(field: str, started: float) -> None:
+    _record[field] = _record.get(field, 0.0) + (time.perf_counter() - started) * 1000
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _process_age() -> Optional[float]:
+    """Seconds since this process started (to the kernel's clock tick), from /proc on Linux, otherwise None"""
+    try:
+        with open('/proc/self/stat', 'rb') as in_stat:
+            # The command name may hold spaces, so count the fields from after it
+            fields = in_stat.read().rpartition(b')')[2].split()
+        started = int(fields[19]) / os.sysconf('SC_CLK_TCK')
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - started
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def overhead() -> float:
+    """Seconds sv has taken so far, from the start of the process (including interpreter start up)
+    where that is known, otherwise from when sv was imported"""
+    global _started
+    if _started is None:
+        age = _process_age()
+        _started = _imported if age is None else min(time.perf_counter() - age, _imported)
+    return time.perf_counter() - _started
+
+
+def _kill(pid: int, signum: int) -> None:
+    try:
+        os.kill(pid, signum)
+    except OSError:
+        pass
+
+
+def spawn(args: List[str], env: Mapping[str, str], path: Path) -> int:
+    """Run args in a child process, rather than exec'ing it, so its exit code, times and
+    peak memory can be recorded along with the rest of this run's record"""
+    import signal
+
+    sv_ms = _ms(overhead())
+    started = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        try:
+            os.execve(args[0], args, env)
+        finally:
+            os._exit(127)
+
+    # Like the shell, leave interrupts to the child, and pass on the signals meant for it
+    handlers = {signal.SIGINT: signal.signal(signal.SIGINT, signal.SIG_IGN)}
+    for signum in (signal.SIGTERM, signal.SIGHUP):
+        handlers[signum] = signal.signal(signum, lambda s, _: _kill(pid, s))
+    try:
+        _, status, usage = os.wait4(pid, 0)
+    finally:
+        for forwarded, handler in handlers.items():
+            signal.signal(forwarded, handler)
+    exit_code = os.waitstatus_to_exitcode(status)
+
+    note(sv_ms=sv_ms, exit=exit_code, wall_ms=_ms(time.perf_counter() - started),
+         cpu_ms=_ms(usage.ru_utime + usage.ru_stime), max_rss_kb=usage.ru_maxrss)
+    write(path)
+    return exit_code
+
+
+def handed_off(run: Callable[[], Optional[int]], path: Path) -> Optional[int]:
+    """Record the exit code and wall time of a run handed to another process, such as a zygote.
+    Its times and memory aren't this process's to take. Nothing is recorded if run returns None"""
+    sv_ms = _ms(overhead())
+    started = time.perf_counter()
+    exit_code = run()
+    if exit_code is not None:
+        note(sv_ms=sv_ms, exit=exit_code, wall_ms=_ms(time.perf_counter() - started))
+        write(path)
+    return exit_code
+
+
+def write(path: Path) -> None:
+    """Append this run's record as one line, in a single write so concurrent runs don't interleave"""
+    import json
+    record = dict(_record, ts=round(time.time(), 3))
+    line = (json.dumps(record, sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8')
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+def read(path: Path) -> List[Dict[str, Any]]:
+    import json
+    records = []
+    try:
+        with path.open() as in_stats:
+            for line in in_stats:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return records
+
+
+def write_text(path: Path, text: str) -> None:
+    """Replace path with text at once, so a reader such as the node exporter never sees half a file"""
+    temp_file = path.with_name('.%s.%d' % (path.name, os.getpid()))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with temp_file.open('w') as out_file:
+        out_file.write(text)
+    os.replace(str(temp_file), str(path))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """The nearest-rank percentile of values"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(pct * len(ordered) / 100), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class Summary(object):
+    def __init__(self, records: Iterable[Mapping[str, Any]]) -> None:
+        self.runs = {}  # type: Dict[str, List[Mapping[str, Any]]]
+        self.installs = {}  # type: Dict[str, List[float]]
+        self.overheads = []  # type: List[float]
+        self.cache_hits = self.cache_misses = 0
+        for record in records:
+            script = record.get('script')
+            if script:
+                self.runs.setdefault(script, []).append(record)
+            if record.get('install_ms') and record.get('venv'):
+                self.installs.setdefault(record['venv'], []).append(record['install_ms'])
+            if 'sv_ms' in record:
+                self.overheads.append(record['sv_ms'])
+            if record.get('cache') == 'hit':
+                self.cache_hits += 1
+            elif record.get('cache') == 'miss':
+                self.cache_misses += 1
+
+    def hottest(self, top: int) -> List[Tuple[str, int, float]]:
+        """The most run scripts, with their run count and total wall time"""
+        totals = [(s, len(r), sum(x.get('wall_ms', 0) for x in r)) for s, r in self.runs.items()]
+        return sorted(totals, key=lambda t: (-t[1], -t[2], t[0]))[:top]
+
+    def slowest_installs(self, top: int) -> List[Tuple[str, int, float]]:
+        """The venvs that took longest to set up, with the number of setups and the slowest"""
+        slowest = [(v, len(t), max(t)) for v, t in self.installs.items()]
+        return sorted(slowest, key=lambda t: (-t[2], t[0]))[:top]
+
+    def lines(self, top: int = 10) -> Iterator[str]:
+        count = sum(len(r) for r in self.runs.values())
+        yield "%d runs of %d scripts, config cache %d hits and %d misses" % (
+            count, len(self.runs), self.cache_hits, self.cache_misses)
+        if self.overheads:
+            yield "sv overhead: p50 %.1fms, p90 %.1fms, p99 %.1fms" % tuple(
+                percentile(self.overheads, p) for p in (50, 90, 99))
+        if self.runs:
+            yield "Hottest scripts:"
+            for script, runs, wall_ms in self.hottest(top):
+                yield "\t%s: %d runs, %.1fs" % (script, runs, wall_ms / 1000)
+        if self.installs:
+            yield "Slowest venvs to set up:"
+            for venv, setups, slowest_ms in self.slowest_installs(top):
+                yield "\t%s: %.1fs (%d setups)" % (venv, slowest_ms / 1000, setups)
+
+    def prometheus(self) -> str:
+        """The summary in the Prometheus text format, for the node exporter's textfile collector"""
+        lines = ['# TYPE sv_script_runs_total counter']
+        lines.extend('sv_script_runs_total{script="%s"} %d' % (_label(s), len(r)) for s, r in sorted(self.runs.items()))
+        lines.append('# TYPE sv_script_wall_seconds_total counter')
+        lines.extend('sv_script_wall_seconds_total{script="%s"} %.3f' % (
+            _label(s), sum(x.get('wall_ms', 0) for x in r) / 1000) for s, r in sorted(self.runs.items()))
+        lines.append('# TYPE sv_venv_install_seconds_max gauge')
+        lines.extend('sv_venv_install_seconds_max{venv="%s"} %.3f' % (_label(v), max(t) / 1000)
+                     for v, t in sorted(self.installs.items()))
+        lines.append('# TYPE sv_overhead_seconds summary')
+        lines.extend('sv_overhead_seconds{quantile="%s"} %.6f' % (q, percentile(self.overheads, p) / 1000)
+                     for q, p in (('0.5', 50), ('0.9', 90), ('0.99', 99)))
+        lines.append('sv_overhead_seconds_sum %.6f' % (sum(self.overheads) / 1000))
+        lines.append('sv_overhead_seconds_count %d' % len(self.overheads))
+        lines.append('# TYPE sv_config_cache_total counter')
+        lines.append('sv_config_cache_total{result="hit"} %d' % self.cache_hits)
+        lines.append('sv_config_cache_total{result="miss"} %d' % self.cache_misses)
+        return '\n'.join(lines) + '\n'
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
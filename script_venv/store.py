@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+""" Content-addressed store of files shared between venvs """
+
+import errno
+import hashlib
+import os
+import stat
+from pathlib2 import Path
+from typing import Iterator, Tuple  # noqa: F401
+
+_CHUNK = 1 << 20
+
+
+def store_path() -> Path:
+    env_path = os.environ.get('SV_STORE')
+    if env_path:
+        return Path(env_path).expanduser()
+    return Path('~', '.sv', '.store').expanduser()
+
+
+def _digest(file: str) -> str:
+    sha = hashlib.sha256()
+    with open(file, 'rb') as in_file:
+        for chunk in iter(lambda: in_file.read(_CHUNK), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class DedupeResult(object):
+    def __init__(self) -> None:
+        self.files = 0
+        self.linked = 0
+        self.saved = 0
+
+    def __str__(self) -> str:
+        return "%d files, %d linked to the store, saving %s" % (self.files, self.linked, format_size(self.saved))
+
+
+def format_size(size: int) -> str:
+    for unit in ('bytes', 'KiB', 'MiB'):
+        if size < 1024:
+            return ('%d %s' if unit == 'bytes' else '%.1f %s') % (size, unit)
+        size /= 1024  # type: ignore
+    return '%.1f GiB' % size
+
+
+class Store(object):
+    """Files keyed by the hash of their content and their mode,
+    hardlinked into every venv that holds an identical file.
+
+    Files are only ever replaced, never changed in place, by pip and sv,
+    so a venv can't change the content of the others through a shared link"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def _entry(self, digest: str, mode: int) -> Path:
+        return self.path / digest[:2] / ('%s-%o' % (digest[2:], stat.S_IMODE(mode)))
+
+    def _files(self, venv_path: Path) -> Iterator[Tuple[str, os.stat_result]]:
+        for dir_path, _, file_names in os.walk(str(venv_path)):
+            for name in file_names:
+                file = os.path.join(dir_path, name)
+                st = os.lstat(file)
+                if stat.S_ISREG(st.st_mode) and st.st_size:
+                    yield file, st
+
+    def dedupe(self, venv_path: Path) -> DedupeResult:
+        """Replace the files in venv_path with links to identical files in the store,
+        adding those that aren't in the store yet"""
+        result = DedupeResult()
+        for file, st in self._files(venv_path):
+            result.files += 1
+            entry = self._entry(_digest(file), st.st_mode)
+            try:
+                entry_st = os.lstat(str(entry))
+            except FileNotFoundError:
+                entry.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.link(file, str(entry))
+                    result.linked += 1
+                    continue
+                except FileExistsError:
+                    # Another venv added the same file meanwhile, so link to that one below
+                    entry_st = os.lstat(str(entry))
+                except OSError as e:
+                    if e.errno == errno.EXDEV:
+                        # The store is on another filesystem, nothing in this venv can be linked
+                        break
+                    raise
+
+            if (entry_st.st_dev, entry_st.st_ino) == (st.st_dev, st.st_ino):
+                continue
+            if entry_st.st_dev != st.st_dev:
+                break
+            temp_file = '%s.sv%d' % (file, os.getpid())
+            os.link(str(entry), temp_file)
+            os.replace(temp_file, file)
+            result.linked += 1
+            if st.st_nlink == 1:
+                result.saved += st.st_size
+        return result
+
+    def usage(self) -> Tuple[int, int]:
+        """The number of files in the store and the bytes saved by sharing them"""
+        files = saved = 0
+        for file, st in self._files(self.path):
+            files += 1
+            saved += st.st_size * max(st.st_nlink - 2, 0)
+        return files, saved
+
+    def prune(self) -> int:
+        """Remove files no venv links to any more, returning the number removed"""
+        removed = 0
+        for file, st in list(self._files(self.path)):
+            if st.st_nlink == 1:
+                os.unlink(file)
+                removed += 1
+        return removed
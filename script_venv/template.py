@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+""" Cloning venvs from templates """
+
+import os
+import shutil
+from pathlib2 import Path
+from typing import Container, Iterable  # noqa: F401
+
+from .cache import cache_dir
+
+# From linux/fs.h: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+_ACTIVATE_SCRIPTS = {'activate', 'activate.bat', 'activate.csh', 'activate.fish', 'Activate.ps1'}
+
+
+def template_path() -> Path:
+    return cache_dir() / 'templates'
+
+
+class _Copier(object):
+    """Copies files by reflink where the filesystem supports it,
+    otherwise by hardlink, and as a last resort by copying their content"""
+
+    def __init__(self) -> None:
+        self.reflink = True
+        self.hardlink = True
+
+    def _try_reflink(self, src: str, dst: str) -> bool:
+        try:
+            import fcntl
+        except ImportError:  # pragma: no cover
+            return False
+        with open(src, 'rb') as in_file, open(dst, 'wb') as out_file:
+            try:
+                fcntl.ioctl(out_file.fileno(), _FICLONE, in_file.fileno())
+            except OSError:
+                ok = False
+            else:
+                ok = True
+        if ok:
+            shutil.copystat(src, dst)
+        else:
+            os.unlink(dst)
+        return ok
+
+    def copy(self, src: str, dst: str) -> None:
+        if self.reflink:
+            if self._try_reflink(src, dst):
+                return
+            self.reflink = False
+        if self.hardlink:
+            try:
+                os.link(src, dst)
+                return
+            except OSError:
+                self.hardlink = False
+        shutil.copy2(src, dst)
+
+
+def clone_tree(src: Path, dst: Path, ignore: Container[str] = ()) -> None:
+    """Copy the src tree to dst, keeping symlinks as they are.
+    Top level names in ignore are not copied"""
+    copier = _Copier()
+    src_root = str(src)
+    for dir_path, dir_names, file_names in os.walk(src_root):
+        rel_dir = os.path.relpath(dir_path, src_root)
+        if rel_dir == '.':
+            rel_dir = ''
+            dir_names[:] = [d for d in dir_names if d not in ignore]
+            file_names = [f for f in file_names if f not in ignore]
+        dst_dir = os.path.join(str(dst), rel_dir)
+        os.makedirs(dst_dir, exist_ok=True)
+
+        for name in list(dir_names):
+            src_path = os.path.join(dir_path, name)
+            if os.path.islink(src_path):
+                os.symlink(os.readlink(src_path), os.path.join(dst_dir, name))
+                dir_names.remove(name)
+        for name in file_names:
+            src_path, dst_path = os.path.join(dir_path, name), os.path.join(dst_dir, name)
+            if os.path.islink(src_path):
+                os.symlink(os.readlink(src_path), dst_path)
+            else:
+                copier.copy(src_path, dst_path)
+
+
+def _relocate_file(file: Path, old: bytes, new: bytes) -> None:
+    with file.open('rb') as in_file:
+        data = in_file.read()
+    if old not in data:
+        return
+    temp_file = file.with_name('.%s.%d' % (file.name, os.getpid()))
+    with temp_file.open('wb') as out_file:
+        out_file.write(data.replace(old, new))
+    shutil.copymode(str(file), str(temp_file))
+    os.replace(str(temp_file), str(file))
+
+
+def relocate(venv_path: Path, bin_dir: str, old_path: Path) -> None:
+    """Rewrite the absolute paths left by old_path in the venv's pyvenv.cfg, script shebangs
+    and activate scripts. Files are replaced rather than changed, as they may be links to a template"""
+    old, new = str(old_path).encode('utf-8'), str(venv_path).encode('utf-8')
+    files = [venv_path / 'pyvenv.cfg']
+    bin_path = venv_path / bin_dir
+    for entry in bin_path.iterdir():
+        if entry.is_symlink() or not entry.is_file():
+            continue
+        if entry.name in _ACTIVATE_SCRIPTS:
+            files.append(entry)
+            continue
+        with entry.open('rb') as in_file:
+            if in_file.read(2) == b'#!':
+                files.append(entry)
+    for file in files:
+        if file.exists():
+            _relocate_file(file, old, new)
+
+
+def clone(template: Path, venv_path: Path, bin_dir: str, ignore: Container[str] = ()) -> None:
+    """Replace whatever is at venv_path with a relocated copy of the template venv"""
+    if venv_path.exists():
+        shutil.rmtree(str(venv_path))
+    clone_tree(template, venv_path, ignore=ignore)
+    relocate(venv_path, bin_dir, template)
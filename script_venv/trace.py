@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+""" Timed spans of each sv invocation, written as Chrome trace events """
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional  # noqa: F401
+
+
+class _NullSpan(object):
+    """The span used while tracing is off, so a traced block costs a function call and a with statement"""
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer(object):
+    """Collects complete ("X") trace events, to be loaded in chrome://tracing or Perfetto.
+
+    With profile set, a cProfile of the whole invocation is written next to the trace"""
+
+    def __init__(self, path: str, profile: bool = False) -> None:
+        self.path = path
+        self.events = []  # type: List[Dict[str, Any]]
+        self._pid = os.getpid()
+        self._profiler = None  # type: Any
+        if profile:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    @staticmethod
+    def _now() -> float:
+        return time.perf_counter() * 1e6
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[None]:
+        start = self._now()
+        try:
+            yield
+        finally:
+            self.events.append(dict(name=name, ph='X', ts=start, dur=self._now() - start,
+                                    pid=self._pid, tid=threading.get_ident(), args=args))
+
+    def mark(self, name: str, **args: Any) -> None:
+        self.events.append(dict(name=name, ph='i', s='p', ts=self._now(),
+                                pid=self._pid, tid=threading.get_ident(), args=args))
+
+    def flush(self) -> None:
+        """Write out everything recorded so far, as sv may exec or exit at any point after this"""
+        import json
+        temp_file = '%s.%d' % (self.path, os.getpid())
+        with open(temp_file, 'w') as out_trace:
+            json.dump(dict(traceEvents=list(self.events), displayTimeUnit='ms'), out_trace)
+        os.replace(temp_file, self.path)
+        if self._profiler:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.path + '.prof')
+            self._profiler.enable()
+
+
+_tracer = None  # type: Optional[Tracer]
+
+
+def start(path: str, profile: bool = False) -> Tracer:
+    """Trace the rest of this invocation into path, flushing it when sv exits"""
+    global _tracer
+    if _tracer is None:
+        import atexit
+        _tracer = Tracer(path, profile=profile)
+        atexit.register(flush)
+    return _tracer
+
+
+def start_from_env() -> None:
+    trace_file = os.environ.get('SV_TRACE')
+    if trace_file:
+        start(trace_file, profile=bool(os.environ.get('SV_TRACE_PROFILE')))
+
+
+def span(name: str, **args: Any) -> Any:
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(name, **args)
+
+
+def mark(name: str, **args: Any) -> None:
+    if _tracer is not None:
+        _tracer.mark(name, **args)
+
+
+def flush() -> None:
+    if _tracer is not None:
+        try:
+            _tracer.flush()
+        except OSError:
+            pass
+
+
+def stop() -> None:
+    """Flush and stop tracing"""
+    global _tracer
+    flush()
+    _tracer = None
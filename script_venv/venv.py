@@ -4,10 +4,23 @@
 
 import os
 import sys
+import threading
+import time
+import zlib
 from pathlib2 import Path
-from typing import Iterable, Dict  # noqa: F401
+from typing import TYPE_CHECKING, ContextManager, Iterable, Dict, List, Mapping, Optional, Tuple  # noqa: F401
+
+from . import stats, trace
+from .lock import LOCK_DIR
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .install import InstallPlan  # noqa: F401
+    from .lock import Lock  # noqa: F401
+    from .wheelhouse import Wheelhouse  # noqa: F401
 
 _r = 'requirements'
+_STAMP = '.sv_stamp'
+_BASE_PTH = '_sv_base.pth'
 
 if os.name == 'nt':  # pragma: no cover
     _bin = 'Scripts'
@@ -18,6 +31,9 @@ else:  # pragma: no cover
     _exe = ''
     _quote = '%s'
 
+_template_locks = {}  # type: Dict[str, threading.Lock]
+_template_locks_guard = threading.Lock()
+
 _CWD = os.getcwd()
 os.environ['CWD'] = _CWD
 
@@ -36,6 +52,9 @@ def venv_path(cfg_path: Path, location: str | None = None) -> Path:
 
 
 class VEnvDependencies(object):
+    def capture(self, cmd: Iterable[str], env: Dict[str, str] | None = None) -> Tuple[int, str]:
+        raise NotImplementedError()
+
     def echo(self, msg: str):
         raise NotImplementedError()
 
@@ -45,23 +64,69 @@ class VEnvDependencies(object):
     def runner(self, cmd: Iterable[str], env: Dict[str, str] | None = None) -> int:
         raise NotImplementedError()
 
+    def execer(self, cmd: Iterable[str], env: Dict[str, str] | None = None) -> int:
+        raise NotImplementedError()
+
+    def forker(self, cmd: Iterable[str], env: Dict[str, str] | None = None,
+               modules: Iterable[str] = ()) -> Optional[int]:
+        raise NotImplementedError()
+
     def creator(self, path: Path, clear: bool = False) -> None:
         raise NotImplementedError()
 
+    def cloner(self, template: Path, path: Path) -> bool:
+        raise NotImplementedError()
+
+    def template_dir(self) -> Optional[Path]:
+        raise NotImplementedError()
+
+    def post_install(self, path: Path) -> None:
+        raise NotImplementedError()
+
+    def index_scripts(self, name: str, path: Path) -> None:
+        raise NotImplementedError()
+
+    def promote(self, build_path: Path, path: Path) -> None:
+        raise NotImplementedError()
+
+    def read_text(self, path: Path) -> Optional[str]:
+        raise NotImplementedError()
+
+    def locked(self, path: Path) -> ContextManager[None]:
+        raise NotImplementedError()
+
+    def log_to(self, path: Path) -> ContextManager[None]:
+        raise NotImplementedError()
+
+    def unpacker(self, wheels: Mapping[Path, List[str]], path: Path) -> int:
+        raise NotImplementedError()
+
+    def wheelhouse(self) -> Optional['Wheelhouse']:
+        raise NotImplementedError()
+
+    def write_text(self, path: Path, text: str) -> None:
+        raise NotImplementedError()
+
 
 class VEnv(object):
     def __init__(self, name: str, deps: VEnvDependencies,
                  config_path: str,
                  requirements: Iterable[str] | None = None,
                  prerequisites: Iterable[str] | None = None,
-                 location: str | None = None) -> None:
+                 location: str | None = None,
+                 zygote: Iterable[str] | None = None) -> None:
         self.name = name
         self.deps = deps
         self.config_path = config_path
         self.requirements = set(requirements or [])
         self.prerequisites = set(prerequisites or [])
+        self.zygote = None if zygote is None else list(zygote)  # type: Optional[List[str]]
         self.env_path = venv_path(Path(config_path), location) / '.sv' / name
         self.abs_path = abs_path(self.env_path)
+        self.base = None  # type: Optional[VEnv]
+        self._stale_lock = False
+        self._ensure_lock = threading.Lock()
+        self._ensured = False
 
     def __str__(self) -> str:
         return "%s (%s%s) [%s]" % (self.name, self.env_path,
@@ -69,7 +134,92 @@ class VEnv(object):
                                    Path(self.config_path) / '.sv_cfg')
 
     def exists(self) -> bool:
-        return self.deps.exists(self.abs_path)
+        with trace.span('venv.exists', venv=self.name):
+            return self.deps.exists(self.abs_path)
+
+    def fingerprint(self) -> str:
+        """What the venv is built from, to stamp it with once set up. Two checksums rather than
+        a cryptographic hash, so checking the stamp on every run doesn't load hashlib"""
+        parts = [sys.executable, sys.version]
+        parts.extend('prerequisite %s' % p for p in sorted(self.prerequisites))
+        parts.extend('requirement %s' % r for r in sorted(self.requirements))
+        parts.extend('lock %s' % t for t in self._lock_texts() if t)
+        if self.base:
+            parts.append('base %s' % self.base.abs_path)
+        text = '\n'.join(parts).encode('utf-8')
+        return '%08x%08x' % (zlib.crc32(text), zlib.adler32(text))
+
+    def is_ready(self) -> bool:
+        with trace.span('venv.is_ready', venv=self.name):
+            if self.base and not self.base.is_ready():
+                return False
+            return self.deps.read_text(self.abs_path / _STAMP) == self.fingerprint()
+
+    def mark_ready(self) -> None:
+        self.deps.write_text(self.abs_path / _STAMP, self.fingerprint())
+
+    def lock_paths(self) -> Tuple[Path, Path]:
+        lock_dir = abs_path(Path(self.config_path)) / LOCK_DIR
+        return lock_dir / (self.name + '.prerequisites.txt'), lock_dir / (self.name + '.requirements.txt')
+
+    def _lock_texts(self) -> List[Optional[str]]:
+        return [self.deps.read_text(p) for p in self.lock_paths()]
+
+    def _locks(self) -> Optional[Tuple['Lock', 'Lock']]:
+        """The prerequisite and requirement locks, if both are up to date with the config"""
+        from .lock import Lock, inputs_hash
+        texts = self._lock_texts()
+        if not any(texts):
+            return None
+        locks = [Lock.parse(t) if t else None for t in texts]
+        inputs = inputs_hash(self.prerequisites, self.requirements)
+        pre_lock, req_lock = locks
+        if pre_lock and req_lock and pre_lock.matches(inputs) and req_lock.matches(inputs):
+            return pre_lock, req_lock
+        if not self._stale_lock:
+            self._stale_lock = True
+            self.deps.echo("Ignoring out of date lock for venv %s, run :lock to update it" % self.name)
+        return None
+
+    def _resolve(self, requirements: Iterable[str]) -> Optional[List[str]]:
+        import json
+        from .lock import report_pins
+
+        resolve_cmd = [sys.executable, '-m', 'pip', 'install', '--dry-run', '--ignore-installed',
+                       '--quiet', '--report', '-']
+        requirements = sorted(requirements)
+        wheelhouse = self.deps.wheelhouse()
+        if wheelhouse:
+            resolve_cmd.extend(wheelhouse.install_options(requirements))
+        result, report = self.deps.capture(resolve_cmd + requirements)
+        if result == 0:
+            try:
+                return report_pins(json.loads(report))
+            except (ValueError, KeyError, TypeError):
+                pass
+        self.deps.echo("Unable to resolve %s for venv %s" % (', '.join(requirements), self.name))
+        return None
+
+    def lock(self) -> int:
+        """Resolve the prerequisites and requirements once,
+        pinning them with their hashes in lock files next to the config"""
+        from .lock import Lock, inputs_hash, interpreter_tag
+        pre_pins = []  # type: Optional[List[str]]
+        if self.prerequisites:
+            pre_pins = self._resolve(self.prerequisites)
+        all_pins = self._resolve(self.prerequisites | self.requirements) if self.requirements else pre_pins
+        if pre_pins is None or all_pins is None:
+            return 1
+
+        inputs, interpreter = inputs_hash(self.prerequisites, self.requirements), interpreter_tag()
+        req_pins = [p for p in all_pins if p not in pre_pins]
+        pre_path, req_path = self.lock_paths()
+        self.deps.write_text(pre_path, Lock(interpreter, inputs, pre_pins).render(self.name, 'prerequisites'))
+        self.deps.write_text(req_path, Lock(interpreter, inputs, req_pins).render(self.name, 'requirements'))
+        self._stale_lock = False
+        self.deps.echo("Locked venv %s: %d prerequisites and %d requirements pinned" %
+                       (self.name, len(pre_pins), len(req_pins)))
+        return 0
 
     def _run_env(self) -> Dict[str, str]:
         new_env = dict(
@@ -78,23 +228,72 @@ class VEnv(object):
         )
         return new_env
 
-    def run(self, cmd_name: str, *args: str) -> int:
+    def command(self, cmd_name: str) -> List[str]:
         bin_path = self.abs_path / _bin
         cmd_path = bin_path / (cmd_name + _exe)
         if self.deps.exists(cmd_path):
-            cmd = [str(cmd_path)]
-        else:
-            cmd = [str(bin_path / os.path.basename(sys.executable)), cmd_name]
+            return [str(cmd_path)]
+        python_path = str(bin_path / os.path.basename(sys.executable))
 
-        return self.deps.runner(cmd + list(args), env=self._run_env())
+        # Scripts of base venvs are run by this venv's python, so they see its packages too
+        base = self.base
+        while base and not _exe:
+            base_cmd_path = base.abs_path / _bin / cmd_name
+            if self.deps.exists(base_cmd_path):
+                return [python_path, str(base_cmd_path)]
+            base = base.base
+        return [python_path, cmd_name]
+
+    def run(self, cmd_name: str, *args: str) -> int:
+        with trace.span('venv.run', venv=self.name, cmd=cmd_name):
+            return self.deps.runner(self.command(cmd_name) + list(args), env=self._run_env())
+
+    def exec(self, cmd_name: str, *args: str) -> int:
+        cmd = self.command(cmd_name) + list(args)
+        # The exec'd process replaces sv, so the trace ends with the moment it starts
+        trace.mark('venv.exec', venv=self.name, cmd=cmd_name)
+        env = self._run_env()
+        if self.zygote is not None:
+            result = self.deps.forker(cmd, env=env, modules=self.zygote)
+            if result is not None:
+                return result
+        return self.deps.execer(cmd, env=env)
 
     def install(self, *install_args: str):
         python_path = str(self.abs_path / _bin / os.path.basename(sys.executable))
+        wheelhouse = self.deps.wheelhouse()
+        if wheelhouse:
+            wheels = wheelhouse.pinned_wheels(install_args)
+            if wheels:
+                with trace.span('venv.unpack', venv=self.name, wheels=[w.name for w in wheels]):
+                    unpacked = self.deps.unpacker(wheels, self.abs_path) == 0
+                if unpacked:
+                    return 0
+            install_args = tuple(wheelhouse.install_options(install_args)) + install_args
         install_cmd = [python_path, '-m', 'pip', 'install'] + list(install_args)
 
-        return self.deps.runner(install_cmd, env=self._run_env())
+        with trace.span('venv.pip_install', venv=self.name, args=list(install_args)):
+            return self.deps.runner(install_cmd, env=self._run_env())
+
+    def install_plan(self, plan: 'InstallPlan', post_install: bool = True) -> int:
+        """Run the pip installs of plan. Unless post_install is False, as for templates,
+        the installed files are then deduplicated and the venv's scripts indexed"""
+        if plan.saved:
+            self.deps.echo("Merged %d installs into %d pip runs for venv %s, saving %d" %
+                           (plan.requested, plan.requested - plan.saved, self.name, plan.saved))
+        commands = plan.commands
+        for install_args in commands:
+            result = self.install(*install_args)
+            if result != 0:
+                return result
+        if commands and post_install:
+            self.deps.post_install(self.abs_path)
+            self.deps.index_scripts(self.name, self.abs_path)
+        return 0
 
-    def create(self, clean: bool = False, update: bool = False) -> bool:
+    def create(self, clean: bool = False, update: bool = False, plan: 'InstallPlan | None' = None) -> bool:
+        """Create, clean or update the venv, adding its prerequisites to plan.
+        If no plan is given they are installed straight away"""
         if self.exists():
             if clean:
                 action = "Cleaning"
@@ -106,8 +305,145 @@ class VEnv(object):
             action = "Creating"
         self.deps.echo("%s venv %s at %s" % (action, self.name, self.env_path))
 
-        self.deps.creator(self.abs_path, clear=clean)
-        install_params = (['-U', 'pip', 'wheel'] if update else []) + list(sorted(self.prerequisites))
-        if install_params:
-            self.install(*install_params)
+        with trace.span('venv.clone', venv=self.name):
+            cloned = not update and self._clone_template()
+        if not cloned:
+            with trace.span('venv.creator', venv=self.name):
+                self.deps.creator(self.abs_path, clear=clean)
+        self.layer()
+        from .install import InstallPlan
+        create_plan = InstallPlan() if plan is None else plan
+        if not cloned:
+            self._plan_prerequisites(create_plan, update)
+        if plan is None:
+            self.install_plan(create_plan)
         return True
+
+    def layer(self) -> None:
+        """Set up the base venv, if there is one, and add its site-packages to this venv's"""
+        from .distributions import site_packages
+        pth_path = site_packages(self.abs_path) / _BASE_PTH
+        if self.base:
+            self.base.ensure()
+            pth = "import site; site.addsitedir(%r)\n" % str(site_packages(self.base.abs_path))
+        elif self.deps.read_text(pth_path):
+            pth = ''
+        else:
+            return
+        self.deps.write_text(pth_path, pth)
+
+    def _clone_template(self) -> bool:
+        """Copy the venv from a template with the same interpreter and prerequisites,
+        building the template first if there isn't one yet"""
+        template_dir = self.deps.template_dir()
+        if not template_dir:
+            return False
+
+        import hashlib
+        from .install import InstallPlan
+        plan = InstallPlan()
+        self._plan_prerequisites(plan, update=False)
+        parts = [sys.executable, sys.version, self._lock_texts()[0] or '']
+        parts.extend(' '.join(c) for c in plan.commands)
+        key = hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+        template_path = template_dir / key
+        if self.deps.read_text(template_path / _STAMP) != key:
+            with _template_locks_guard:
+                template_lock = _template_locks.setdefault(key, threading.Lock())
+            with template_lock, self.deps.locked(template_path):
+                if self.deps.read_text(template_path / _STAMP) != key and not self._build_template(plan, template_path):
+                    return False
+        return self.deps.cloner(template_path, self.abs_path)
+
+    def _build_template(self, plan: 'InstallPlan', template_path: Path) -> bool:
+        """Build the template in a directory next to it, and move it into place once it is stamped,
+        so no venv is ever cloned from a half built template"""
+        self.deps.echo("Building template venv %s for venv %s" % (template_path, self.name))
+        key = template_path.name
+        template = VEnv('template ' + key, self.deps, self.config_path)
+        template.env_path = template.abs_path = template_path.parent / ('.%s.%d.tmp' % (key, os.getpid()))
+        self.deps.creator(template.abs_path, clear=True)
+        if template.install_plan(plan, post_install=False) != 0:
+            return False
+        self.deps.write_text(template.abs_path / _STAMP, key)
+        self.deps.promote(template.abs_path, template_path)
+        return True
+
+    def _plan_prerequisites(self, plan: 'InstallPlan', update: bool) -> None:
+        locks = self._locks()
+        if locks:
+            if update:
+                plan.add('pip', 'wheel', options=['-U'])
+            if locks[0].pins:
+                plan.add(options=locks[0].install_options, extra=['-r', str(self.lock_paths()[0])],
+                         prerequisite=True)
+        elif update:
+            plan.add('pip', 'wheel', *sorted(self.prerequisites), options=['-U'],
+                     prerequisite=bool(self.prerequisites))
+        else:
+            plan.add(*sorted(self.prerequisites), prerequisite=True)
+
+    def plan_requirements(self, plan: 'InstallPlan', update: bool = False, extra: Iterable[str] = ()) -> None:
+        """Add the requirements to plan, from the lock without resolving if it is up to date"""
+        options = ['-U'] if update else []
+        locks = self._locks()
+        if not locks:
+            plan.add(*sorted(self.requirements), options=options, extra=extra)
+            return
+        if locks[1].pins:
+            plan.add(options=locks[1].install_options, extra=['-r', str(self.lock_paths()[1])])
+        plan.add(options=options, extra=extra)
+
+    def _setup(self) -> int:
+        from .install import InstallPlan
+        plan = InstallPlan()
+        if not self.create(plan=plan):
+            self.layer()
+            self._plan_prerequisites(plan, update=False)
+        self.plan_requirements(plan)
+        result = self.install_plan(plan)
+        if result == 0:
+            self.mark_ready()
+        return result
+
+    def _build(self) -> int:
+        """Set up a new venv in a build directory next to it, and move it into place once it is ready,
+        so nothing ever runs in a half built venv"""
+        import copy
+        build = copy.copy(self)
+        build.abs_path = self.abs_path.parent / ('.%s.%d.tmp' % (self.name, os.getpid()))
+        result = build._setup()
+        if result == 0:
+            self.deps.promote(build.abs_path, self.abs_path)
+        return result
+
+    def ensure(self) -> Optional[int]:
+        """Create the venv, or reinstall its prerequisites and requirements,
+        unless its stamp matches the current config. Returns None if nothing was done,
+        otherwise the result of setting up the venv, which is 0 if it succeeded.
+        The base venv is set up first, and the venv isn't set up if its base can't be.
+
+        Only one thread or process sets up a venv at a time, the others wait for it
+        and find the venv ready"""
+        base_result = self.base.ensure() if self.base else None
+        if base_result:
+            return base_result
+
+        with self._ensure_lock:
+            if self._ensured or self.deps.read_text(self.abs_path / _STAMP) == self.fingerprint():
+                return base_result
+
+            with self.deps.locked(self.abs_path):
+                if self.deps.read_text(self.abs_path / _STAMP) == self.fingerprint():
+                    return base_result
+                started = time.perf_counter()
+                if self.exists():
+                    with trace.span('venv.setup', venv=self.name):
+                        result = self._setup()
+                else:
+                    with trace.span('venv.build', venv=self.name):
+                        result = self._build()
+                stats.add_time('install_ms', started)
+            self._ensured = result == 0
+            return result
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+""" Local wheelhouse of prefetched requirements """
+
+import os
+import sys
+from pathlib2 import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple  # noqa: F401
+
+from .cache import cache_dir
+
+_MANIFEST = 'sv_wheelhouse.txt'
+_HEADER = '# Requirements prefetched by sv :prefetch\n'
+
+Runner = Callable[..., int]
+
+
+def wheelhouse_path() -> Path:
+    env_path = os.environ.get('SV_WHEELHOUSE')
+    if env_path:
+        return Path(env_path).expanduser()
+    return cache_dir() / 'wheelhouse'
+
+
+class Wheelhouse(object):
+    """A directory of wheels built by ``pip wheel``,
+    with a manifest of the requirements they satisfy"""
+
+    def __init__(self, path: Path, requirements: Iterable[str] = ()) -> None:
+        self.path = path
+        self.requirements = set(requirements)  # type: Set[str]
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['Wheelhouse']:
+        try:
+            with (path / _MANIFEST).open() as manifest:
+                lines = manifest.read().splitlines()
+        except OSError:
+            return None
+        return cls(path, (line for line in lines if line and not line.startswith('#')))
+
+    def save(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path / ('%s.%d' % (_MANIFEST, os.getpid()))
+        with temp_path.open('w') as manifest:
+            manifest.write(_HEADER + ''.join('%s\n' % r for r in sorted(self.requirements)))
+        os.replace(str(temp_path), str(self.path / _MANIFEST))
+
+    @property
+    def wheels(self) -> List[str]:
+        return sorted(p.name for p in self.path.glob('*.whl'))
+
+    def holds(self, packages: Iterable[str]) -> bool:
+        return all(p in self.requirements for p in packages)
+
+    def _pins(self) -> Set[Tuple[str, str]]:
+        """The normalized name and version of each wheel"""
+        from .distributions import normalize_name
+        pins = set()
+        for wheel in self.wheels:
+            parts = wheel[:-4].split('-')
+            if len(parts) in (5, 6):
+                pins.add((normalize_name(parts[0]), parts[1]))
+        return pins
+
+    def _holds_all(self, install_args: Iterable[str]) -> bool:
+        """Whether every requirement of install_args, including those of ``-r`` files such as locks,
+        is one the wheelhouse was prefetched for, or is pinned to a version it has a wheel of"""
+        from .wheels import _requirement_lines, pinned
+        pins = None  # type: Optional[Set[Tuple[str, str]]]
+        held = 0
+        try:
+            for line in _requirement_lines(install_args):
+                if line.startswith('-'):
+                    continue
+                requirement = line.split()[0]
+                if requirement not in self.requirements:
+                    pin = pinned(requirement)
+                    if pins is None:
+                        pins = self._pins()
+                    if not pin or pin not in pins:
+                        return False
+                held += 1
+        except OSError:
+            return False
+        return held > 0
+
+    def install_options(self, install_args: Iterable[str]) -> List[str]:
+        """pip options to install from the wheelhouse, offline if it holds all the packages"""
+        options = ['--find-links', str(self.path)]
+        if self._holds_all(install_args):
+            options.insert(0, '--no-index')
+        return options
+
+    def pinned_wheels(self, install_args: Iterable[str]) -> Optional[Dict[Path, List[str]]]:
+        """Local wheels that satisfy install_args without resolving anything, if there are any,
+        with the hashes each must match"""
+        from .wheels import pinned_wheels
+        return pinned_wheels(self.path, install_args)
+
+    def _build(self, requirement: str, runner: Runner) -> int:
+        """Build the wheels of requirement in a directory of its own, then move them into the wheelhouse,
+        so concurrent builds, and installs finding links in it, never see a partly written wheel"""
+        import shutil
+        import tempfile
+
+        build_dir = tempfile.mkdtemp(prefix='.build-', dir=str(self.path))
+        try:
+            result = runner([sys.executable, '-m', 'pip', 'wheel', '--wheel-dir', build_dir,
+                             '--find-links', str(self.path), requirement])
+            if result == 0:
+                for wheel in Path(build_dir).glob('*.whl'):
+                    os.replace(str(wheel), str(self.path / wheel.name))
+            return result
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+    def prefetch(self, requirements: Iterable[str], runner: Runner, jobs: int | None = None) -> Dict[str, int]:
+        """Build wheels for the requirements (and their dependencies) concurrently,
+        recording those that succeeded. Returns the pip result for each requirement"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        requirements = sorted(set(requirements))
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+            results = dict(zip(requirements, pool.map(lambda r: self._build(r, runner), requirements)))
+
+        self.requirements.update(r for r, result in results.items() if result == 0)
+        self.save()
+        return results
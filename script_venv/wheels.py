@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+
+""" In-process installation of pure python wheels """
+
+import base64
+import csv
+import hashlib
+import io
+import os
+import re
+import sys
+import zipfile
+from pathlib2 import Path, PurePosixPath
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple  # noqa: F401
+
+from .distributions import find_dist_info, normalize_name, parse_entry_points, python_version, site_packages
+
+_PINNED = re.compile(r'^([A-Za-z0-9][A-Za-z0-9._-]*)==([A-Za-z0-9.!+_-]+)$')
+_SAFE_OPTIONS = {'-U', '--upgrade', '--no-deps', '--require-hashes'}
+_HASH = '--hash=sha256:'
+_REQUIRES_DIST = re.compile(r'^Requires-Dist:\s*([A-Za-z0-9][A-Za-z0-9._-]*)([^;\n]*)(;.*)?$', re.MULTILINE)
+
+_SCRIPT = """#!{python}
+# -*- coding: utf-8 -*-
+import re
+import sys
+from {module} import {head}
+if __name__ == '__main__':
+    sys.argv[0] = re.sub(r'(-script\\.pyw|\\.exe)?$', '', sys.argv[0])
+    sys.exit({call}())
+"""
+
+Record = Tuple[str, str, str]
+
+
+def pinned(requirement: str) -> Optional[Tuple[str, str]]:
+    match = _PINNED.match(requirement)
+    return (normalize_name(match.group(1)), match.group(2)) if match else None
+
+
+def _requirement_lines(install_args: Iterable[str]) -> Iterator[str]:
+    """install_args, with each ``-r`` requirements file (such as a lock) expanded into its lines"""
+    args = iter(install_args)
+    for arg in args:
+        if arg in ('-r', '--requirement'):
+            with open(next(args, '')) as requirements:
+                for line in requirements:
+                    line = line.split(' #')[0].strip()
+                    if line and not line.startswith('#'):
+                        yield line
+        else:
+            yield arg
+
+
+def pinned_hashes(line: str) -> Optional[Tuple[Tuple[str, str], List[str]]]:
+    """The pin and sha256 hashes of a requirement line like ``name==1.0 --hash=sha256:...``"""
+    requirement, *options = line.split()
+    pin = pinned(requirement)
+    if not pin or not all(o.startswith(_HASH) for o in options):
+        return None
+    return pin, [o[len(_HASH):] for o in options]
+
+
+def pure_wheel(filename: str) -> Optional[Tuple[str, str]]:
+    """The normalized name and version of a pure python 3 wheel"""
+    if not filename.endswith('.whl'):
+        return None
+    parts = filename[:-4].split('-')
+    if len(parts) not in (5, 6):
+        return None
+    name, version, python_tag, abi_tag, platform_tag = parts[0], parts[1], parts[-3], parts[-2], parts[-1]
+    if abi_tag != 'none' or platform_tag != 'any' or 'py3' not in python_tag.split('.'):
+        return None
+    return normalize_name(name), version
+
+
+def _dependencies(wheel: Path) -> List[str]:
+    """Names of the unconditional dependencies of a wheel (ignoring those of extras)"""
+    with zipfile.ZipFile(str(wheel)) as wheel_zip:
+        metadata_name = next(n for n in wheel_zip.namelist() if n.endswith('.dist-info/METADATA'))
+        metadata = wheel_zip.read(metadata_name).decode('utf-8')
+    return [normalize_name(m.group(1)) for m in _REQUIRES_DIST.finditer(metadata)
+            if 'extra' not in (m.group(3) or '')]
+
+
+def pinned_wheels(wheel_dir: Path, install_args: Iterable[str]) -> Optional[Dict[Path, List[str]]]:
+    """The wheels to install for install_args, with the sha256 hashes each must match (if any),
+    if they are all pinned requirements with a pure python wheel in wheel_dir, otherwise None.
+    Requirements files, such as locks, are read for their pins and hashes.
+
+    Without ``--no-deps`` the requirements must also pin every dependency of their wheels,
+    as nothing is resolved here. With ``--require-hashes`` every requirement must have hashes"""
+    requirements = []
+    hashes = []  # type: List[List[str]]
+    options = set()
+    try:
+        for arg in _requirement_lines(install_args):
+            if arg in _SAFE_OPTIONS:
+                options.add(arg)
+                continue
+            pin = pinned_hashes(arg)
+            if not pin:
+                return None
+            requirements.append(pin[0])
+            hashes.append(pin[1])
+    except OSError:
+        return None
+    if not requirements or ('--require-hashes' in options and not all(hashes)):
+        return None
+
+    try:
+        available = {pure_wheel(p.name): p for p in wheel_dir.glob('*.whl')}
+    except OSError:
+        return None
+    wheels = [available.get(r) for r in requirements]
+    if not all(wheels):
+        return None
+    found = [w for w in wheels if w]
+
+    if '--no-deps' not in options:
+        names = {name for name, _ in requirements}
+        try:
+            if any(d not in names for w in found for d in _dependencies(w)):
+                return None
+        except (OSError, StopIteration, zipfile.BadZipFile):
+            return None
+    return dict(zip(found, hashes))
+
+
+def _hash(data: bytes) -> str:
+    digest = hashlib.sha256(data).digest()
+    return 'sha256=' + base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii')
+
+
+def _target(member: str, data_dir: str, venv_path: Path, site_path: Path, dist_name: str) -> Tuple[Path, bool]:
+    parts = PurePosixPath(member).parts
+    if not parts or member.startswith('/') or '..' in parts:
+        raise ValueError("Unsafe path in wheel: %s" % member)
+    if parts[0] != data_dir:
+        return site_path.joinpath(*parts), False
+
+    scheme, rest = parts[1], parts[2:]
+    if scheme == 'scripts':
+        return venv_path.joinpath('bin', *rest), True
+    if scheme in ('purelib', 'platlib'):
+        return site_path.joinpath(*rest), False
+    if scheme == 'headers':
+        version = python_version(venv_path) or '%d.%d' % sys.version_info[:2]
+        return venv_path.joinpath('include', 'site', 'python' + version, dist_name, *rest), False
+    return venv_path.joinpath(*rest), False
+
+
+def _uninstall(site_path: Path, name: str) -> None:
+    dist_info = find_dist_info(site_path, name)
+    if not dist_info:
+        return
+    try:
+        with (dist_info / 'RECORD').open() as in_record:
+            rows = list(csv.reader(in_record))
+    except OSError:
+        rows = []
+    dirs = set()
+    for row in rows:
+        if not row:
+            continue
+        installed = site_path / row[0]
+        dirs.add(installed.parent)
+        try:
+            installed.unlink()
+        except OSError:
+            pass
+    for empty_dir in sorted(dirs, key=lambda d: len(d.parts), reverse=True):
+        try:
+            empty_dir.rmdir()
+        except OSError:
+            pass
+
+
+def _write(path: Path, data: bytes, executable: bool = False) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        # Never write through a hardlink shared with a template venv
+        path.unlink()
+    with path.open('wb') as out_file:
+        out_file.write(data)
+    if executable:
+        path.chmod(0o755)
+
+
+def _relative(path: Path, site_path: Path) -> str:
+    return os.path.relpath(str(path), str(site_path)).replace(os.sep, '/')
+
+
+def _check_hashes(wheel: Path, hashes: Iterable[str]) -> None:
+    hashes = list(hashes)
+    if not hashes:
+        return
+    with wheel.open('rb') as in_wheel:
+        digest = hashlib.sha256(in_wheel.read()).hexdigest()
+    if digest not in hashes:
+        raise ValueError("Hash %s of wheel %s does not match the requirement" % (digest, wheel.name))
+
+
+def install_wheel(wheel: Path, venv_path: Path, hashes: Iterable[str] = ()) -> None:
+    """Unpack wheel into the venv, once its sha256 matches one of hashes (if any are given)"""
+    _check_hashes(wheel, hashes)
+    site_path = site_packages(venv_path)
+    python = str(venv_path / 'bin' / os.path.basename(sys.executable))
+    records = []  # type: List[Record]
+
+    with zipfile.ZipFile(str(wheel)) as wheel_zip:
+        names = [n for n in wheel_zip.namelist() if not n.endswith('/')]
+        dist_info = next(n.split('/')[0] for n in names if n.split('/')[0].endswith('.dist-info'))
+        dist_name = dist_info[:-len('.dist-info')].rsplit('-', 1)[0]
+        data_dir = dist_info[:-len('.dist-info')] + '.data'
+
+        _uninstall(site_path, dist_name)
+
+        for member in names:
+            if member in ('%s/RECORD' % dist_info, '%s/INSTALLER' % dist_info):
+                continue
+            target, is_script = _target(member, data_dir, venv_path, site_path, dist_name)
+            data = wheel_zip.read(member)
+            if is_script and data.startswith(b'#!python'):
+                data = b'#!' + python.encode('utf-8') + data[len(b'#!python'):]
+            _write(target, data, executable=is_script)
+            records.append((_relative(target, site_path), _hash(data), str(len(data))))
+
+        try:
+            entry_points = parse_entry_points(wheel_zip.read('%s/entry_points.txt' % dist_info).decode('utf-8'))
+        except KeyError:
+            entry_points = {}
+
+    for group in ('console_scripts', 'gui_scripts'):
+        for script, entry in sorted(entry_points.get(group, {}).items()):
+            module, _, attrs = entry.partition(':')
+            attrs = attrs.split('[')[0].strip()
+            head = attrs.split('.')[0]
+            data = _SCRIPT.format(python=python, module=module.strip(), head=head, call=attrs).encode('utf-8')
+            target = venv_path / 'bin' / script
+            _write(target, data, executable=True)
+            records.append((_relative(target, site_path), _hash(data), str(len(data))))
+
+    installer = b'sv\n'
+    _write(site_path / dist_info / 'INSTALLER', installer)
+    records.append(('%s/INSTALLER' % dist_info, _hash(installer), str(len(installer))))
+    records.append(('%s/RECORD' % dist_info, '', ''))
+
+    record = io.StringIO()
+    csv.writer(record, lineterminator='\n').writerows(records)
+    _write(site_path / dist_info / 'RECORD', record.getvalue().encode('utf-8'))
+
+
+def install_wheels(wheels: Mapping[Path, Iterable[str]], venv_path: Path) -> None:
+    for wheel, hashes in wheels.items():
+        install_wheel(wheel, venv_path, hashes)
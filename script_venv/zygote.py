@@ -0,0 +1,498 @@
+# -*- coding: utf-8 -*-
+
+""" Resident interpreters that fork a child for each python script run in their venv
+
+This module is also run by each venv's own python as the zygote server,
+so it only uses the standard library and doesn't import the rest of script_venv.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import struct
+import sys
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Sequence, Tuple  # noqa: F401
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib2 import Path  # noqa: F401
+
+_HEADER = struct.Struct('!I')
+_TIMEOUT = 5.0
+_STDIO = (0, 1, 2)
+
+
+def script_argv(cmd: Sequence[str]) -> Optional[Tuple[str, List[str]]]:
+    """The python and the script's argv, if cmd runs a python script file:
+    either through a python, or as a script whose shebang is a python"""
+    if not cmd:
+        return None
+    if os.path.basename(cmd[0]).startswith('python'):
+        if len(cmd) > 1 and not cmd[1].startswith('-') and os.path.isfile(cmd[1]):
+            return cmd[0], list(cmd[1:])
+        return None
+
+    try:
+        with open(cmd[0], 'rb') as in_script:
+            first_line = in_script.readline(512)
+    except OSError:
+        return None
+    if not first_line.startswith(b'#!'):
+        return None
+    interpreter = first_line[2:].strip().decode('utf-8', 'replace')
+    if not os.path.isabs(interpreter) or not os.path.basename(interpreter).startswith('python'):
+        return None
+    return interpreter, list(cmd)
+
+
+def _exit_code(status: int) -> int:
+    code = os.waitstatus_to_exitcode(status)
+    return 128 - code if code < 0 else code
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def _kill(pid: int, signum: int) -> None:
+    try:
+        os.kill(pid, signum)
+    except OSError:
+        pass
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name) or default)
+    except ValueError:
+        return default
+
+
+class ZygotePool(object):
+    """The zygotes of every venv, one for each python and set of preloaded modules,
+    listening on sockets in path.
+
+    Starting a zygote first stops the least recently used ones beyond max_zygotes,
+    or while the zygotes left hold more than max_rss_kb between them.
+    Zygotes stop by themselves after idle_timeout seconds without a run"""
+
+    def __init__(self, path: 'Path', max_zygotes: int = 4, max_rss_kb: int = 1024 * 1024,
+                 idle_timeout: int = 600) -> None:
+        self.path = str(path)
+        self.max_zygotes = max_zygotes
+        self.max_rss_kb = max_rss_kb
+        self.idle_timeout = idle_timeout
+
+    @classmethod
+    def from_env(cls, path: 'Path') -> 'ZygotePool':
+        """The pool with the limits in SV_ZYGOTES, SV_ZYGOTE_MEMORY (in MB) and SV_ZYGOTE_IDLE (in seconds)"""
+        return cls(path, max_zygotes=_env_int('SV_ZYGOTES', 4),
+                   max_rss_kb=_env_int('SV_ZYGOTE_MEMORY', 1024) * 1024,
+                   idle_timeout=_env_int('SV_ZYGOTE_IDLE', 600))
+
+    def base(self, python: str, modules: Sequence[str], env: Mapping[str, str]) -> str:
+        """The path, without extension, of the socket, pid and log files of a zygote"""
+        parts = [python, env.get('PYTHONPATH', '')] + list(modules)
+        return os.path.join(self.path, hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()[:16])
+
+    def run(self, cmd: Sequence[str], env: Mapping[str, str], modules: Sequence[str],
+            cwd: Optional[str] = None, fds: Sequence[int] = _STDIO) -> Optional[int]:
+        """Run cmd in a child of its zygote, with fds as its stdin, stdout and stderr, returning its exit code.
+
+        Returns None if cmd isn't a python script or there is no zygote to run it yet,
+        starting one for the next run, so the caller runs cmd as usual"""
+        script = script_argv(cmd)
+        if not script:
+            return None
+        python, argv = script
+        base = self.base(python, modules, env)
+
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        with client:
+            try:
+                client.connect(base + '.sock')
+            except OSError:
+                self.start(python, modules, env)
+                return None
+            try:
+                os.utime(base + '.sock')
+            except OSError:
+                pass
+            return _request(client, dict(argv=argv, cwd=cwd or os.getcwd(), env=dict(env)), fds)
+
+    def zygotes(self) -> List[Tuple[float, int, int, str]]:
+        """The running zygotes, least recently used first, as (last used, pid, resident kB, base)"""
+        import fcntl
+
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return []
+        running = []
+        for name in names:
+            if not name.endswith('.pid'):
+                continue
+            base = os.path.join(self.path, name[:-len('.pid')])
+            try:
+                with open(base + '.pid') as pid_file:
+                    # A running zygote holds the lock on its pid file, so a pid file
+                    # left by a dead one can't be mistaken for whatever reused its pid
+                    try:
+                        fcntl.flock(pid_file.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+                        continue
+                    except BlockingIOError:
+                        pass
+                    pid, rss_kb = (int(f) for f in pid_file.read().split())
+                used = os.stat(base + '.sock').st_mtime
+            except (OSError, ValueError):
+                continue
+            running.append((used, pid, rss_kb, base))
+        return sorted(running)
+
+    def evict(self, keep: str = '') -> None:
+        """Stop the least recently used zygotes, to make room for another"""
+        import signal
+
+        running = [z for z in self.zygotes() if z[3] != keep]
+        total_kb = sum(z[2] for z in running)
+        while running and (len(running) >= self.max_zygotes or total_kb > self.max_rss_kb):
+            _, pid, rss_kb, _ = running.pop(0)
+            _kill(pid, signal.SIGTERM)
+            total_kb -= rss_kb
+
+    def start(self, python: str, modules: Sequence[str], env: Mapping[str, str]) -> None:
+        """Start the zygote for python and modules in the background, detached from this process"""
+        base = self.base(python, modules, env)
+        os.makedirs(self.path, exist_ok=True)
+        self.evict(keep=base)
+        args = [python, os.path.abspath(__file__), '--idle', str(self.idle_timeout),
+                '--max-rss', str(self.max_rss_kb), base] + list(modules)
+
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            try:
+                os.setsid()
+                if os.fork() == 0:
+                    null_fd = os.open(os.devnull, os.O_RDWR)
+                    log_fd = os.open(base + '.log', os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                    os.dup2(null_fd, 0)
+                    os.dup2(null_fd, 1)
+                    os.dup2(log_fd, 2)
+                    os.chdir('/')
+                    os.execve(python, args, dict(env))
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+
+
+def _request(client: socket.socket, message: Dict[str, Any], fds: Sequence[int]) -> Optional[int]:
+    import signal
+
+    payload = json.dumps(message).encode('utf-8')
+    client.settimeout(_TIMEOUT)
+    try:
+        socket.send_fds(client, [_HEADER.pack(len(payload))], list(fds))
+        client.sendall(payload)
+        in_reply = client.makefile('rb')
+        reply = json.loads(in_reply.readline() or b'null')
+    except (OSError, ValueError):
+        return None
+    pid = reply.get('pid') if isinstance(reply, dict) else None
+    if not isinstance(pid, int):
+        return None
+
+    # The script is running now, so whatever happens it mustn't be run again:
+    # pass on the signals meant for it, and wait for it however long it takes
+    client.settimeout(None)
+    handlers = {}  # type: Dict[int, Any]
+    for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+        try:
+            handlers[signum] = signal.signal(signum, lambda s, _: _kill(pid, s))
+        except ValueError:  # Not the main thread
+            break
+    try:
+        try:
+            reply = json.loads(in_reply.readline() or b'null')
+        except (OSError, ValueError):
+            reply = None
+        if isinstance(reply, dict) and isinstance(reply.get('exit'), int):
+            return reply['exit']
+        # The zygote died first, so its child's exit code is lost
+        import time
+        while _alive(pid):
+            time.sleep(0.05)
+        return 1
+    finally:
+        for forwarded, handler in handlers.items():
+            signal.signal(forwarded, handler)
+
+
+def _max_rss_kb() -> int:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def _packages_signature() -> Tuple[int, int]:
+    """Changes whenever packages are installed into or removed from the venv, or the venv is rebuilt"""
+    import sysconfig
+    try:
+        st = os.stat(sysconfig.get_paths()['purelib'])
+    except OSError:
+        return -1, -1
+    return st.st_ino, st.st_mtime_ns
+
+
+def _receive(conn: socket.socket) -> Tuple[Dict[str, Any], List[int]]:
+    conn.settimeout(_TIMEOUT)
+    header, fds, _, _ = socket.recv_fds(conn, _HEADER.size, len(_STDIO))
+    try:
+        if len(header) != _HEADER.size or len(fds) != len(_STDIO):
+            raise ValueError("Bad request")
+        size, = _HEADER.unpack(header)
+        payload = b''
+        while len(payload) < size:
+            chunk = conn.recv(size - len(payload))
+            if not chunk:
+                raise ValueError("Truncated request")
+            payload += chunk
+        message = json.loads(payload.decode('utf-8'))
+        if not isinstance(message, dict) or not message.get('argv'):
+            raise ValueError("Bad request")
+    except (OSError, ValueError):
+        for fd in fds:
+            os.close(fd)
+        raise
+    return message, fds
+
+
+def _script_exit_code(code: Any) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code & 0xff
+    sys.stderr.write('%s\n' % code)
+    return 1
+
+
+def run_script(script: str) -> int:
+    """Run script as __main__ the way python would, returning its exit code"""
+    import atexit
+    import runpy
+    import threading
+    import traceback
+
+    try:
+        runpy.run_path(script, run_name='__main__')
+        code = 0
+    except SystemExit as e:
+        code = _script_exit_code(e.code)
+    except KeyboardInterrupt:
+        traceback.print_exc()
+        code = 130
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+
+    current = threading.current_thread()
+    for thread in threading.enumerate():
+        if thread is not current and not thread.daemon:
+            thread.join()
+    atexit._run_exitfuncs()
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except (OSError, ValueError):
+            pass
+    return code
+
+
+def _child(message: Dict[str, Any], fds: List[int]) -> int:  # pragma: no cover
+    """Become the script's process, in the forked child of the zygote"""
+    for target, fd in zip(_STDIO, fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    os.chdir(message['cwd'])
+    os.environ.clear()
+    os.environ.update(message['env'])
+
+    argv = [str(a) for a in message['argv']]
+    sys.argv = argv
+    sys.path.insert(0, os.path.dirname(os.path.abspath(argv[0])))
+    sys.stdin = open(0, 'r', closefd=False)
+    sys.stdout = open(1, 'w', closefd=False)
+    sys.stderr = open(2, 'w', errors='backslashreplace', closefd=False)
+    return run_script(argv[0])
+
+
+def serve(base: str, modules: Sequence[str], idle_timeout: float = 600, max_rss_kb: int = 0) -> int:
+    """Preload modules, then fork a child to run each script requested on base.sock,
+    until idle for idle_timeout seconds or told to stop with SIGTERM"""
+    import fcntl
+    import gc
+    import importlib
+    import select
+    import signal
+
+    # Run as a script, this directory is first on the path, where it could hide the scripts' own modules
+    if sys.path and os.path.abspath(sys.path[0] or os.curdir) == os.path.dirname(os.path.abspath(__file__)):
+        del sys.path[0]
+
+    pid_file = open(base + '.pid', 'a+')
+    try:
+        fcntl.flock(pid_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:  # Another zygote for the same python and modules got here first
+        return 0
+
+    # Along with what each child needs to run its script
+    for module in ['atexit', 'pkgutil', 'runpy', 'threading', 'traceback'] + list(modules):
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            sys.stderr.write("Unable to preload %s: %s\n" % (module, e))
+    rss_kb = _max_rss_kb()
+    if max_rss_kb and rss_kb > max_rss_kb:
+        sys.stderr.write("Not starting, as the zygote uses %d kB, more than the %d kB allowed\n" % (rss_kb, max_rss_kb))
+        return 0
+    packages = _packages_signature()
+    # Keep the collector off the preloaded objects, so their pages stay shared with every child
+    gc.freeze()
+
+    sock_path = base + '.sock'
+    if os.path.exists(sock_path):
+        os.unlink(sock_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)  # type: Optional[socket.socket]
+    assert listener is not None
+    old_umask = os.umask(0o077)
+    try:
+        listener.bind(sock_path)
+    finally:
+        os.umask(old_umask)
+    listener.listen(16)
+    pid_file.truncate(0)
+    pid_file.write('%d %d\n' % (os.getpid(), rss_kb))
+    pid_file.flush()
+
+    wake_r, wake_w = socket.socketpair()
+    wake_r.setblocking(False)
+    wake_w.setblocking(False)
+    signal.set_wakeup_fd(wake_w.fileno())
+    stopping = []  # type: List[int]
+    signal.signal(signal.SIGCHLD, lambda s, _: None)
+    signal.signal(signal.SIGTERM, lambda s, _: stopping.append(s))
+
+    children = {}  # type: Dict[int, socket.socket]
+    try:
+        while True:
+            if stopping and listener:
+                listener.close()
+                listener = None
+                try:
+                    os.unlink(sock_path)
+                except OSError:
+                    pass
+            if not listener and not children:
+                break
+
+            readers = [wake_r] + ([listener] if listener else [])
+            ready, _, _ = select.select(readers, [], [], None if children else idle_timeout)
+            if not ready and not children:
+                break
+            if wake_r in ready:
+                try:
+                    while wake_r.recv(512):
+                        pass
+                except BlockingIOError:
+                    pass
+            _reap(children)
+            if listener is None or listener not in ready:
+                continue
+
+            conn, _ = listener.accept()
+            try:
+                message, fds = _receive(conn)
+            except (OSError, ValueError):
+                conn.close()
+                continue
+            if _packages_signature() != packages:
+                # The preloaded modules may be out of date: let the client run the script itself
+                stopping.append(signal.SIGTERM)
+                for fd in fds:
+                    os.close(fd)
+                conn.close()
+                continue
+
+            pid = os.fork()
+            if pid == 0:  # pragma: no cover
+                code = 1
+                try:
+                    signal.set_wakeup_fd(-1)
+                    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                    for sock in (listener, wake_r, wake_w, conn):
+                        sock.close()
+                    pid_file.close()
+                    code = _child(message, fds)
+                finally:
+                    os._exit(code)
+
+            for fd in fds:
+                os.close(fd)
+            children[pid] = conn
+            try:
+                conn.sendall(json.dumps(dict(pid=pid)).encode('utf-8') + b'\n')
+            except OSError:
+                pass
+    finally:
+        paths = [base + '.pid']
+        if listener:
+            listener.close()
+            paths.append(sock_path)
+        for path in paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        pid_file.close()
+    return 0
+
+
+def _reap(children: Dict[int, socket.socket]) -> None:
+    """Send each finished child's exit code to the client waiting for it"""
+    while children:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+        conn = children.pop(pid, None)
+        if conn is None:
+            continue
+        try:
+            conn.sendall(json.dumps(dict(exit=_exit_code(status))).encode('utf-8') + b'\n')
+        except OSError:
+            pass
+        conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Zygote server of a script_venv venv")
+    parser.add_argument('--idle', type=float, default=600, help="Seconds without a run to stop after")
+    parser.add_argument('--max-rss', type=int, default=0, help="Resident kB not to start beyond")
+    parser.add_argument('base', help="Path of the socket, without its extension")
+    parser.add_argument('modules', nargs='*', help="Modules to preload")
+    args = parser.parse_args(argv)
+    return serve(args.base, args.modules, idle_timeout=args.idle, max_rss_kb=args.max_rss)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
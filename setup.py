@@ -32,7 +32,7 @@ setup(
     description="A python package for script (and command) virtualisation with less typing.",
     entry_points={
         'console_scripts': [
-            'sv=script_venv.cli:main',
+            'sv=script_venv.launcher:main',
         ],
     },
     install_requires=requirements,
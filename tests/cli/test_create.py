@@ -42,3 +42,20 @@ class TestCliCreate(CliFixtures):
 
         mock_config.load.assert_called_once_with()
         mock_config.create.assert_called_once_with('test', clean=False, update=True)
+
+    def test_cli_create_jobs(self, mock_config: Mock, run_config: CliObjectRunner):
+        run_config.invoke(cli.main, [':create', 'test', '--also', 'other', '-j', '4'])
+
+        mock_config.create.assert_called_once_with('test', clean=False, update=False, jobs=4, also=['other'])
+
+    def test_cli_create_all(self, mock_config: Mock, run_config: CliObjectRunner):
+        run_config.invoke(cli.main, [':create', '--all'])
+
+        mock_config.load.assert_called_once_with()
+        mock_config.create.assert_not_called()
+        mock_config.create_all.assert_called_once_with(clean=False, update=False)
+
+    def test_cli_create_all_params(self, mock_config: Mock, run_config: CliObjectRunner):
+        run_config.invoke(cli.main, [':create', '-A', '-U', '--index-url', 'url'])
+
+        mock_config.create_all.assert_called_once_with('--index-url', 'url', clean=False, update=True)
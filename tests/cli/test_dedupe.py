@@ -0,0 +1,18 @@
+from unittest.mock import Mock
+
+from script_venv import cli
+from tests.cli.fixtures import CliFixtures
+from tests.utils import CliObjectRunner
+
+
+class TestCliDedupe(CliFixtures):
+    def test_cli_dedupe(self, mock_config: Mock, run_config: CliObjectRunner):
+        run_config.invoke(cli.main, [':dedupe'])
+
+        mock_config.load.assert_called_once_with()
+        mock_config.dedupe.assert_called_once_with(store_dir=None)
+
+    def test_cli_dedupe_venvs(self, mock_config: Mock, run_config: CliObjectRunner):
+        run_config.invoke(cli.main, [':dedupe', '-s', 'store', 'alpha'])
+
+        mock_config.dedupe.assert_called_once_with('alpha', store_dir='store')
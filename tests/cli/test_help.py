@@ -45,3 +45,21 @@ class TestCliHelp(CliFixtures):
 
         assert result.exit_code == 0
         assert 'Show this message and exit.' in result.output
+
+    def test_cli_shims_help(self, run_config: CliObjectRunner) -> None:
+        result = run_config.invoke(cli.main, [':shims', '--help'])
+
+        assert result.exit_code == 0
+        assert 'Show this message and exit.' in result.output
+
+    def test_cli_serve_help(self, run_config: CliObjectRunner) -> None:
+        result = run_config.invoke(cli.main, [':serve', '--help'])
+
+        assert result.exit_code == 0
+        assert 'Show this message and exit.' in result.output
+
+    def test_cli_prefetch_help(self, run_config: CliObjectRunner) -> None:
+        result = run_config.invoke(cli.main, [':prefetch', '--help'])
+
+        assert result.exit_code == 0
+        assert 'Show this message and exit.' in result.output
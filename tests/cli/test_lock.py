@@ -0,0 +1,18 @@
+from unittest.mock import Mock
+
+from script_venv import cli
+from tests.cli.fixtures import CliFixtures
+from tests.utils import CliObjectRunner
+
+
+class TestCliLock(CliFixtures):
+    def test_cli_lock(self, mock_config: Mock, run_config: CliObjectRunner):
+        run_config.invoke(cli.main, [':lock'])
+
+        mock_config.load.assert_called_once_with()
+        mock_config.lock.assert_called_once_with(jobs=None)
+
+    def test_cli_lock_venvs(self, mock_config: Mock, run_config: CliObjectRunner):
+        run_config.invoke(cli.main, [':lock', '-j', '2', 'alpha', 'beta'])
+
+        mock_config.lock.assert_called_once_with('alpha', 'beta', jobs=2)
@@ -6,7 +6,7 @@
 
 from unittest.mock import Mock
 
-from script_venv import cli
+from script_venv import cli, trace
 from tests.cli.fixtures import CliFixtures
 from tests.utils import CliObjectRunner
 
@@ -24,3 +24,14 @@ class TestCliOptions(CliFixtures):
 
         mock_config.set_verbose.assert_called_once_with()
         mock_config.load.assert_called_once_with()
+
+    def test_cli_trace(self, mock_config: Mock, run_config: CliObjectRunner, tmp_path):
+        trace_file = str(tmp_path / 'trace.json')
+        try:
+            run_config.invoke(cli.main, ['--trace', trace_file, ':list'])
+            assert trace._tracer is not None
+            assert trace_file == trace._tracer.path
+        finally:
+            trace.stop()
+
+        mock_config.load.assert_called_once_with()
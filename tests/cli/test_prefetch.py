@@ -0,0 +1,18 @@
+from unittest.mock import Mock
+
+from script_venv import cli
+from tests.cli.fixtures import CliFixtures
+from tests.utils import CliObjectRunner
+
+
+class TestCliPrefetch(CliFixtures):
+    def test_cli_prefetch(self, mock_config: Mock, run_config: CliObjectRunner):
+        run_config.invoke(cli.main, [':prefetch'])
+
+        mock_config.load.assert_called_once_with()
+        mock_config.prefetch.assert_called_once_with(None, jobs=None)
+
+    def test_cli_prefetch_options(self, mock_config: Mock, run_config: CliObjectRunner):
+        run_config.invoke(cli.main, [':prefetch', '-W', 'wheels', '-j', '8'])
+
+        mock_config.prefetch.assert_called_once_with('wheels', jobs=8)
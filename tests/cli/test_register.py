@@ -48,3 +48,23 @@ class TestCliRegister(CliFixtures):
 
         mock_config.load.assert_called_once_with()
         mock_config.register.assert_called_once_with('test', ('package', ), config_path=None, venv_path='venv_path')
+
+    def test_cli_register_groups(self, mock_config: Mock, run_config: CliObjectRunner):
+        run_config.invoke(cli.main, [':register', 'one=package1,package2', 'two=package3', 'one=package1', '-j', '2'])
+
+        mock_config.load.assert_called_once_with()
+        mock_config.register.assert_not_called()
+        mock_config.register_all.assert_called_once_with({'one': ['package1', 'package2'], 'two': ['package3']},
+                                                         config_path=None, venv_path=None, jobs=2)
+
+    def test_cli_register_groups_extras(self, mock_config: Mock, run_config: CliObjectRunner):
+        run_config.invoke(cli.main, [':register', 'one=foo[a,b],bar>=1,<2,baz', 'two=qux[c]'])
+
+        mock_config.register_all.assert_called_once_with({'one': ['foo[a,b]', 'bar>=1,<2', 'baz'], 'two': ['qux[c]']},
+                                                         config_path=None, venv_path=None, jobs=None)
+
+    def test_cli_register_groups_invalid(self, mock_config: Mock, run_config: CliObjectRunner):
+        result = run_config.invoke(cli.main, [':register', 'one=package1', 'package2'])
+
+        assert 0 != result.exit_code
+        mock_config.register_all.assert_not_called()
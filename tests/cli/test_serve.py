@@ -0,0 +1,18 @@
+from unittest.mock import Mock
+
+from script_venv import cli
+from tests.cli.fixtures import CliFixtures
+from tests.utils import CliObjectRunner
+
+
+class TestCliServe(CliFixtures):
+    def test_cli_serve(self, mock_config: Mock, run_config: CliObjectRunner):
+        run_config.invoke(cli.main, [':serve'])
+
+        mock_config.load.assert_called_once_with()
+        mock_config.serve.assert_called_once_with(None, idle_timeout=0)
+
+    def test_cli_serve_socket(self, mock_config: Mock, run_config: CliObjectRunner):
+        run_config.invoke(cli.main, [':serve', '-s', 'sv.sock', '-t', '60'])
+
+        mock_config.serve.assert_called_once_with('sv.sock', idle_timeout=60)
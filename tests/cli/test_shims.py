@@ -0,0 +1,20 @@
+from os import path
+from unittest.mock import Mock
+
+from script_venv import cli
+from tests.cli.fixtures import CliFixtures
+from tests.utils import CliObjectRunner
+
+
+class TestCliShims(CliFixtures):
+    def test_cli_shims(self, mock_config: Mock, run_config: CliObjectRunner):
+        run_config.invoke(cli.main, [':shims'])
+
+        mock_config.load.assert_called_once_with()
+        mock_config.shims.assert_called_once_with(path.join('~', '.local', 'bin'))
+
+    def test_cli_shims_bin_dir(self, mock_config: Mock, run_config: CliObjectRunner):
+        run_config.invoke(cli.main, [':shims', '-B', 'bin'])
+
+        mock_config.load.assert_called_once_with()
+        mock_config.shims.assert_called_once_with('bin')
@@ -0,0 +1,18 @@
+from unittest.mock import Mock
+
+from script_venv import cli
+from tests.cli.fixtures import CliFixtures
+from tests.utils import CliObjectRunner
+
+
+class TestCliStats(CliFixtures):
+    def test_cli_stats(self, mock_config: Mock, run_config: CliObjectRunner):
+        run_config.invoke(cli.main, [':stats'])
+
+        mock_config.load.assert_called_once_with()
+        mock_config.stats.assert_called_once_with(stats_file=None, prometheus=None, top=10)
+
+    def test_cli_stats_options(self, mock_config: Mock, run_config: CliObjectRunner):
+        run_config.invoke(cli.main, [':stats', '-f', 'stats.jsonl', '-p', 'sv.prom', '-n', '3'])
+
+        mock_config.stats.assert_called_once_with(stats_file='stats.jsonl', prometheus='sv.prom', top=3)
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+""" Config cache tests """
+
+import os
+from pathlib2 import Path
+
+import pytest
+
+from script_venv.cache import ConfigCache, DirCache, cache_dir
+
+
+class TestConfigCache(object):
+    @pytest.fixture
+    def cfg_file(self, tmp_path) -> Path:
+        cfg_file = Path(str(tmp_path)) / '.sv_cfg'
+        cfg_file.write_text(u"[SCRIPTS]\n")
+        return cfg_file
+
+    @pytest.fixture
+    def cache(self, tmp_path) -> ConfigCache:
+        return ConfigCache(Path(str(tmp_path)) / 'cache')
+
+    def test_cache_miss(self, cache: ConfigCache, cfg_file: Path) -> None:
+        assert cache.lookup(cache.key([cfg_file])) is None
+
+    def test_cache_hit(self, cache: ConfigCache, cfg_file: Path) -> None:
+        cache.store(cache.key([cfg_file]), {'scripts': {'a': 'b'}})
+
+        assert {'scripts': {'a': 'b'}} == cache.lookup(cache.key([cfg_file]))
+
+    def test_cache_changed(self, cache: ConfigCache, cfg_file: Path) -> None:
+        cache.store(cache.key([cfg_file]), {'scripts': {}})
+        cfg_file.write_text(u"[SCRIPTS]\nsample = test\n")
+
+        assert cache.lookup(cache.key([cfg_file])) is None
+
+    def test_cache_missing_file(self, cache: ConfigCache, cfg_file: Path) -> None:
+        missing = cfg_file.parent / 'missing' / '.sv_cfg'
+        cache.store(cache.key([missing]), {'scripts': {}})
+
+        assert {'scripts': {}} == cache.lookup(cache.key([missing]))
+
+    def test_cache_corrupt(self, cache: ConfigCache, cfg_file: Path) -> None:
+        key = cache.key([cfg_file])
+        cache.store(key, {'scripts': {}})
+        for cache_file in cache.cache_path.glob('config-*.bin'):
+            cache_file.write_bytes(b'corrupt')
+
+        assert cache.lookup(key) is None
+
+
+class TestDirCache(object):
+    @pytest.fixture
+    def dir_path(self, tmp_path) -> str:
+        dir_path = str(tmp_path / 'dir')
+        os.mkdir(dir_path)
+        open(os.path.join(dir_path, '.sv_cfg'), 'w').close()
+        os.utime(dir_path, (1, 1))
+        return dir_path
+
+    @pytest.fixture
+    def cache(self, tmp_path) -> DirCache:
+        return DirCache(Path(str(tmp_path)) / 'cache')
+
+    def test_dir_holds(self, cache: DirCache, dir_path: str) -> None:
+        assert (True, False) == cache.holds(dir_path, ('.sv_cfg', '.git'))
+
+    def test_dir_missing(self, cache: DirCache, tmp_path) -> None:
+        assert (False,) == cache.holds(str(tmp_path / 'missing'), ('.sv_cfg',))
+
+    def test_dir_hit(self, cache: DirCache, dir_path: str) -> None:
+        cache.holds(dir_path, ('.sv_cfg',))
+        cache.save()
+        os.unlink(os.path.join(dir_path, '.sv_cfg'))
+        os.utime(dir_path, (1, 1))
+
+        assert (True,) == DirCache(cache.cache_file.parent).holds(dir_path, ('.sv_cfg',))
+
+    def test_dir_changed(self, cache: DirCache, dir_path: str) -> None:
+        cache.holds(dir_path, ('.sv_cfg',))
+        cache.save()
+        os.unlink(os.path.join(dir_path, '.sv_cfg'))
+
+        assert (False,) == DirCache(cache.cache_file.parent).holds(dir_path, ('.sv_cfg',))
+
+    def test_dir_names_changed(self, cache: DirCache, dir_path: str) -> None:
+        cache.holds(dir_path, ('.git',))
+
+        assert (True,) == cache.holds(dir_path, ('.sv_cfg',))
+
+    def test_dir_racy(self, cache: DirCache, dir_path: str) -> None:
+        os.utime(dir_path)
+        cache.holds(dir_path, ('.sv_cfg',))
+        cache.save()
+
+        assert not cache.cache_file.exists()
+
+    def test_dir_corrupt(self, cache: DirCache, dir_path: str) -> None:
+        cache.cache_file.parent.mkdir(parents=True)
+        cache.cache_file.write_bytes(b'corrupt')
+
+        assert (True,) == cache.holds(dir_path, ('.sv_cfg',))
+
+
+class TestCacheDir(object):
+    def test_cache_dir_env(self, monkeypatch) -> None:
+        monkeypatch.setenv('SV_CACHE_DIR', '/tmp/sv_cache')
+
+        assert Path('/tmp/sv_cache') == cache_dir()
+
+    def test_cache_dir_xdg(self, monkeypatch) -> None:
+        monkeypatch.delenv('SV_CACHE_DIR', raising=False)
+        monkeypatch.setenv('XDG_CACHE_HOME', '/tmp/xdg')
+
+        assert Path('/tmp/xdg/script_venv') == cache_dir()
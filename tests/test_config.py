@@ -2,16 +2,19 @@
 
 """ Test Config file processing """
 
+import os
 from os import path
 from pathlib2 import Path
-from unittest.mock import Mock, MagicMock
+from unittest.mock import Mock, MagicMock, ANY
 
 import pytest
 
+from script_venv.cache import ConfigCache, DirCache
 from script_venv.config import VenvConfig, ConfigDependencies
+from script_venv.venv import _bin
 
 from .test_venv import VEnvFixtures
-from .utils import config_read, config_write, venv_exists, config_scripts, StringContaining
+from .utils import config_read, config_write, venv_exists, venv_ready, config_scripts, StringContaining
 
 
 class VenvConfigFixtures(VEnvFixtures):
@@ -22,6 +25,9 @@ class VenvConfigFixtures(VEnvFixtures):
     def config_deps(self, venv_deps: Mock) -> Mock:
         config_mock = MagicMock(spec=ConfigDependencies, name="config_deps")
         config_mock.venv_deps.return_value = venv_deps
+        config_mock.config_cache.return_value = None
+        config_mock.dir_cache.return_value = None
+        config_mock.script_index.return_value = None
         return config_mock
 
     @pytest.fixture
@@ -87,6 +93,202 @@ class TestVenvConfigSearch(VenvConfigFixtures):
         config_deps.exists.assert_any_call(Path('Path').absolute() / '.sv_cfg')
 
 
+class TestVenvConfigParents(VenvConfigFixtures):
+    @pytest.fixture
+    def cwd(self, tmp_path, monkeypatch) -> Path:
+        root = Path(str(tmp_path)).resolve()
+        cwd = root / 'top' / 'project' / 'sub'
+        cwd.mkdir(parents=True)
+        (root / '.sv_cfg').write_text(u"")
+        (root / 'top' / 'project' / '.sv_cfg').write_text(u"")
+        (root / 'top' / 'project' / '.git').mkdir()
+        monkeypatch.chdir(str(cwd))
+        monkeypatch.delenv('SV_ROOT_MARKER', raising=False)
+        return cwd
+
+    @pytest.fixture
+    def parents(self, config_deps: Mock, config: VenvConfig) -> VenvConfig:
+        config_deps.exists.side_effect = lambda p: path.exists(str(p))
+        config.search_path(['$PARENTS'])
+        return config
+
+    def test_parents_all(self, cwd: Path, parents: VenvConfig) -> None:
+        config_files = [path.normpath(str(f)) for f in parents.config_files()]
+
+        assert str(cwd.parent / '.sv_cfg') in config_files
+        assert str(cwd.parent.parent / '.sv_cfg') in config_files
+        assert str(cwd / '.sv_cfg') not in config_files
+
+    def test_parents_marker(self, cwd: Path, parents: VenvConfig, monkeypatch) -> None:
+        monkeypatch.setenv('SV_ROOT_MARKER', '.git')
+
+        assert [str(cwd.parent / '.sv_cfg')] == [path.normpath(str(f)) for f in parents.config_files()]
+
+    def test_parents_marker_cwd(self, cwd: Path, parents: VenvConfig, monkeypatch) -> None:
+        monkeypatch.setenv('SV_ROOT_MARKER', '.git')
+        (cwd / '.git').mkdir()
+
+        assert [] == parents.config_files()
+
+    def test_parents_cached(self, cwd: Path, config_deps: Mock, parents: VenvConfig, tmp_path) -> None:
+        dir_cache = DirCache(Path(str(tmp_path)) / 'cache')
+        config_deps.dir_cache.return_value = dir_cache
+        root = cwd.parent.parent.parent
+        for dir_path in (root, root / 'top', cwd.parent):
+            os.utime(str(dir_path), (1, 1))
+
+        config_files = [path.normpath(str(f)) for f in parents.config_files()]
+
+        assert str(root / '.sv_cfg') in config_files
+        assert str(cwd.parent / '.sv_cfg') in config_files
+        assert str(root / 'top' / '.sv_cfg') not in config_files
+        assert dir_cache.cache_file.exists()
+
+
+class TestVenvConfigLazy(VenvConfigFixtures):
+    PARENT_sv_cfg = path.join(path.abspath('.'), '..', '.sv_cfg')
+
+    def test_venvs_lazy(self, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[alpha]\n[beta]\nrequirements = b\n"})
+
+        config.load()
+        config_deps.venv_deps.assert_not_called()
+
+        assert {'b'} == config.venvs['beta'].requirements
+        assert config.venvs['beta'] is config.venvs['beta']
+        assert config.venvs['alpha'].deps is config.venvs['beta'].deps
+        config_deps.venv_deps.assert_called_once_with()
+
+    def test_venvs_unknown(self, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[alpha]\n"})
+        config.load()
+
+        assert 'missing' not in config.venvs
+        with pytest.raises(KeyError):
+            config.venvs['missing']
+
+    def test_load_script(self, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {
+            self.USER_sv_cfg: "[test]\nrequirements = alpha\n",
+            self.PARENT_sv_cfg: "[SCRIPTS]\ntool = other\n[other]\n",
+            self.CWD_sv_cfg: "[SCRIPTS]\nTool = test\n",
+        })
+
+        config.load(script='tool')
+
+        assert 'test' == config.scripts['tool']
+        assert {'alpha'} == config.venvs['test'].requirements
+        assert 'other' not in config.venvs
+        assert 2 == config_deps.read.call_count
+
+    def test_load_script_matches_full_load(self, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {
+            self.USER_sv_cfg: "[SCRIPTS]\ntool = other\n[test]\nbase = common\n",
+            self.PARENT_sv_cfg: "[common]\nrequirements = shared\n[test]\nrequirements = ignored\n",
+            self.CWD_sv_cfg: "[SCRIPTS]\ntool = test\n",
+        })
+        full = VenvConfig(deps=config_deps)
+        full.load()
+
+        config.load(script='tool')
+
+        assert full.scripts['tool'] == config.scripts['tool']
+        assert full.venvs['test'].requirements == config.venvs['test'].requirements
+        assert {'shared'} == config.venvs['test'].base.requirements
+
+    def test_load_script_only_its_venvs(self, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {
+            self.CWD_sv_cfg: "[SCRIPTS]\ntool = test\nother = other\nimplicit\n"
+                             "[test]\nbase = implicit\n[other]\nrequirements = beta\n",
+        })
+
+        config.load(script='tool')
+
+        assert {'tool': 'test'} == config.scripts
+        assert ['implicit', 'test'] == sorted(config.venvs)
+        assert 'implicit' == config.venvs['test'].base.name
+
+    def test_load_script_unknown(self, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\ntool = test\n"})
+
+        config.load(script='missing')
+
+        assert not config.scripts
+        assert not config.venvs
+
+    def test_load_script_indexed(self, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\ntool = test\n\n[other]\n"})
+        config_deps.script_index.return_value = Mock(name='script_index')
+        config_deps.script_index.return_value.lookup.return_value = 'other'
+
+        config.load(script='Indexed')
+
+        config_deps.script_index.return_value.lookup.assert_called_once_with('Indexed')
+        assert 'other' in config.venvs
+        assert 'indexed' not in config.scripts
+
+
+class TestVenvConfigCache(VenvConfigFixtures):
+    @pytest.fixture
+    def config_cache(self, config_deps: Mock, tmp_path) -> ConfigCache:
+        cache = ConfigCache(Path(str(tmp_path)))
+        config_deps.config_cache.return_value = cache
+        return cache
+
+    def test_cache_stored(self, config_deps: Mock, config: VenvConfig, config_cache: ConfigCache) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\nsample.py=sample\n[sample]\nrequirements = alpha\n"})
+
+        config.load()
+
+        assert list(config_cache.cache_path.glob('config-*.bin'))
+
+    def test_cache_hit(self, config_deps: Mock, config: VenvConfig, config_cache: ConfigCache) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\nsample.py=sample\n[sample]\nrequirements = alpha\n"})
+        config.load()
+        config_deps.read.reset_mock()
+
+        cached = VenvConfig(deps=config_deps)
+        cached.load()
+
+        config_deps.read.assert_not_called()
+        assert 'sample' == cached.scripts['sample.py']
+        assert {'alpha'} == cached.venvs['sample'].requirements
+
+    def test_cache_other_cwd(self, config_deps: Mock, config: VenvConfig, config_cache: ConfigCache,
+                             tmp_path, monkeypatch) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[sample]\n"})
+        config_dir = path.dirname(self.CWD_sv_cfg)
+        config.search_path(['$CWD'])
+        config.load()
+        first = config.venvs['sample'].abs_path
+        monkeypatch.chdir(str(tmp_path))
+
+        elsewhere = VenvConfig(deps=config_deps)
+        elsewhere.search_path([config_dir])
+        elsewhere.load()
+
+        assert Path(config_dir, '.sv', 'sample') == elsewhere.venvs['sample'].abs_path
+        assert first == elsewhere.venvs['sample'].abs_path
+
+    def test_cache_base(self, config_deps: Mock, config: VenvConfig, config_cache: ConfigCache) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[common]\n[sample]\nbase = common\n"})
+        config.load()
+
+        cached = VenvConfig(deps=config_deps)
+        cached.load()
+
+        assert cached.venvs['common'] is cached.venvs['sample'].base
+
+    def test_cache_messages(self, config_deps: Mock, config: VenvConfig, config_cache: ConfigCache) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[Sample]\n"})
+        config.load()
+        config_deps.echo.reset_mock()
+
+        VenvConfig(deps=config_deps).load()
+
+        config_deps.echo.assert_called_with(StringContaining("Sample"))
+
+
 class TestVenvConfigVerbose(VenvConfigFixtures):
     def test_verbose_default(self, config: VenvConfig):
         assert not config.verbose
@@ -126,6 +328,15 @@ class TestVenvConfigDetails(VenvConfigFixtures):
         venv = config.venvs['sample']
         assert {'alpha', 'beta'} == venv.requirements
 
+    def test_venv_zygote(self, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[sample]\nzygote = numpy\n\tpandas\n[plain]\n[bare]\nzygote\n"})
+
+        config.load()
+
+        assert ['numpy', 'pandas'] == config.venvs['sample'].zygote
+        assert config.venvs['plain'].zygote is None
+        assert [] == config.venvs['bare'].zygote
+
 
 class TestVenvConfigLocation(VenvConfigFixtures):
     def test_venv_current(self, config_deps: Mock, config: VenvConfig) -> None:
@@ -188,6 +399,166 @@ class TestVenvConfigList(VenvConfigFixtures):
 
         config_deps.echo.assert_called_with("\tScripts: sample, tester")
 
+    def test_list_base(self, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[common]\n[test]\nbase = common\n"})
+        config.load()
+
+        config.list()
+
+        config_deps.echo.assert_any_call("\tBase: common")
+
+
+class TestVenvConfigBase(VenvConfigFixtures):
+    def test_base(self, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[common]\n[middle]\nbase = common\n[test]\nbase = middle\n"})
+
+        config.load()
+
+        assert config.venvs['common'].base is None
+        assert config.venvs['middle'] is config.venvs['test'].base
+        assert config.venvs['common'] is config.venvs['middle'].base
+
+    def test_base_unknown(self, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[test]\nbase = missing\n"})
+
+        config.load()
+
+        assert config.venvs['test'].base is None
+        config_deps.echo.assert_called_with("Ignored unknown base missing of venv test")
+
+    def test_base_loop(self, config_deps: Mock, config: VenvConfig) -> None:
+        sv_cfg = "[alpha]\nbase = beta\n[beta]\nbase = alpha\n[gamma]\nbase = alpha\n"
+        config_read(config_deps, {self.CWD_sv_cfg: sv_cfg})
+
+        config.load()
+
+        assert all(v.base is None for v in config.venvs.values())
+        config_deps.echo.assert_any_call("Ignored base beta of venv alpha, as its bases loop back to alpha")
+        config_deps.echo.assert_any_call("Ignored base alpha of venv gamma, as its bases loop back to alpha")
+
+
+class TestVenvConfigShims(VenvConfigFixtures):
+    def test_shims(self, config_deps: Mock, config: VenvConfig, tmp_path) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\nsample = test\ntester = test"})
+        config.load()
+
+        config.shims(str(tmp_path))
+
+        config_deps.echo.assert_called_with(StringContaining("2 written, 0 unchanged, 0 removed"))
+        assert {'sample', 'tester'} == {p.name for p in Path(str(tmp_path)).iterdir()}
+
+    def test_shims_stale_until_rerun(self, config_deps: Mock, config: VenvConfig, tmp_path) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\nsample = test\n"})
+        config.load()
+        config.shims(str(tmp_path))
+        config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\nsample = other\n"})
+        changed = VenvConfig(deps=config_deps)
+        changed.load()
+
+        assert 'from venv test ' in (Path(str(tmp_path)) / 'sample').read_text()
+
+        changed.shims(str(tmp_path))
+
+        assert 'from venv other ' in (Path(str(tmp_path)) / 'sample').read_text()
+        config_deps.echo.assert_called_with(StringContaining("1 written, 0 unchanged, 0 removed"))
+
+    def test_shims_indexed(self, config_deps: Mock, venv_deps: Mock, config: VenvConfig, tmp_path) -> None:
+        sv_cfg = {self.CWD_sv_cfg: "[SCRIPTS]\nsample = test\n[other]\n"}
+        config_read(config_deps, sv_cfg)
+        index = config_deps.script_index.return_value = Mock(name='script_index')
+        index.scripts.side_effect = lambda v: {'test': ['sample', 'extra'], 'other': ['tool', 'gone']}.get(v, [])
+        index.lookup.side_effect = lambda s: 'test' if s in ('sample', 'extra') else 'other'
+        config.load()
+        installed = {str(config.venvs[v].abs_path / _bin / s): '' for v, s in (('test', 'extra'), ('other', 'tool'))}
+        config_read(config_deps, dict(sv_cfg, **installed))
+        venv_exists(venv_deps, *installed)
+
+        config.shims(str(tmp_path))
+
+        assert {'sample', 'extra', 'tool'} == {p.name for p in Path(str(tmp_path)).iterdir()}
+
+
+class TestVenvConfigPrefetch(VenvConfigFixtures):
+    def test_prefetch(self, venv_deps: Mock, config_deps: Mock, config: VenvConfig, tmp_path) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[test]\nprerequisites = first\nrequirements = alpha\n[other]\n"})
+        venv_deps.runner.side_effect = lambda cmd: 1 if cmd[-1] == 'wheel' else 0
+        config.load()
+
+        config.prefetch(str(tmp_path))
+
+        fetched = sorted(c[0][0][-1] for c in venv_deps.runner.call_args_list)
+        assert ['alpha', 'first', 'pip', 'wheel'] == fetched
+        config_deps.echo.assert_any_call("Unable to prefetch: wheel")
+        config_deps.echo.assert_called_with(StringContaining("holds 3 requirements in 0 wheels"))
+
+
+class TestVenvConfigLock(VenvConfigFixtures):
+    def test_lock(self, venv_deps: Mock, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[test]\nrequirements = alpha\n[other]\nrequirements = beta\n"})
+        venv_deps.capture.side_effect = lambda cmd: (1 if cmd[-1] == 'beta' else 0, '{}')
+        config.load()
+
+        config.lock(jobs=2)
+
+        assert 2 == venv_deps.capture.call_count
+        config_deps.echo.assert_called_with("Unable to lock: other")
+
+    def test_lock_venv(self, venv_deps: Mock, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[test]\nrequirements = alpha\n[other]\nrequirements = beta\n"})
+        venv_deps.capture.return_value = (0, '{}')
+        config.load()
+
+        config.lock('test')
+
+        venv_deps.capture.assert_called_once_with(StringContaining('alpha'))
+
+    def test_lock_missing(self, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {})
+        config.load()
+
+        config.lock('missing')
+
+        config_deps.echo.assert_called_with("Unable to find venv or script missing")
+
+
+class TestVenvConfigDedupe(VenvConfigFixtures):
+    def test_dedupe(self, venv_deps: Mock, config_deps: Mock, config: VenvConfig, tmp_path) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[test]\n[other]\n"})
+        venv_exists(venv_deps, self.CWD_sv_test)
+        config.load()
+
+        config.dedupe(store_dir=str(tmp_path))
+
+        config_deps.echo.assert_any_call("Deduplicated venv test: 0 files, 0 linked to the store, saving 0 bytes")
+        config_deps.echo.assert_called_with("Store %s holds 0 files (0 unused removed), saving 0 bytes" % tmp_path)
+        assert 2 == config_deps.echo.call_count
+
+    def test_dedupe_missing(self, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {})
+        config.load()
+
+        config.dedupe('missing')
+
+        config_deps.echo.assert_called_once_with("Unable to find venv or script missing")
+
+
+class TestVenvConfigStats(VenvConfigFixtures):
+    def test_stats(self, config_deps: Mock, config: VenvConfig, tmp_path) -> None:
+        stats_file = tmp_path / 'stats.jsonl'
+        stats_file.write_text('{"script":"tool","venv":"test","sv_ms":1.5,"wall_ms":20}\n')
+        prom_file = tmp_path / 'prom' / 'sv.prom'
+
+        config.stats(stats_file=str(stats_file), prometheus=str(prom_file))
+
+        config_deps.echo.assert_any_call("1 runs of 1 scripts, config cache 0 hits and 0 misses")
+        config_deps.echo.assert_any_call("\ttool: 1 runs, 0.0s")
+        assert 'sv_script_runs_total{script="tool"} 1' in prom_file.read_text()
+
+    def test_stats_empty(self, config_deps: Mock, config: VenvConfig, tmp_path) -> None:
+        config.stats(stats_file=str(tmp_path / 'missing.jsonl'))
+
+        config_deps.echo.assert_called_once_with(StringContaining("set SV_STATS=1"))
+
 
 class TestVenvConfigRegister(VenvConfigFixtures):
     def test_register(self, config_deps: Mock, config: VenvConfig) -> None:
@@ -279,6 +650,91 @@ class TestVenvConfigRegister(VenvConfigFixtures):
         assert "global" not in out_str
         assert "local" not in out_str
 
+    def test_register_all(self, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {})
+        config_write(config_deps)
+        config_scripts(config_deps)
+
+        config.register_all({'one': ['package1', 'package2'], 'two': ['package3']}, config_path='$CWD', jobs=2)
+
+        config_deps.write.assert_called_once()
+        assert {'one', 'two'} == {c[0][0].name for c in config_deps.scripts.call_args_list}
+        out_str = config_deps.out_str[self.CWD_sv_cfg]
+        assert "package1.script = one" in out_str
+        assert "package3.script = two" in out_str
+        assert "[one]\nrequirements = package1\n\tpackage2" in out_str
+        assert "[two]\nrequirements = package3" in out_str
+
+    def test_register_all_failed(self, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {})
+        config_write(config_deps)
+
+        def scripts_callback(venv, packages):
+            if venv.name == 'two':
+                raise OSError("pip failed")
+            return [(p, '%s.script' % p) for p in packages]
+        config_deps.scripts.side_effect = scripts_callback
+
+        config.register_all({'one': ['package1'], 'two': ['package2']}, config_path='$CWD', jobs=2)
+
+        config_deps.write.assert_called_once()
+        out_str = config_deps.out_str[self.CWD_sv_cfg]
+        assert "package1.script = one" in out_str
+        assert "[one]\nrequirements = package1" in out_str
+        assert "two" not in out_str
+        config_deps.echo.assert_any_call("Error registering package2 into venv two: pip failed")
+        config_deps.echo.assert_any_call("Unable to register into: two")
+
+    def test_register_failed(self, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {})
+        config_deps.scripts.side_effect = OSError("pip failed")
+
+        config.register('one', ['package1'], config_path='$CWD')
+
+        config_deps.write.assert_not_called()
+        config_deps.echo.assert_called_with("Unable to register into: one")
+
+
+class TestVenvConfigScriptVenv(VenvConfigFixtures):
+    @pytest.fixture
+    def index(self, config_deps: Mock) -> Mock:
+        index = Mock(name='script_index')
+        index.lookup.return_value = 'test'
+        config_deps.script_index.return_value = index
+        config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\nSample.py = sample\n\n[sample]\n[test]\n"})
+        return index
+
+    def test_script_venv_registered(self, config_deps: Mock, config: VenvConfig, index: Mock) -> None:
+        config.load()
+
+        assert 'sample' == config.script_venv('Sample.py')
+        index.lookup.assert_not_called()
+
+    def test_script_venv_indexed(self, venv_deps: Mock, config_deps: Mock, config: VenvConfig, index: Mock) -> None:
+        config.load()
+        config_deps.exists.side_effect = lambda p: p == config.venvs['test'].abs_path / _bin / 'tool'
+
+        assert 'test' == config.script_venv('tool')
+        index.lookup.assert_called_once_with('tool')
+
+    def test_script_venv_stale(self, config_deps: Mock, config: VenvConfig, index: Mock) -> None:
+        config.load()
+        config_deps.exists.return_value = False
+
+        assert config.script_venv('tool') is None
+
+    def test_script_venv_unknown(self, config_deps: Mock, config: VenvConfig, index: Mock) -> None:
+        config.load()
+        index.lookup.return_value = 'missing'
+        config_deps.exists.return_value = True
+
+        assert config.script_venv('tool') is None
+
+    def test_script_venv_no_index(self, config_deps: Mock, config: VenvConfig) -> None:
+        config.load()
+
+        assert config.script_venv('tool') is None
+
 
 class TestVenvConfigCreate(VenvConfigFixtures):
     def test_create_venv(self, venv_deps: Mock, config_deps: Mock, config: VenvConfig) -> None:
@@ -289,6 +745,7 @@ class TestVenvConfigCreate(VenvConfigFixtures):
         config.create('test')
 
         venv_deps.echo.assert_called_with(StringContaining("Creating venv test"))
+        venv_deps.locked.assert_called_once_with(config.venvs['test'].abs_path)
 
     def test_create_script(self, venv_deps: Mock, config_deps: Mock, config: VenvConfig) -> None:
         venv_exists(venv_deps)
@@ -316,6 +773,20 @@ class TestVenvConfigCreate(VenvConfigFixtures):
 
         venv_deps.echo.assert_not_called()
 
+    def test_create_exists_new_base(self, venv_deps: Mock, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[common]\n[test]\nbase = common\n"})
+        config.load()
+        venv_exists(venv_deps, self.CWD_sv_test, str(config.venvs['common'].abs_path))
+        venv_ready(venv_deps, config.venvs['common'])
+
+        config.create('test')
+
+        pth_path, pth = next(c[0] for c in venv_deps.write_text.call_args_list if c[0][0].name == '_sv_base.pth')
+        assert config.venvs['test'].abs_path in pth_path.parents
+        assert str(config.venvs['common'].abs_path) in pth
+        stamp_path, _ = venv_deps.write_text.call_args_list[-1][0]
+        assert config.venvs['test'].abs_path / '.sv_stamp' == stamp_path
+
     def test_create_clean(self, venv_deps: Mock, config_deps: Mock, config: VenvConfig) -> None:
         config_read(config_deps, {self.CWD_sv_cfg: "[test]"})
         venv_exists(venv_deps, self.CWD_sv_test)
@@ -334,6 +805,102 @@ class TestVenvConfigCreate(VenvConfigFixtures):
 
         venv_deps.echo.assert_called_with(StringContaining("Updating venv test"))
 
+    def test_create_update_merged(self, venv_deps: Mock, config_deps: Mock, config: VenvConfig) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[test]\nrequirements = alpha\n"})
+        venv_exists(venv_deps, self.CWD_sv_test)
+        config.load()
+
+        config.create('test', update=True)
+
+        venv_deps.runner.assert_called_once_with([ANY, '-m', 'pip', 'install', '-U', 'pip', 'wheel', 'alpha'], env=ANY)
+
+
+class TestVenvConfigCreateMany(VenvConfigFixtures):
+    CFG = "[SCRIPTS]\ntester = test\n\n[test]\n[other]\nrequirements = alpha\n"
+
+    def test_create_many(self, venv_deps: Mock, config_deps: Mock, config: VenvConfig) -> None:
+        venv_exists(venv_deps)
+        venv_deps.runner.return_value = 0
+        config_read(config_deps, {self.CWD_sv_cfg: self.CFG})
+        config.load()
+
+        config.create('test', '--index-url', 'url', also=['other'])
+
+        assert venv_deps.creator.call_count == 2
+        venv_deps.runner.assert_any_call([ANY, '-m', 'pip', 'install', 'alpha', '--index-url', 'url'], env=ANY)
+        venv_deps.log_to.assert_any_call(Path('.sv', 'other.log').absolute())
+        config_deps.echo.assert_called_with(StringContaining("Created 2 venvs, 0 failed"))
+
+    def test_create_many_duplicates(self, venv_deps: Mock, config_deps: Mock, config: VenvConfig) -> None:
+        venv_exists(venv_deps)
+        config_read(config_deps, {self.CWD_sv_cfg: self.CFG})
+        config.load()
+
+        config.create('test', also=['tester'], jobs=2)
+
+        assert venv_deps.creator.call_count == 1
+
+    def test_create_many_params(self, venv_deps: Mock, config_deps: Mock, config: VenvConfig) -> None:
+        venv_exists(venv_deps)
+        config_read(config_deps, {self.CWD_sv_cfg: self.CFG})
+        config.load()
+
+        config.create('test', 'param', 'other', jobs=2)
+
+        assert venv_deps.creator.call_count == 1
+        venv_deps.runner.assert_called_with([ANY, '-m', 'pip', 'install', 'param', 'other'], env=ANY)
+
+    def test_create_many_not_implicit(self, venv_deps: Mock, config_deps: Mock, config: VenvConfig) -> None:
+        venv_exists(venv_deps)
+        venv_deps.runner.return_value = 0
+        config_read(config_deps, {self.CWD_sv_cfg: self.CFG})
+        config.load()
+
+        config.create('test', 'other')
+
+        assert venv_deps.creator.call_count == 1
+        venv_deps.runner.assert_called_with([ANY, '-m', 'pip', 'install', 'other'], env=ANY)
+
+    def test_create_many_failed(self, venv_deps: Mock, config_deps: Mock, config: VenvConfig) -> None:
+        venv_exists(venv_deps)
+        venv_deps.runner.return_value = 1
+        config_read(config_deps, {self.CWD_sv_cfg: self.CFG})
+        config.load()
+
+        config.create('test', also=['other'])
+
+        config_deps.echo.assert_any_call(StringContaining("test: ok"))
+        config_deps.echo.assert_any_call(StringContaining("other: FAILED"))
+        config_deps.echo.assert_called_with(StringContaining("Created 1 venvs, 1 failed"))
+        assert venv_deps.write_text.call_count == 1
+
+    def test_create_many_error(self, venv_deps: Mock, config_deps: Mock, config: VenvConfig) -> None:
+        venv_exists(venv_deps)
+        venv_deps.creator.side_effect = OSError("disk full")
+        config_read(config_deps, {self.CWD_sv_cfg: self.CFG})
+        config.load()
+
+        config.create('test', also=['other'])
+
+        config_deps.echo.assert_any_call("Error creating venv test: disk full")
+        config_deps.echo.assert_called_with(StringContaining("2 failed"))
+
+    def test_create_all(self, venv_deps: Mock, config_deps: Mock, config: VenvConfig) -> None:
+        venv_exists(venv_deps)
+        venv_deps.runner.return_value = 0
+        config_read(config_deps, {self.CWD_sv_cfg: self.CFG})
+        config.load()
+
+        config.create_all(jobs=1)
+
+        config_deps.echo.assert_any_call("Creating 2 venvs with 1 jobs")
+        config_deps.echo.assert_called_with(StringContaining("Created 2 venvs, 0 failed"))
+
+    def test_create_all_empty(self, config_deps: Mock, config: VenvConfig) -> None:
+        config.create_all()
+
+        config_deps.echo.assert_called_with("No venvs to create")
+
 
 class TestConfigDependencies(object):
     @pytest.fixture
@@ -363,3 +930,15 @@ class TestConfigDependencies(object):
     def test_venv_deps(self, config_deps):
         with pytest.raises(NotImplementedError):
             config_deps.venv_deps()
+
+    def test_config_cache(self, config_deps):
+        with pytest.raises(NotImplementedError):
+            config_deps.config_cache()
+
+    def test_dir_cache(self, config_deps):
+        with pytest.raises(NotImplementedError):
+            config_deps.dir_cache()
+
+    def test_script_index(self, config_deps):
+        with pytest.raises(NotImplementedError):
+            config_deps.script_index()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+""" sv server and client tests """
+
+import os
+import threading
+from pathlib2 import Path
+from unittest.mock import Mock
+
+import pytest
+
+from script_venv.daemon import SvServer, request, serve, socket_path
+from script_venv.venv import VEnv
+
+from .test_config import VenvConfigFixtures
+from .utils import config_read, venv_exists, venv_ready
+
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason="Unix sockets only")
+
+
+class TestSvServer(VenvConfigFixtures):
+    @pytest.fixture
+    def server(self, config_deps: Mock) -> SvServer:
+        config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\nSample.py = test\n\n[test]"})
+        return SvServer(config_deps)
+
+    def test_resolve_script(self, venv_deps: Mock, venv: VEnv, server: SvServer) -> None:
+        venv_ready(venv_deps, venv)
+
+        reply = server.resolve(['Sample.py', 'arg'], os.getcwd(), dict(os.environ, PATH='/client'))
+
+        assert reply['cmd'][1:] == ['Sample.py', 'arg']
+        assert reply['env']['PATH'].endswith('/client')
+        assert reply['env']['VIRTUAL_ENV'] == self.CWD_sv_test
+        assert 'zygote' not in reply
+
+    def test_resolve_zygote(self, venv_deps: Mock, venv: VEnv, config_deps: Mock) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\nSample.py = test\n\n[test]\nzygote = json"})
+        venv_ready(venv_deps, venv)
+
+        reply = SvServer(config_deps).resolve(['Sample.py'], os.getcwd(), dict(os.environ))
+
+        assert ['json'] == reply['zygote']
+
+    def test_resolve_remembered(self, venv_deps: Mock, venv: VEnv, config_deps: Mock, server: SvServer) -> None:
+        venv_ready(venv_deps, venv)
+        server.resolve(['Sample.py'], os.getcwd(), dict(os.environ))
+        config_deps.read.reset_mock()
+        venv_deps.read_text.reset_mock()
+
+        reply = server.resolve(['Sample.py', 'again'], os.getcwd(), dict(os.environ))
+
+        assert reply['cmd'][-1] == 'again'
+        config_deps.read.assert_not_called()
+        venv_deps.read_text.assert_any_call(venv.abs_path / '.sv_stamp')
+
+    def test_resolve_no_longer_ready(self, venv_deps: Mock, venv: VEnv, server: SvServer) -> None:
+        venv_ready(venv_deps, venv)
+        server.resolve(['Sample.py'], os.getcwd(), dict(os.environ))
+        venv_ready(venv_deps)
+
+        assert {} == server.resolve(['Sample.py'], os.getcwd(), dict(os.environ))
+
+    def test_resolve_venv_indexed(self, venv_deps: Mock, venv: VEnv, config_deps: Mock, server: SvServer) -> None:
+        config_deps.script_index.return_value = Mock(name='script_index')
+        config_deps.script_index.return_value.lookup.return_value = 'test'
+        cfg_exists = config_deps.exists.side_effect
+        config_deps.exists.side_effect = lambda p: p.name == 'test' or cfg_exists(p)
+        venv_ready(venv_deps, venv)
+
+        assert {} == server.resolve(['test', 'cmd'], os.getcwd(), dict(os.environ))
+
+    def test_resolve_missing_venv(self, venv_deps: Mock, venv: VEnv, server: SvServer) -> None:
+        venv_exists(venv_deps)
+
+        assert {} == server.resolve(['Sample.py'], os.getcwd(), dict(os.environ))
+
+    @pytest.mark.parametrize('argv', [[], [':list'], ['-V', 'Sample.py'], ['unknown']])
+    def test_resolve_fallback(self, server: SvServer, argv) -> None:
+        assert {} == server.resolve(argv, os.getcwd(), dict(os.environ))
+
+    def test_resolve_restores(self, venv_deps: Mock, venv: VEnv, server: SvServer, tmp_path) -> None:
+        old_cwd = os.getcwd()
+
+        server.resolve(['Sample.py'], str(tmp_path), dict(SV_TEST='client'))
+
+        assert old_cwd == os.getcwd()
+        assert 'SV_TEST' not in os.environ
+
+
+class TestSvClient(VenvConfigFixtures):
+    def test_request_no_server(self, tmp_path) -> None:
+        assert request(Path(str(tmp_path)) / 'missing.sock', ['test'], os.getcwd(), {}) is None
+
+    def test_request_served(self, venv_deps: Mock, venv: VEnv, config_deps: Mock, tmp_path) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\nSample.py = test\n\n[test]"})
+        venv_ready(venv_deps, venv)
+        sock_path = Path(str(tmp_path)) / 'sv.sock'
+        server = threading.Thread(target=serve, args=(config_deps, sock_path), kwargs=dict(idle_timeout=2))
+        server.start()
+        try:
+            for _ in range(100):
+                reply = request(sock_path, ['Sample.py', 'arg'], os.getcwd(), dict(os.environ))
+                if reply:
+                    break
+                threading.Event().wait(0.01)
+            fallback = request(sock_path, [':list'], os.getcwd(), dict(os.environ))
+        finally:
+            server.join()
+
+        assert reply is not None
+        assert reply['cmd'][1:] == ['Sample.py', 'arg']
+        assert fallback is None
+        assert not sock_path.exists()
+
+    def test_socket_path_env(self, monkeypatch) -> None:
+        monkeypatch.setenv('SV_SOCKET', '/tmp/test.sock')
+
+        assert Path('/tmp/test.sock') == socket_path()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+""" Script index tests """
+
+import os
+from pathlib2 import Path
+
+import pytest
+
+from script_venv.index import ScriptIndex, venv_scripts
+
+
+class TestScriptIndex(object):
+    @pytest.fixture
+    def index(self, tmp_path) -> ScriptIndex:
+        return ScriptIndex(Path(str(tmp_path)) / 'cache' / 'scripts.bin')
+
+    def test_index_missing(self, index: ScriptIndex) -> None:
+        assert index.lookup('tool') is None
+
+    def test_index_update(self, index: ScriptIndex) -> None:
+        index.update('alpha', ['tool', 'other'])
+
+        assert 'alpha' == index.lookup('tool')
+        assert 'alpha' == ScriptIndex(index.path).lookup('other')
+
+    def test_index_reindex(self, index: ScriptIndex) -> None:
+        index.update('alpha', ['tool', 'other'])
+        index.update('beta', ['tool'])
+        index.update('alpha', ['new'])
+
+        reloaded = ScriptIndex(index.path)
+        assert 'beta' == reloaded.lookup('tool')
+        assert reloaded.lookup('other') is None
+        assert 'alpha' == reloaded.lookup('new')
+
+    def test_index_scripts(self, index: ScriptIndex) -> None:
+        index.update('alpha', ['tool', 'other'])
+
+        assert ['other', 'tool'] == ScriptIndex(index.path).scripts('alpha')
+        assert [] == index.scripts('beta')
+
+    def test_index_concurrent(self, index: ScriptIndex) -> None:
+        other = ScriptIndex(index.path)
+        other.lookup('tool')
+        index.update('alpha', ['tool'])
+        other.update('beta', ['other'])
+
+        assert 'alpha' == ScriptIndex(index.path).lookup('tool')
+
+    def test_index_corrupt(self, index: ScriptIndex) -> None:
+        index.path.parent.mkdir(parents=True)
+        index.path.write_bytes(b'corrupt')
+
+        assert index.lookup('tool') is None
+
+
+class TestVenvScripts(object):
+    def test_venv_scripts(self, tmp_path) -> None:
+        bin_path = Path(str(tmp_path))
+        for name in ('tool', 'python', 'python3.7', 'pip3', 'activate', 'activate.fish', 'wheel', 'data.txt'):
+            (bin_path / name).write_text(u'')
+            if name != 'data.txt':
+                os.chmod(str(bin_path / name), 0o755)
+        (bin_path / 'sub').mkdir()
+
+        assert ['tool'] == venv_scripts(bin_path)
+
+    def test_venv_scripts_missing(self, tmp_path) -> None:
+        assert [] == venv_scripts(Path(str(tmp_path)) / 'missing')
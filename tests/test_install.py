@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+""" Install planning tests """
+
+from script_venv.install import InstallPlan
+
+
+class TestInstallPlan(object):
+    def test_plan_empty(self) -> None:
+        plan = InstallPlan()
+        plan.add()
+        plan.add(options=['-U'])
+
+        assert [] == plan.commands
+        assert 0 == plan.requested
+
+    def test_plan_merged(self) -> None:
+        plan = InstallPlan()
+        plan.add('beta', 'alpha')
+        plan.add('gamma', 'alpha')
+
+        assert [['beta', 'alpha', 'gamma']] == plan.commands
+        assert 1 == plan.saved
+
+    def test_plan_options(self) -> None:
+        plan = InstallPlan()
+        plan.add('pip', 'wheel', options=['-U'])
+        plan.add('alpha', options=['-U'])
+        plan.add('beta')
+
+        assert [['-U', 'pip', 'wheel', 'alpha'], ['beta']] == plan.commands
+        assert 1 == plan.saved
+
+    def test_plan_extra(self) -> None:
+        plan = InstallPlan()
+        plan.add('alpha', extra=['--index-url', 'url'])
+        plan.add('beta')
+
+        assert [['alpha', '--index-url', 'url'], ['beta']] == plan.commands
+
+    def test_plan_prerequisites(self) -> None:
+        plan = InstallPlan()
+        plan.add('first', prerequisite=True)
+        plan.add('second', prerequisite=True)
+        plan.add('alpha')
+        plan.add('beta')
+
+        assert [['first', 'second'], ['alpha', 'beta']] == plan.commands
+        assert 4 == plan.requested
+        assert 2 == plan.saved
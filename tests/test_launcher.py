@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+""" Launcher fast path tests """
+
+import subprocess
+import sys
+from unittest.mock import Mock, ANY, patch
+
+import pytest
+
+from script_venv import cli, launcher
+from script_venv.venv import VEnv
+
+from .test_config import VenvConfigFixtures
+from .utils import CliObjectRunner, config_read, venv_exists, venv_ready
+
+
+class TestLauncher(VenvConfigFixtures):
+    @pytest.fixture(autouse=True)
+    def no_daemon(self, monkeypatch, tmp_path):
+        monkeypatch.setenv('SV_SOCKET', str(tmp_path / 'missing.sock'))
+
+    @pytest.fixture
+    def full_main(self):
+        with patch.object(launcher, '_full_main', return_value=0) as full_main:
+            yield full_main
+
+    def test_launcher_no_click(self) -> None:
+        code = "import sys, script_venv.launcher; sys.exit('click' in sys.modules)"
+
+        assert 0 == subprocess.call([sys.executable, '-c', code])
+
+    def test_launcher_script(self, venv_deps: Mock, venv: VEnv, config_deps: Mock, full_main: Mock) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\nSample.py = test\n\n[test]"})
+        venv_ready(venv_deps, venv)
+        venv_deps.execer.return_value = 0
+
+        assert 0 == launcher.main(['Sample.py', '--version'], deps=config_deps)
+
+        full_main.assert_not_called()
+        venv_deps.execer.assert_called_once_with([ANY, 'Sample.py', '--version'], env=ANY)
+
+    def test_launcher_indexed(self, venv_deps: Mock, venv: VEnv, config_deps: Mock, full_main: Mock) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[test]"})
+        config_deps.script_index.return_value = Mock(name='script_index')
+        config_deps.script_index.return_value.lookup.return_value = 'test'
+        cfg_exists = config_deps.exists.side_effect
+        config_deps.exists.side_effect = lambda p: p.name == 'tool' or cfg_exists(p)
+        venv_ready(venv_deps, venv)
+        venv_deps.execer.return_value = 0
+
+        assert 0 == launcher.main(['tool', 'arg'], deps=config_deps)
+
+        full_main.assert_not_called()
+        venv_deps.execer.assert_called_once_with([ANY, 'tool', 'arg'], env=ANY)
+
+    def test_launcher_venv_indexed(self, venv_deps: Mock, venv: VEnv, config_deps: Mock) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[test]\n[other]\n"})
+        config_deps.script_index.return_value = Mock(name='script_index')
+        config_deps.script_index.return_value.lookup.return_value = 'other'
+        cfg_exists = config_deps.exists.side_effect
+        config_deps.exists.side_effect = lambda p: p.name == 'test' or cfg_exists(p)
+        venv_ready(venv_deps, venv, VEnv('other', venv_deps, '.'))
+        venv_deps.execer.return_value = 0
+
+        def full_main(args):
+            return CliObjectRunner(config_deps).invoke(cli.main, args).exit_code
+
+        with patch.object(launcher, '_full_main', side_effect=full_main):
+            assert 0 == launcher.main(['test', 'cmd', 'arg'], deps=config_deps)
+        fast = venv_deps.execer.call_args
+        venv_deps.execer.reset_mock()
+        assert 0 == full_main(['test', 'cmd', 'arg'])
+
+        assert fast == venv_deps.execer.call_args
+        assert [venv.command('cmd')[0], 'cmd', 'arg'] == fast[0][0]
+
+    @pytest.mark.parametrize('args', [[], ['--help'], [':list'], ['-V', 'Sample.py']])
+    def test_launcher_options(self, config_deps: Mock, full_main: Mock, args) -> None:
+        launcher.main(args, deps=config_deps)
+
+        full_main.assert_called_once_with(args)
+        config_deps.read.assert_not_called()
+
+    def test_launcher_venv(self, venv_deps: Mock, venv: VEnv, config_deps: Mock, full_main: Mock) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\nSample.py = test\n\n[test]"})
+        venv_ready(venv_deps, venv)
+
+        launcher.main(['test', '--version'], deps=config_deps)
+
+        full_main.assert_called_once_with(['test', '--version'])
+        venv_deps.execer.assert_not_called()
+
+    def test_launcher_missing_venv(self, venv_deps: Mock, venv: VEnv, config_deps: Mock, full_main: Mock) -> None:
+        config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\nSample.py = test\n\n[test]"})
+        venv_exists(venv_deps)
+
+        launcher.main(['Sample.py'], deps=config_deps)
+
+        full_main.assert_called_once_with(['Sample.py'])
+        venv_deps.creator.assert_not_called()
+
+    def test_launcher_daemon(self, venv_deps: Mock, venv: VEnv, config_deps: Mock, full_main: Mock, tmp_path) -> None:
+        (tmp_path / 'missing.sock').touch()
+        venv_deps.execer.return_value = 0
+        reply = dict(cmd=['/venv/bin/Sample.py', 'arg'], env=dict(VIRTUAL_ENV='/venv'))
+
+        with patch('script_venv.daemon.request', return_value=reply):
+            assert 0 == launcher.main(['Sample.py', 'arg'], deps=config_deps)
+
+        config_deps.read.assert_not_called()
+        venv_deps.execer.assert_called_once_with(reply['cmd'], env=reply['env'])
+
+    def test_launcher_daemon_zygote(self, venv_deps: Mock, venv: VEnv, config_deps: Mock, full_main: Mock,
+                                    tmp_path) -> None:
+        (tmp_path / 'missing.sock').touch()
+        venv_deps.forker.return_value = 0
+        reply = dict(cmd=['/venv/bin/Sample.py'], env=dict(VIRTUAL_ENV='/venv'), zygote=['json'])
+
+        with patch('script_venv.daemon.request', return_value=reply):
+            assert 0 == launcher.main(['Sample.py'], deps=config_deps)
+
+        venv_deps.forker.assert_called_once_with(reply['cmd'], env=reply['env'], modules=['json'])
+        venv_deps.execer.assert_not_called()
+
+    def test_launcher_daemon_fallback(self, venv_deps: Mock, venv: VEnv, config_deps: Mock,
+                                      full_main: Mock, tmp_path) -> None:
+        (tmp_path / 'missing.sock').touch()
+        config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\nSample.py = test\n\n[test]"})
+        venv_ready(venv_deps, venv)
+
+        with patch('script_venv.daemon.request', return_value=None):
+            launcher.main(['Sample.py'], deps=config_deps)
+
+        venv_deps.execer.assert_called_once_with([ANY, 'Sample.py'], env=ANY)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+""" Lock tests """
+
+from script_venv.lock import Lock, inputs_hash, interpreter_tag, report_pins
+
+
+class TestLock(object):
+    def test_render_parse(self) -> None:
+        lock = Lock('cpython-37-linux-x86_64', 'abc', ['alpha==1.0 --hash=sha256:00'])
+
+        text = lock.render('test', 'requirements')
+        parsed = Lock.parse(text)
+
+        assert text.startswith('# Locked by sv :lock for venv test (requirements)\n')
+        assert parsed is not None
+        assert ('cpython-37-linux-x86_64', 'abc', ['alpha==1.0 --hash=sha256:00']) == \
+            (parsed.interpreter, parsed.inputs, parsed.pins)
+
+    def test_parse_invalid(self) -> None:
+        assert Lock.parse('alpha==1.0\n') is None
+
+    def test_matches(self) -> None:
+        lock = Lock(interpreter_tag(), 'abc', [])
+
+        assert lock.matches('abc')
+        assert not lock.matches('def')
+        assert not Lock('other', 'abc', []).matches('abc')
+
+    def test_install_options(self) -> None:
+        assert ['--no-deps', '--require-hashes'] == Lock('i', 'h', ['alpha==1.0 --hash=sha256:00']).install_options
+        assert ['--no-deps'] == Lock('i', 'h', ['alpha==1.0', 'beta==2.0 --hash=sha256:00']).install_options
+        assert ['--no-deps'] == Lock('i', 'h', []).install_options
+
+    def test_inputs_hash(self) -> None:
+        assert inputs_hash(['a'], ['b', 'c']) == inputs_hash(['a'], ['c', 'b'])
+        assert inputs_hash(['a'], ['b']) != inputs_hash(['b'], ['a'])
+
+    def test_report_pins(self) -> None:
+        report = {'install': [
+            {'metadata': {'name': 'Beta_Pkg', 'version': '2.0'},
+             'download_info': {'url': 'https://x/beta.whl', 'archive_info': {'hashes': {'sha256': 'bb'}}}},
+            {'metadata': {'name': 'alpha', 'version': '1.0'},
+             'download_info': {'url': 'https://x/alpha.whl', 'archive_info': {'hash': 'sha256=aa'}}},
+            {'metadata': {'name': 'gamma', 'version': '0.1'},
+             'download_info': {'url': 'git+https://x/gamma', 'vcs_info': {'vcs': 'git'}}},
+            {'metadata': {'name': 'delta', 'version': '3'},
+             'download_info': {'url': 'https://x/delta.tar.gz', 'archive_info': {}}},
+        ]}
+
+        assert ['alpha==1.0 --hash=sha256:aa', 'beta-pkg==2.0 --hash=sha256:bb', 'delta==3',
+                'gamma @ git+https://x/gamma'] == report_pins(report)
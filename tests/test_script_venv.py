@@ -17,7 +17,7 @@ class TestCliScripts(VenvConfigFixtures):
         CliObjectRunner(config_deps).invoke(cli.main, ['Sample.py', '--version'])
 
         assert not venv_deps.creator.called
-        venv_deps.runner.assert_called_once_with([ANY, 'Sample.py', '--version'], env=ANY)
+        venv_deps.execer.assert_called_once_with([ANY, 'Sample.py', '--version'], env=ANY)
 
     def test_cli_script_missing(self, venv_deps: Mock, config_deps: Mock):
         config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\nSample.py = test\n\n[test]"})
@@ -26,7 +26,7 @@ class TestCliScripts(VenvConfigFixtures):
         CliObjectRunner(config_deps).invoke(cli.main, ['Sample.py', '--version'])
 
         assert venv_deps.creator.called
-        venv_deps.runner.assert_any_call([ANY, 'Sample.py', '--version'], env=ANY)
+        venv_deps.execer.assert_called_once_with([ANY, 'Sample.py', '--version'], env=ANY)
 
     def test_cli_venv_exists(self, venv_deps: Mock, config_deps: Mock):
         config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\nSample.py = test\n\n[test]"})
@@ -35,7 +35,7 @@ class TestCliScripts(VenvConfigFixtures):
         CliObjectRunner(config_deps).invoke(cli.main, ['test', '--version'])
 
         assert not venv_deps.creator.called
-        venv_deps.runner.assert_called_once_with([StringContaining('test'), '--version'], env=ANY)
+        venv_deps.execer.assert_called_once_with([StringContaining('test'), '--version'], env=ANY)
 
     def test_cli_venv_missing(self, venv_deps: Mock, config_deps: Mock):
         config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\nSample.py = test\n\n[test]"})
@@ -44,4 +44,16 @@ class TestCliScripts(VenvConfigFixtures):
         CliObjectRunner(config_deps).invoke(cli.main, ['test', '--version'])
 
         assert venv_deps.creator.called
-        venv_deps.runner.assert_any_call([StringContaining('test'), '--version'], env=ANY)
+        venv_deps.execer.assert_called_once_with([StringContaining('test'), '--version'], env=ANY)
+
+    def test_cli_script_stale(self, venv_deps: Mock, config_deps: Mock):
+        config_read(config_deps, {self.CWD_sv_cfg: "[SCRIPTS]\nSample.py = test\n\n[test]\nrequirements = alpha"})
+        venv_exists(venv_deps, self.CWD_sv_test)
+        venv_deps.runner.return_value = 0
+
+        CliObjectRunner(config_deps).invoke(cli.main, ['Sample.py'])
+
+        assert not venv_deps.creator.called
+        venv_deps.runner.assert_called_once_with([ANY, '-m', 'pip', 'install', 'alpha'], env=ANY)
+        venv_deps.write_text.assert_called_once_with(ANY, ANY)
+        venv_deps.execer.assert_called_once_with([ANY, 'Sample.py'], env=ANY)
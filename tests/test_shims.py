@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+""" Shim generation tests """
+
+import os
+import subprocess
+import sys
+from pathlib2 import Path
+from unittest.mock import Mock
+
+import pytest
+
+from script_venv.shims import Shims, shim_script
+from script_venv.venv import VEnv, _bin
+
+from .test_venv import VEnvFixtures
+from .utils import venv_exists
+
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason="Shims are POSIX shell scripts")
+
+
+class TestShimScript(VEnvFixtures):
+    def test_shim_venv(self, venv: VEnv) -> None:
+        shim = shim_script(venv, 'sample', '/src')
+
+        assert shim.startswith('#!/bin/sh\n# Generated by sv :shims from /src\n')
+        assert 'VIRTUAL_ENV=%s' % venv.abs_path in shim
+        assert 'exec %s "$@"' % (venv.abs_path / 'bin' / 'sample') in shim
+        assert 'exec sv -S /src sample "$@"' in shim
+
+    def test_shim_base(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv.base = VEnv('base', venv_deps, '.')
+        tool = str(venv.base.abs_path / _bin / 'tool')
+        venv_exists(venv_deps, tool)
+
+        shim = shim_script(venv, 'tool', '/src')
+
+        python = venv.abs_path / _bin / os.path.basename(sys.executable)
+        assert 'if [ -f %s ]; then' % tool in shim
+        assert 'exec %s %s "$@"' % (python, tool) in shim
+
+    @staticmethod
+    def executable(file: Path, text: str) -> None:
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text(text)
+        file.chmod(0o755)
+
+    def test_shim_runs(self, venv_deps: Mock, tmp_path) -> None:
+        venv = VEnv('test', venv_deps, str(tmp_path))
+        self.executable(venv.abs_path / _bin / 'sample', u'#!/bin/sh\necho "$VIRTUAL_ENV" "$@"\n')
+        venv_exists(venv_deps, str(venv.abs_path / _bin / 'sample'))
+        shim = Path(str(tmp_path)) / 'shim'
+        shim.write_text(shim_script(venv, 'sample', '/src'))
+
+        output = subprocess.check_output(['/bin/sh', str(shim), 'arg'])
+
+        assert output.decode().split() == [str(venv.abs_path), 'arg']
+
+    def test_shim_runs_python(self, venv_deps: Mock, tmp_path) -> None:
+        venv = VEnv('test', venv_deps, str(tmp_path))
+        self.executable(venv.abs_path / _bin / os.path.basename(sys.executable), u'#!/bin/sh\necho python "$@"\n')
+        shim = Path(str(tmp_path)) / 'shim'
+        shim.write_text(shim_script(venv, 'tool.py', '/src'))
+
+        output = subprocess.check_output(['/bin/sh', str(shim), 'arg'])
+
+        assert output.decode().split() == ['python', 'tool.py', 'arg']
+
+    def test_shim_runs_installed_later(self, venv_deps: Mock, tmp_path) -> None:
+        venv = VEnv('test', venv_deps, str(tmp_path))
+        self.executable(venv.abs_path / _bin / os.path.basename(sys.executable), u'#!/bin/sh\necho python "$@"\n')
+        shim = Path(str(tmp_path)) / 'shim'
+        shim.write_text(shim_script(venv, 'tool', '/src'))
+        self.executable(venv.abs_path / _bin / 'tool', u'#!/bin/sh\necho tool "$@"\n')
+
+        output = subprocess.check_output(['/bin/sh', str(shim), 'arg'])
+
+        assert output.decode().split() == ['tool', 'arg']
+
+
+class TestShims(object):
+    @pytest.fixture
+    def bin_dir(self, tmp_path) -> Path:
+        return Path(str(tmp_path)) / 'bin'
+
+    @pytest.fixture
+    def shims(self, bin_dir: Path) -> Shims:
+        return Shims(bin_dir, '/src')
+
+    @staticmethod
+    def shim(text: str, source: str = '/src') -> str:
+        return '#!/bin/sh\n# Generated by sv :shims from %s\n%s\n' % (source, text)
+
+    def test_shims_written(self, shims: Shims, bin_dir: Path) -> None:
+        result = shims.update({'one': self.shim('one')})
+
+        assert (['one'], [], [], []) == result
+        assert os.access(str(bin_dir / 'one'), os.X_OK)
+
+    def test_shims_unchanged(self, shims: Shims) -> None:
+        shims.update({'one': self.shim('one'), 'two': self.shim('two')})
+
+        result = shims.update({'one': self.shim('one'), 'two': self.shim('changed')})
+
+        assert (['two'], ['one'], [], []) == result
+
+    def test_shims_removed(self, shims: Shims, bin_dir: Path) -> None:
+        shims.update({'one': self.shim('one'), 'two': self.shim('two')})
+
+        result = shims.update({'one': self.shim('one')})
+
+        assert ([], ['one'], ['two'], []) == result
+        assert not (bin_dir / 'two').exists()
+
+    def test_shims_other_source(self, shims: Shims, bin_dir: Path) -> None:
+        Shims(bin_dir, '/other').update({'other': self.shim('other', '/other')})
+
+        result = shims.update({'one': self.shim('one')})
+
+        assert (['one'], [], [], []) == result
+        assert (bin_dir / 'other').exists()
+
+    def test_shims_skipped(self, shims: Shims, bin_dir: Path) -> None:
+        bin_dir.mkdir()
+        (bin_dir / 'one').write_text(u'#!/bin/sh\necho mine\n')
+
+        result = shims.update({'one': self.shim('one')})
+
+        assert ([], [], [], ['one']) == result
+        assert 'mine' in (bin_dir / 'one').read_text()
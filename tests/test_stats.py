@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+""" Usage statistics tests """
+
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib2 import Path
+
+import pytest
+
+from script_venv import stats
+
+
+@pytest.fixture(autouse=True)
+def record():
+    stats._record.clear()
+    yield stats._record
+    stats._record.clear()
+
+
+class TestStatsPath(object):
+    def test_stats_off(self, monkeypatch) -> None:
+        monkeypatch.delenv('SV_STATS', raising=False)
+
+        assert stats.stats_path() is None
+
+    def test_stats_default(self, monkeypatch) -> None:
+        monkeypatch.setenv('SV_STATS', '1')
+        monkeypatch.setenv('SV_CACHE_DIR', '/tmp/sv_cache')
+
+        assert Path('/tmp/sv_cache/stats.jsonl') == stats.stats_path()
+
+    def test_stats_file(self, monkeypatch) -> None:
+        monkeypatch.setenv('SV_STATS', '/tmp/sv_stats.jsonl')
+
+        assert Path('/tmp/sv_stats.jsonl') == stats.stats_path()
+
+
+class TestStatsRecords(object):
+    def test_write_read(self, tmp_path) -> None:
+        path = Path(str(tmp_path)) / 'stats' / 'stats.jsonl'
+        stats.note(script='tool', venv='test')
+        stats.write(path)
+        with path.open('a') as out_stats:
+            out_stats.write('corrupt\n')
+        stats.note(exit=1)
+        stats.write(path)
+
+        records = stats.read(path)
+        assert 2 == len(records)
+        assert {'tool'} == {r['script'] for r in records}
+        assert 1 == records[1]['exit']
+        assert 'ts' in records[0]
+
+    def test_add_time(self) -> None:
+        stats.add_time('install_ms', 0.0)
+        stats.add_time('install_ms', 0.0)
+
+        assert stats._record['install_ms'] > 0
+
+    @pytest.mark.skipif(os.name == 'nt', reason="No fork on Windows")
+    def test_spawn(self, tmp_path) -> None:
+        path = Path(str(tmp_path)) / 'stats.jsonl'
+        stats.note(script='tool')
+
+        assert 3 == stats.spawn([sys.executable, '-c', 'import sys; sys.exit(3)'], dict(os.environ), path)
+
+        record, = stats.read(path)
+        assert 'tool' == record['script']
+        assert 3 == record['exit']
+        assert record['wall_ms'] > 0
+        assert record['max_rss_kb'] > 0
+        assert {'sv_ms', 'cpu_ms'} <= set(record)
+
+    @pytest.mark.skipif(os.name == 'nt', reason="No fork on Windows")
+    def test_spawn_forwards_signals(self, tmp_path) -> None:
+        path = Path(str(tmp_path)) / 'stats.jsonl'
+        ready = tmp_path / 'ready'
+        code = ("import signal, sys, time\n"
+                "signal.signal(signal.SIGTERM, lambda s, _: sys.exit(7))\n"
+                "open(sys.argv[1], 'w').close()\n"
+                "time.sleep(30)\n")
+
+        def terminate() -> None:
+            while not ready.exists():
+                time.sleep(0.01)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        killer = threading.Thread(target=terminate, daemon=True)
+        killer.start()
+        assert 7 == stats.spawn([sys.executable, '-c', code, str(ready)], dict(os.environ), path)
+        killer.join()
+
+    def test_overhead(self) -> None:
+        age = stats._process_age()
+
+        if sys.platform.startswith('linux'):
+            assert age is not None and age > 0
+        assert stats.overhead() >= time.perf_counter() - stats._imported
+
+    def test_handed_off(self, tmp_path) -> None:
+        path = Path(str(tmp_path)) / 'stats.jsonl'
+
+        assert 3 == stats.handed_off(lambda: 3, path)
+        assert stats.handed_off(lambda: None, path) is None
+
+        record, = stats.read(path)
+        assert 3 == record['exit']
+        assert {'sv_ms', 'wall_ms'} <= set(record)
+
+    def test_percentile(self) -> None:
+        values = [float(v) for v in range(1, 101)]
+
+        assert 50.0 == stats.percentile(values, 50)
+        assert 99.0 == stats.percentile(values, 99)
+        assert 1.0 == stats.percentile([1.0], 99)
+        assert 0.0 == stats.percentile([], 50)
+
+
+class TestStatsSummary(object):
+    @pytest.fixture
+    def summary(self) -> stats.Summary:
+        return stats.Summary([
+            dict(script='tool', venv='a', cache='hit', sv_ms=2.0, wall_ms=100.0),
+            dict(script='tool', venv='a', cache='hit', sv_ms=4.0, wall_ms=300.0, install_ms=5000.0),
+            dict(script='other', venv='b', cache='miss', sv_ms=30.0, wall_ms=50.0, install_ms=9000.0),
+        ])
+
+    def test_summary_lines(self, summary: stats.Summary) -> None:
+        lines = list(summary.lines(top=1))
+
+        assert "3 runs of 2 scripts, config cache 2 hits and 1 misses" == lines[0]
+        assert "sv overhead: p50 4.0ms, p90 30.0ms, p99 30.0ms" == lines[1]
+        assert ["Hottest scripts:", "\ttool: 2 runs, 0.4s"] == lines[2:4]
+        assert ["Slowest venvs to set up:", "\tb: 9.0s (1 setups)"] == lines[4:]
+
+    def test_summary_prometheus(self, summary: stats.Summary, tmp_path) -> None:
+        text = summary.prometheus()
+
+        assert 'sv_script_runs_total{script="tool"} 2\n' in text
+        assert 'sv_venv_install_seconds_max{venv="b"} 9.000\n' in text
+        assert 'sv_overhead_seconds{quantile="0.5"} 0.004000\n' in text
+        assert 'sv_overhead_seconds_sum 0.036000\n' in text
+        assert 'sv_overhead_seconds_count 3\n' in text
+        assert 'sv_config_cache_total{result="miss"} 1\n' in text
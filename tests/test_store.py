@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+""" Store tests """
+
+import os
+from pathlib2 import Path
+from unittest.mock import patch
+
+import pytest
+
+from script_venv.store import Store, format_size, store_path
+
+
+class TestStore(object):
+    @pytest.fixture
+    def store(self, tmp_path) -> Store:
+        return Store(Path(str(tmp_path)) / 'store')
+
+    @staticmethod
+    def venv(root: Path, name: str, content: str = 'shared content\n') -> Path:
+        venv_path = root / name
+        (venv_path / 'lib').mkdir(parents=True)
+        (venv_path / 'lib' / 'shared.py').write_text(content)
+        (venv_path / 'lib' / 'own.py').write_text('own %s\n' % name)
+        (venv_path / 'lib' / 'empty.py').write_text('')
+        os.symlink('lib', str(venv_path / 'lib64'))
+        return venv_path
+
+    def test_dedupe(self, store: Store, tmp_path) -> None:
+        alpha = self.venv(Path(str(tmp_path)), 'alpha')
+        beta = self.venv(Path(str(tmp_path)), 'beta')
+
+        first = store.dedupe(alpha)
+        second = store.dedupe(beta)
+
+        assert (2, 2, 0) == (first.files, first.linked, first.saved)
+        assert (2, 2, len('shared content\n')) == (second.files, second.linked, second.saved)
+        assert os.path.samefile(str(alpha / 'lib' / 'shared.py'), str(beta / 'lib' / 'shared.py'))
+        assert not os.path.samefile(str(alpha / 'lib' / 'own.py'), str(beta / 'lib' / 'own.py'))
+        assert (3, len('shared content\n')) == store.usage()
+
+    def test_dedupe_again(self, store: Store, tmp_path) -> None:
+        alpha = self.venv(Path(str(tmp_path)), 'alpha')
+        store.dedupe(alpha)
+
+        again = store.dedupe(alpha)
+
+        assert (2, 0, 0) == (again.files, again.linked, again.saved)
+
+    def test_dedupe_race(self, store: Store, tmp_path) -> None:
+        alpha = self.venv(Path(str(tmp_path)), 'alpha')
+        beta = self.venv(Path(str(tmp_path)), 'beta')
+        store.dedupe(alpha)
+        lstat = os.lstat
+        missed = set()
+
+        def added_meanwhile(path, *args, **kwargs):
+            # Beta doesn't see the store entries alpha added, until it links them
+            if path.startswith(str(store.path)) and path not in missed:
+                missed.add(path)
+                raise FileNotFoundError(path)
+            return lstat(path, *args, **kwargs)
+
+        with patch('script_venv.store.os.lstat', side_effect=added_meanwhile):
+            second = store.dedupe(beta)
+
+        assert (2, 2, len('shared content\n')) == (second.files, second.linked, second.saved)
+        assert os.path.samefile(str(alpha / 'lib' / 'shared.py'), str(beta / 'lib' / 'shared.py'))
+
+    def test_dedupe_mode(self, store: Store, tmp_path) -> None:
+        alpha = self.venv(Path(str(tmp_path)), 'alpha')
+        beta = self.venv(Path(str(tmp_path)), 'beta')
+        (beta / 'lib' / 'shared.py').chmod(0o755)
+
+        store.dedupe(alpha)
+        store.dedupe(beta)
+
+        assert not os.path.samefile(str(alpha / 'lib' / 'shared.py'), str(beta / 'lib' / 'shared.py'))
+        assert os.access(str(beta / 'lib' / 'shared.py'), os.X_OK)
+
+    def test_prune(self, store: Store, tmp_path) -> None:
+        alpha = self.venv(Path(str(tmp_path)), 'alpha')
+        store.dedupe(alpha)
+        (alpha / 'lib' / 'own.py').unlink()
+
+        assert 1 == store.prune()
+        assert (1, 0) == store.usage()
+
+    def test_format_size(self) -> None:
+        assert '12 bytes' == format_size(12)
+        assert '1.5 KiB' == format_size(1536)
+        assert '2.0 GiB' == format_size(2 << 30)
+
+    def test_store_path_env(self, monkeypatch) -> None:
+        monkeypatch.setenv('SV_STORE', '/tmp/store')
+
+        assert Path('/tmp/store') == store_path()
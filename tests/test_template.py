@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+""" Template clone tests """
+
+import os
+from pathlib2 import Path
+
+import pytest
+
+from script_venv.template import clone, clone_tree
+
+
+class TestTemplate(object):
+    @pytest.fixture
+    def template(self, tmp_path) -> Path:
+        template = Path(str(tmp_path)) / 'template'
+        (template / 'bin').mkdir(parents=True)
+        (template / 'lib' / 'site').mkdir(parents=True)
+        (template / 'pyvenv.cfg').write_text('home = /usr/bin\ncommand = /usr/bin/python -m venv %s\n' % template)
+        (template / 'bin' / 'pip').write_text('#!%s/bin/python\nimport pip\n' % template)
+        (template / 'bin' / 'pip').chmod(0o755)
+        (template / 'bin' / 'activate').write_text('VIRTUAL_ENV="%s"\n' % template)
+        (template / 'bin' / 'data.bin').write_bytes(b'\x00%s' % str(template).encode())
+        os.symlink('/usr/bin/python3', str(template / 'bin' / 'python'))
+        os.symlink('lib', str(template / 'lib64'))
+        (template / 'lib' / 'site' / 'module.py').write_text('x = 1\n')
+        (template / '.sv_stamp').write_text('key')
+        return template
+
+    def test_clone(self, template: Path, tmp_path) -> None:
+        venv = Path(str(tmp_path)) / 'venv'
+
+        clone(template, venv, 'bin', ignore={'.sv_stamp'})
+
+        assert 'command = /usr/bin/python -m venv %s\n' % venv in (venv / 'pyvenv.cfg').read_text()
+        assert (venv / 'bin' / 'pip').read_text().startswith('#!%s/bin/python\n' % venv)
+        assert os.access(str(venv / 'bin' / 'pip'), os.X_OK)
+        assert 'VIRTUAL_ENV="%s"\n' % venv == (venv / 'bin' / 'activate').read_text()
+        assert str(template).encode() in (venv / 'bin' / 'data.bin').read_bytes()
+        assert '/usr/bin/python3' == os.readlink(str(venv / 'bin' / 'python'))
+        assert 'lib' == os.readlink(str(venv / 'lib64'))
+        assert 'x = 1\n' == (venv / 'lib' / 'site' / 'module.py').read_text()
+        assert not (venv / '.sv_stamp').exists()
+        assert (template / 'bin' / 'pip').read_text().startswith('#!%s/bin/python\n' % template)
+
+    def test_clone_replaces(self, template: Path, tmp_path) -> None:
+        venv = Path(str(tmp_path)) / 'venv'
+        (venv / 'old').mkdir(parents=True)
+
+        clone(template, venv, 'bin')
+
+        assert not (venv / 'old').exists()
+        assert (venv / '.sv_stamp').exists()
+
+    def test_clone_tree_shares_content(self, template: Path, tmp_path) -> None:
+        venv = Path(str(tmp_path)) / 'venv'
+
+        clone_tree(template, venv)
+        (venv / 'lib' / 'site' / 'module.py').unlink()
+
+        assert (template / 'lib' / 'site' / 'module.py').exists()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+""" Invocation tracing tests """
+
+import json
+import os
+
+import pytest
+
+from script_venv import trace
+
+
+class TestTrace(object):
+    @pytest.fixture
+    def trace_file(self, tmp_path):
+        yield str(tmp_path / 'trace.json')
+        trace.stop()
+
+    def test_trace_off(self, trace_file: str) -> None:
+        with trace.span('config.load'):
+            trace.mark('venv.exec')
+        trace.flush()
+
+        assert not os.path.exists(trace_file)
+
+    def test_trace_spans(self, trace_file: str) -> None:
+        trace.start(trace_file)
+
+        with trace.span('config.load', script='tool'):
+            with trace.span('config.load_file', path='.'):
+                pass
+        trace.mark('venv.exec', cmd='tool')
+        trace.flush()
+
+        with open(trace_file) as in_trace:
+            events = json.load(in_trace)['traceEvents']
+        assert ['config.load_file', 'config.load', 'venv.exec'] == [e['name'] for e in events]
+        load_file, load, exec_mark = events
+        assert 'X' == load['ph'] and {'script': 'tool'} == load['args']
+        assert load['ts'] <= load_file['ts'] and load_file['dur'] <= load['dur']
+        assert 'i' == exec_mark['ph']
+        assert os.getpid() == load['pid']
+
+    def test_trace_error(self, trace_file: str) -> None:
+        trace.start(trace_file)
+
+        with pytest.raises(ValueError):
+            with trace.span('venv.pip_install'):
+                raise ValueError()
+
+        assert ['venv.pip_install'] == [e['name'] for e in trace._tracer.events]
+
+    def test_trace_profile(self, trace_file: str) -> None:
+        trace.start(trace_file, profile=True)
+        trace.flush()
+
+        assert os.path.exists(trace_file + '.prof')
+
+    def test_trace_env(self, trace_file: str, monkeypatch) -> None:
+        monkeypatch.setenv('SV_TRACE', trace_file)
+        monkeypatch.delenv('SV_TRACE_PROFILE', raising=False)
+
+        trace.start_from_env()
+
+        assert trace._tracer is not None
+        assert trace._tracer._profiler is None
@@ -2,6 +2,10 @@
 
 """ Venv tests """
 
+import json
+import os
+import subprocess
+import sys
 from os import path
 from pathlib import Path
 from random import randrange
@@ -10,9 +14,12 @@ from unittest.mock import Mock, ANY, MagicMock
 
 import pytest
 
+from script_venv.install import InstallPlan
+from script_venv.lock import Lock, inputs_hash, interpreter_tag
 from script_venv.venv import VEnv, VEnvDependencies, _exe, _bin
+from script_venv.wheelhouse import Wheelhouse
 
-from .utils import venv_exists, StringContaining
+from .utils import venv_exists, venv_ready, StringContaining
 
 
 class VEnvFixtures(object):
@@ -22,6 +29,9 @@ class VEnvFixtures(object):
     def venv_deps(self) -> Mock:
         venv_mock = MagicMock(spec=VEnvDependencies, name="venv_deps")
         venv_exists(venv_mock, self.CWD_sv_test)
+        venv_mock.read_text.return_value = None
+        venv_mock.wheelhouse.return_value = None
+        venv_mock.template_dir.return_value = None
         return venv_mock
 
     @pytest.fixture
@@ -66,11 +76,95 @@ class TestVEnv(VEnvFixtures):
         assert expected_ret_code == return_code
         venv_deps.runner.assert_called_once_with([ANY, 'test', 'arg1', 'arg2'], env=dict(PATH=ANY, VIRTUAL_ENV=ANY))
 
+    def test_venv_exec_cmd(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv_exists(venv_deps, self.CWD_sv_test, path.join(self.CWD_sv_test, _bin, 'test' + _exe))
+        expected_ret_code = randrange(1, 200)
+        venv_deps.execer.return_value = expected_ret_code
+
+        return_code = venv.exec('test', 'arg1', 'arg2')
+
+        assert expected_ret_code == return_code
+        venv_deps.runner.assert_not_called()
+        venv_deps.execer.assert_called_once_with([ANY, 'arg1', 'arg2'], env=dict(PATH=ANY, VIRTUAL_ENV=ANY))
+
+    def test_venv_exec_python(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv_deps.exists.return_value = False
+
+        venv.exec('test', 'arg1')
+
+        venv_deps.execer.assert_called_once_with([ANY, 'test', 'arg1'], env=dict(PATH=ANY, VIRTUAL_ENV=ANY))
+
+    def test_venv_exec_zygote(self, venv_deps: Mock) -> None:
+        venv = VEnv('test', venv_deps, '.', zygote=['json'])
+        venv_deps.exists.return_value = False
+        venv_deps.forker.return_value = 3
+
+        assert 3 == venv.exec('test', 'arg1')
+
+        venv_deps.forker.assert_called_once_with([ANY, 'test', 'arg1'], env=dict(PATH=ANY, VIRTUAL_ENV=ANY),
+                                                 modules=['json'])
+        venv_deps.execer.assert_not_called()
+
+    def test_venv_exec_zygote_fallback(self, venv_deps: Mock) -> None:
+        venv = VEnv('test', venv_deps, '.', zygote=[])
+        venv_deps.exists.return_value = False
+        venv_deps.forker.return_value = None
+
+        venv.exec('test')
+
+        venv_deps.forker.assert_called_once_with([ANY, 'test'], env=ANY, modules=[])
+        venv_deps.execer.assert_called_once_with([ANY, 'test'], env=ANY)
+
+    def test_venv_exec_no_zygote(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv.exec('test')
+
+        venv_deps.forker.assert_not_called()
+
     def test_venv_install(self, venv_deps: Mock, venv: VEnv) -> None:
         venv.install('package1', 'package2')
 
         venv_deps.runner.assert_called_once_with([ANY, '-m', 'pip', 'install', 'package1', 'package2'], env=ANY)
 
+    def test_venv_install_wheelhouse(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv_deps.wheelhouse.return_value = Wheelhouse(Path('/wheels'), ['package1'])
+
+        venv.install('-U', 'package1')
+
+        venv_deps.runner.assert_called_once_with(
+            [ANY, '-m', 'pip', 'install', '--no-index', '--find-links', '/wheels', '-U', 'package1'], env=ANY)
+
+    def test_venv_install_wheelhouse_online(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv_deps.wheelhouse.return_value = Wheelhouse(Path('/wheels'), ['package1'])
+
+        venv.install('package1', 'package2')
+
+        venv_deps.runner.assert_called_once_with(
+            [ANY, '-m', 'pip', 'install', '--find-links', '/wheels', 'package1', 'package2'], env=ANY)
+
+    def test_venv_install_unpacked(self, venv_deps: Mock, venv: VEnv) -> None:
+        wheelhouse = MagicMock(spec=Wheelhouse)
+        wheelhouse.pinned_wheels.return_value = {Path('/wheels/package1-1.0-py3-none-any.whl'): ['ab']}
+        venv_deps.wheelhouse.return_value = wheelhouse
+        venv_deps.unpacker.return_value = 0
+
+        assert 0 == venv.install('--no-deps', '--require-hashes', '-r', '/lock.txt')
+
+        wheelhouse.pinned_wheels.assert_called_once_with(('--no-deps', '--require-hashes', '-r', '/lock.txt'))
+        venv_deps.unpacker.assert_called_once_with({Path('/wheels/package1-1.0-py3-none-any.whl'): ['ab']},
+                                                   venv.abs_path)
+        venv_deps.runner.assert_not_called()
+
+    def test_venv_install_unpack_failed(self, venv_deps: Mock, venv: VEnv) -> None:
+        wheelhouse = MagicMock(spec=Wheelhouse)
+        wheelhouse.pinned_wheels.return_value = {Path('/wheels/package1-1.0-py3-none-any.whl'): []}
+        wheelhouse.install_options.return_value = []
+        venv_deps.wheelhouse.return_value = wheelhouse
+        venv_deps.unpacker.return_value = 1
+
+        venv.install('package1==1.0')
+
+        venv_deps.runner.assert_called_once_with([ANY, '-m', 'pip', 'install', 'package1==1.0'], env=ANY)
+
 
 class TestVEnvCreate(VEnvFixtures):
     def test_venv_create(self, venv_deps: Mock, venv: VEnv) -> None:
@@ -114,11 +208,392 @@ class TestVEnvCreate(VEnvFixtures):
         venv_deps.runner.assert_called_once_with([ANY, '-m', 'pip', 'install', 'alpha'], env=ANY)
 
 
+class TestVEnvPlan(VEnvFixtures):
+    def test_venv_create_plan(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv_exists(venv_deps)
+        venv.prerequisites = {'alpha'}
+        plan = InstallPlan()
+
+        assert venv.create(plan=plan)
+
+        venv_deps.runner.assert_not_called()
+        assert [['alpha']] == plan.commands
+
+    def test_venv_install_plan(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv_deps.runner.return_value = 0
+        plan = InstallPlan()
+        plan.add('pip', 'wheel', options=['-U'])
+        plan.add('alpha', options=['-U'])
+
+        assert 0 == venv.install_plan(plan)
+
+        venv_deps.runner.assert_called_once_with([ANY, '-m', 'pip', 'install', '-U', 'pip', 'wheel', 'alpha'], env=ANY)
+        venv_deps.echo.assert_called_once_with(StringContaining("saving 1"))
+
+    def test_venv_install_plan_post_install(self, venv_deps: Mock, venv: VEnv) -> None:
+        plan = InstallPlan()
+        venv_deps.runner.return_value = 0
+
+        venv.install_plan(plan)
+        venv_deps.post_install.assert_not_called()
+
+        plan.add('alpha')
+        venv.install_plan(plan)
+        venv_deps.post_install.assert_called_once_with(venv.abs_path)
+        venv_deps.index_scripts.assert_called_once_with('test', venv.abs_path)
+
+    def test_venv_install_plan_failed(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv_deps.runner.return_value = 2
+        plan = InstallPlan()
+        plan.add('alpha', prerequisite=True)
+        plan.add('beta')
+
+        assert 2 == venv.install_plan(plan)
+
+        venv_deps.runner.assert_called_once_with([ANY, '-m', 'pip', 'install', 'alpha'], env=ANY)
+        venv_deps.post_install.assert_not_called()
+        venv_deps.index_scripts.assert_not_called()
+
+
+class TestVEnvReady(VEnvFixtures):
+    def test_venv_fingerprint(self, venv: VEnv) -> None:
+        before = venv.fingerprint()
+        venv.requirements = {'alpha'}
+
+        assert before != venv.fingerprint()
+
+    def test_venv_ready_no_hashlib(self) -> None:
+        code = ("import sys; from unittest.mock import MagicMock; from script_venv.venv import VEnv; "
+                "VEnv('test', MagicMock(), '.').is_ready(); sys.exit('hashlib' in sys.modules)")
+
+        assert 0 == subprocess.call([sys.executable, '-c', code])
+
+    def test_venv_not_ready(self, venv: VEnv) -> None:
+        assert not venv.is_ready()
+
+    def test_venv_ready(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv_ready(venv_deps, venv)
+
+        assert venv.is_ready()
+
+    def test_venv_mark_ready(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv.mark_ready()
+
+        venv_deps.write_text.assert_called_once_with(venv.abs_path / '.sv_stamp', venv.fingerprint())
+
+    def test_venv_ensure_ready(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv_ready(venv_deps, venv)
+
+        assert venv.ensure() is None
+
+        venv_deps.creator.assert_not_called()
+        venv_deps.runner.assert_not_called()
+        venv_deps.write_text.assert_not_called()
+
+    def test_venv_ensure_missing(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv_exists(venv_deps)
+        venv.requirements = {'beta'}
+        venv_deps.runner.return_value = 0
+
+        assert 0 == venv.ensure()
+
+        venv_deps.creator.assert_called_once_with(ANY, clear=False)
+        venv_deps.runner.assert_called_once_with([ANY, '-m', 'pip', 'install', 'beta'], env=ANY)
+        venv_deps.write_text.assert_called_once_with(ANY, venv.fingerprint())
+
+    def test_venv_ensure_changed(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv_ready(venv_deps, venv)
+        venv.prerequisites = {'alpha'}
+        venv.requirements = {'beta'}
+        venv_deps.runner.return_value = 0
+
+        assert 0 == venv.ensure()
+
+        venv_deps.creator.assert_not_called()
+        assert venv_deps.runner.call_count == 2
+        venv_deps.runner.assert_any_call([ANY, '-m', 'pip', 'install', 'alpha'], env=ANY)
+        venv_deps.runner.assert_called_with([ANY, '-m', 'pip', 'install', 'beta'], env=ANY)
+        venv_deps.write_text.assert_called_once_with(ANY, venv.fingerprint())
+
+    def test_venv_ensure_failed(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv.requirements = {'beta'}
+        venv_deps.runner.return_value = 1
+
+        assert 1 == venv.ensure()
+
+        venv_deps.write_text.assert_not_called()
+
+
+class TestVEnvLock(VEnvFixtures):
+    @staticmethod
+    def report(*pins: str) -> str:
+        return json.dumps({'install': [
+            {'metadata': {'name': p, 'version': '1.0'},
+             'download_info': {'url': 'x', 'archive_info': {'hashes': {'sha256': p}}}} for p in pins]})
+
+    @staticmethod
+    def lock_files(venv_deps: Mock, venv: VEnv, pre_pins, req_pins, inputs: str | None = None) -> None:
+        inputs = inputs or inputs_hash(venv.prerequisites, venv.requirements)
+        pre_path, req_path = venv.lock_paths()
+        texts = {
+            str(pre_path): Lock(interpreter_tag(), inputs, pre_pins).render(venv.name, 'prerequisites'),
+            str(req_path): Lock(interpreter_tag(), inputs, req_pins).render(venv.name, 'requirements'),
+        }
+        venv_deps.read_text.side_effect = lambda p: texts.get(str(p))
+
+    def test_venv_lock(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv.prerequisites = {'first'}
+        venv.requirements = {'alpha'}
+        venv_deps.capture.side_effect = [(0, self.report('first')), (0, self.report('first', 'alpha'))]
+
+        assert 0 == venv.lock()
+
+        assert ['--dry-run', '--ignore-installed', '--quiet', '--report', '-', 'alpha', 'first'] == \
+            venv_deps.capture.call_args[0][0][4:]
+        pre_path, req_path = venv.lock_paths()
+        assert path.abspath('.sv_lock') == str(pre_path.parent)
+        written = {str(c[0][0]): Lock.parse(c[0][1]) for c in venv_deps.write_text.call_args_list}
+        assert ['first==1.0 --hash=sha256:first'] == written[str(pre_path)].pins
+        assert ['alpha==1.0 --hash=sha256:alpha'] == written[str(req_path)].pins
+        venv_deps.echo.assert_called_with("Locked venv test: 1 prerequisites and 1 requirements pinned")
+
+    def test_venv_lock_failed(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv.requirements = {'alpha'}
+        venv_deps.capture.return_value = (1, '')
+
+        assert 1 == venv.lock()
+
+        venv_deps.write_text.assert_not_called()
+        venv_deps.echo.assert_called_with("Unable to resolve alpha for venv test")
+
+    def test_venv_ensure_locked(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv.prerequisites = {'first'}
+        venv.requirements = {'alpha'}
+        self.lock_files(venv_deps, venv, ['first==1.0 --hash=sha256:00'], ['alpha==1.0 --hash=sha256:00'])
+        venv_deps.runner.return_value = 0
+        pre_path, req_path = venv.lock_paths()
+
+        assert 0 == venv.ensure()
+
+        assert [[ANY, '-m', 'pip', 'install', '--no-deps', '--require-hashes', '-r', str(pre_path)],
+                [ANY, '-m', 'pip', 'install', '--no-deps', '--require-hashes', '-r', str(req_path)]] == \
+            [c[0][0] for c in venv_deps.runner.call_args_list]
+
+    def test_venv_ensure_stale_lock(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv.requirements = {'alpha'}
+        self.lock_files(venv_deps, venv, [], ['beta==1.0'], inputs='old')
+        venv_deps.runner.return_value = 0
+
+        assert 0 == venv.ensure()
+
+        venv_deps.runner.assert_called_once_with([ANY, '-m', 'pip', 'install', 'alpha'], env=ANY)
+        venv_deps.echo.assert_any_call("Ignoring out of date lock for venv test, run :lock to update it")
+
+    def test_venv_fingerprint_lock(self, venv_deps: Mock, venv: VEnv) -> None:
+        before = venv.fingerprint()
+        self.lock_files(venv_deps, venv, [], ['alpha==1.0'])
+
+        assert before != venv.fingerprint()
+
+
+class TestVEnvTemplate(VEnvFixtures):
+    @pytest.fixture
+    def template_dir(self, venv_deps: Mock) -> Path:
+        venv_deps.template_dir.return_value = Path('/templates')
+        venv_deps.cloner.return_value = True
+        venv_deps.runner.return_value = 0
+        return Path('/templates')
+
+    def test_venv_create_template(self, venv_deps: Mock, venv: VEnv, template_dir: Path) -> None:
+        venv_exists(venv_deps)
+        venv.prerequisites = {'alpha'}
+
+        assert venv.create()
+
+        template, = venv_deps.cloner.call_args[0][:1]
+        build, = venv_deps.creator.call_args[0][:1]
+        assert template.parent == template_dir
+        assert build == template_dir / ('.%s.%d.tmp' % (template.name, os.getpid()))
+        venv_deps.locked.assert_called_once_with(template)
+        venv_deps.runner.assert_called_once_with([StringContaining(str(build)), '-m', 'pip', 'install', 'alpha'],
+                                                 env=ANY)
+        venv_deps.write_text.assert_called_once_with(build / '.sv_stamp', template.name)
+        venv_deps.promote.assert_called_once_with(build, template)
+        venv_deps.cloner.assert_called_once_with(template, venv.abs_path)
+        venv_deps.index_scripts.assert_not_called()
+        venv_deps.post_install.assert_not_called()
+
+    def test_venv_create_template_ready(self, venv_deps: Mock, venv: VEnv, template_dir: Path) -> None:
+        venv_exists(venv_deps)
+        venv_deps.read_text.side_effect = lambda p: p.parent.name if p.name == '.sv_stamp' else None
+
+        assert venv.create()
+
+        venv_deps.creator.assert_not_called()
+        venv_deps.runner.assert_not_called()
+        venv_deps.locked.assert_not_called()
+        venv_deps.cloner.assert_called_once_with(ANY, venv.abs_path)
+
+    def test_venv_create_template_shared(self, venv_deps: Mock, template_dir: Path) -> None:
+        venv_exists(venv_deps)
+        alpha = VEnv('alpha', venv_deps, '.', prerequisites=['first'], requirements=['a'])
+        beta = VEnv('beta', venv_deps, '.', prerequisites=['first'], requirements=['b'])
+        other = VEnv('other', venv_deps, '.', prerequisites=['second'])
+
+        for v in (alpha, beta, other):
+            v.create()
+
+        templates = [c[0][0] for c in venv_deps.cloner.call_args_list]
+        assert templates[0] == templates[1]
+        assert templates[0] != templates[2]
+
+    def test_venv_create_template_failed(self, venv_deps: Mock, venv: VEnv, template_dir: Path) -> None:
+        venv_exists(venv_deps)
+        venv.prerequisites = {'alpha'}
+        venv_deps.runner.side_effect = [1, 0]
+
+        assert venv.create()
+
+        venv_deps.cloner.assert_not_called()
+        venv_deps.creator.assert_called_with(venv.abs_path, clear=False)
+        venv_deps.runner.assert_called_with([ANY, '-m', 'pip', 'install', 'alpha'], env=ANY)
+
+    def test_venv_update_no_template(self, venv_deps: Mock, venv: VEnv, template_dir: Path) -> None:
+        assert venv.create(update=True)
+
+        venv_deps.cloner.assert_not_called()
+
+
+class TestVEnvLocked(VEnvFixtures):
+    def test_venv_ensure_build(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv_exists(venv_deps)
+        venv_deps.runner.return_value = 0
+        venv.requirements = {'alpha'}
+        build_path = venv.abs_path.parent / ('.test.%d.tmp' % os.getpid())
+
+        assert 0 == venv.ensure()
+
+        venv_deps.locked.assert_called_once_with(venv.abs_path)
+        venv_deps.creator.assert_called_once_with(build_path, clear=False)
+        venv_deps.runner.assert_called_once_with([StringContaining(str(build_path)), '-m', 'pip', 'install', 'alpha'],
+                                                 env=ANY)
+        venv_deps.write_text.assert_called_once_with(build_path / '.sv_stamp', venv.fingerprint())
+        venv_deps.promote.assert_called_once_with(build_path, venv.abs_path)
+
+    def test_venv_ensure_build_failed(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv_exists(venv_deps)
+        venv_deps.runner.return_value = 1
+        venv.requirements = {'alpha'}
+
+        assert 1 == venv.ensure()
+
+        venv_deps.promote.assert_not_called()
+
+    def test_venv_ensure_in_place(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv_deps.runner.return_value = 0
+        venv.requirements = {'alpha'}
+
+        assert 0 == venv.ensure()
+
+        venv_deps.locked.assert_called_once_with(venv.abs_path)
+        venv_deps.write_text.assert_called_once_with(venv.abs_path / '.sv_stamp', venv.fingerprint())
+        venv_deps.promote.assert_not_called()
+
+    def test_venv_ensure_built_while_waiting(self, venv_deps: Mock, venv: VEnv) -> None:
+        stamps = iter([None, venv.fingerprint()])
+        venv_deps.read_text.side_effect = lambda p: next(stamps) if p.name == '.sv_stamp' else None
+
+        assert venv.ensure() is None
+
+        venv_deps.locked.assert_called_once_with(venv.abs_path)
+        venv_deps.creator.assert_not_called()
+        venv_deps.runner.assert_not_called()
+
+
+class TestVEnvBase(VEnvFixtures):
+    @pytest.fixture
+    def base(self, venv_deps: Mock, venv: VEnv) -> VEnv:
+        base = VEnv('base', venv_deps, '.')
+        venv.base = base
+        return base
+
+    def test_venv_fingerprint_base(self, venv: VEnv) -> None:
+        before = venv.fingerprint()
+        venv.base = VEnv('base', venv.deps, '.')
+
+        assert before != venv.fingerprint()
+
+    def test_venv_ready_base(self, venv_deps: Mock, venv: VEnv, base: VEnv) -> None:
+        venv_ready(venv_deps, venv)
+        assert not venv.is_ready()
+
+        venv_ready(venv_deps, venv, base)
+        assert venv.is_ready()
+
+    def test_venv_command_base(self, venv_deps: Mock, venv: VEnv, base: VEnv) -> None:
+        venv_exists(venv_deps, str(base.abs_path / _bin / 'tool'))
+
+        cmd = venv.command('tool')
+
+        if not _exe:
+            python = str(venv.abs_path / _bin / path.basename(sys.executable))
+            assert [python, str(base.abs_path / _bin / 'tool')] == cmd
+
+    def test_venv_ensure_base(self, venv_deps: Mock, venv: VEnv, base: VEnv) -> None:
+        venv_exists(venv_deps)
+        venv.requirements = {'delta'}
+        base.requirements = {'common'}
+        venv_deps.runner.return_value = 0
+
+        assert 0 == venv.ensure()
+
+        assert ['.base.', '.test.'] == [c[0][0].name[:6] for c in venv_deps.creator.call_args_list]
+        assert [base.abs_path, venv.abs_path] == [c[0][1] for c in venv_deps.promote.call_args_list]
+        assert [[ANY, '-m', 'pip', 'install', 'common'], [ANY, '-m', 'pip', 'install', 'delta']] == \
+            [c[0][0] for c in venv_deps.runner.call_args_list]
+        pth_path, pth = next(c[0] for c in venv_deps.write_text.call_args_list if c[0][0].name == '_sv_base.pth')
+        assert '_sv_base.pth' == pth_path.name
+        assert venv.abs_path.parent / ('.test.%d.tmp' % os.getpid()) in pth_path.parents
+        assert pth.startswith("import site; site.addsitedir('%s" % base.abs_path)
+
+    def test_venv_ensure_base_failed(self, venv_deps: Mock, venv: VEnv, base: VEnv) -> None:
+        venv_exists(venv_deps)
+        venv_deps.runner.return_value = 2
+        base.requirements = {'common'}
+
+        assert 2 == venv.ensure()
+
+        venv_deps.creator.assert_called_once_with(base.abs_path.parent / ('.base.%d.tmp' % os.getpid()), clear=False)
+        venv_deps.promote.assert_not_called()
+
+    def test_venv_ensure_base_only(self, venv_deps: Mock, venv: VEnv, base: VEnv) -> None:
+        venv_ready(venv_deps, venv)
+        venv_deps.runner.return_value = 0
+
+        assert 0 == venv.ensure()
+
+        venv_deps.creator.assert_called_once_with(base.abs_path.parent / ('.base.%d.tmp' % os.getpid()), clear=False)
+
+    def test_venv_ensure_base_removed(self, venv_deps: Mock, venv: VEnv) -> None:
+        venv_ready(venv_deps, venv)
+        venv.requirements = {'delta'}
+        venv_deps.read_text.side_effect = lambda p: 'import site' if p.name == '_sv_base.pth' else None
+        venv_deps.runner.return_value = 0
+
+        assert 0 == venv.ensure()
+
+        assert ('_sv_base.pth', '') in [(c[0][0].name, c[0][1]) for c in venv_deps.write_text.call_args_list]
+
+
 class TestVEnvDependencies(object):
     @pytest.fixture
     def venv_deps(self) -> VEnvDependencies:
         return VEnvDependencies()
 
+    def test_capture(self, venv_deps):
+        with pytest.raises(NotImplementedError):
+            venv_deps.capture(["Cmd"])
+
     def test_echo(self, venv_deps):
         with pytest.raises(NotImplementedError):
             venv_deps.echo("Msg")
@@ -131,6 +606,58 @@ class TestVEnvDependencies(object):
         with pytest.raises(NotImplementedError):
             venv_deps.runner(["Cmd"])
 
+    def test_execer(self, venv_deps):
+        with pytest.raises(NotImplementedError):
+            venv_deps.execer(["Cmd"])
+
+    def test_forker(self, venv_deps):
+        with pytest.raises(NotImplementedError):
+            venv_deps.forker(["Cmd"])
+
     def test_creator(self, venv_deps):
         with pytest.raises(NotImplementedError):
             venv_deps.creator(Path("."))
+
+    def test_cloner(self, venv_deps):
+        with pytest.raises(NotImplementedError):
+            venv_deps.cloner(Path("."), Path("."))
+
+    def test_template_dir(self, venv_deps):
+        with pytest.raises(NotImplementedError):
+            venv_deps.template_dir()
+
+    def test_locked(self, venv_deps):
+        with pytest.raises(NotImplementedError):
+            venv_deps.locked(Path("."))
+
+    def test_promote(self, venv_deps):
+        with pytest.raises(NotImplementedError):
+            venv_deps.promote(Path("."), Path("."))
+
+    def test_log_to(self, venv_deps):
+        with pytest.raises(NotImplementedError):
+            venv_deps.log_to(Path("."))
+
+    def test_unpacker(self, venv_deps):
+        with pytest.raises(NotImplementedError):
+            venv_deps.unpacker({}, Path("."))
+
+    def test_wheelhouse(self, venv_deps):
+        with pytest.raises(NotImplementedError):
+            venv_deps.wheelhouse()
+
+    def test_post_install(self, venv_deps):
+        with pytest.raises(NotImplementedError):
+            venv_deps.post_install(Path("."))
+
+    def test_index_scripts(self, venv_deps):
+        with pytest.raises(NotImplementedError):
+            venv_deps.index_scripts("test", Path("."))
+
+    def test_read_text(self, venv_deps):
+        with pytest.raises(NotImplementedError):
+            venv_deps.read_text(Path("."))
+
+    def test_write_text(self, venv_deps):
+        with pytest.raises(NotImplementedError):
+            venv_deps.write_text(Path("."), "")
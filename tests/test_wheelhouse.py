@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+""" Wheelhouse tests """
+
+from pathlib2 import Path
+from unittest.mock import Mock
+
+import pytest
+
+from script_venv.wheelhouse import Wheelhouse, wheelhouse_path
+
+
+class TestWheelhouse(object):
+    @pytest.fixture
+    def path(self, tmp_path) -> Path:
+        return Path(str(tmp_path)) / 'wheels'
+
+    def test_load_missing(self, path: Path) -> None:
+        assert Wheelhouse.load(path) is None
+
+    def test_save_load(self, path: Path) -> None:
+        Wheelhouse(path, ['beta', 'alpha>=1']).save()
+
+        wheelhouse = Wheelhouse.load(path)
+
+        assert wheelhouse is not None
+        assert {'alpha>=1', 'beta'} == wheelhouse.requirements
+
+    def test_install_options(self, path: Path) -> None:
+        wheelhouse = Wheelhouse(path, ['alpha'])
+
+        assert ['--no-index', '--find-links', str(path)] == wheelhouse.install_options(['-U', 'alpha'])
+        assert ['--find-links', str(path)] == wheelhouse.install_options(['alpha', 'beta'])
+        assert ['--find-links', str(path)] == wheelhouse.install_options(['-U'])
+
+    def test_install_options_lock(self, path: Path, tmp_path) -> None:
+        path.mkdir()
+        (path / 'alpha-1.0-py3-none-any.whl').touch()
+        (path / 'Beta_Two-2.0-cp311-cp311-linux_x86_64.whl').touch()
+        lock = Path(str(tmp_path)) / 'lock.txt'
+        lock.write_text("# sv lock\nalpha==1.0 --hash=sha256:00\nbeta-two==2.0\n")
+        wheelhouse = Wheelhouse(path)
+
+        assert ['--no-index', '--find-links', str(path)] == wheelhouse.install_options(
+            ['--no-deps', '-r', str(lock)])
+
+        lock.write_text("alpha==1.0\ngamma==3.0\n")
+        assert ['--find-links', str(path)] == wheelhouse.install_options(['-r', str(lock)])
+
+        lock.write_text("alpha>=1.0\n")
+        assert ['--find-links', str(path)] == wheelhouse.install_options(['-r', str(lock)])
+
+        assert ['--find-links', str(path)] == wheelhouse.install_options(['-r', str(lock) + '.missing'])
+
+    def test_prefetch(self, path: Path) -> None:
+        def runner(cmd):
+            if cmd[-1] == 'broken':
+                return 1
+            build_dir = Path(cmd[cmd.index('--wheel-dir') + 1])
+            assert path == build_dir.parent
+            (build_dir / ('%s-1.0-py3-none-any.whl' % cmd[-1])).touch()
+            return 0
+        runner = Mock(side_effect=runner)
+        wheelhouse = Wheelhouse(path)
+
+        results = wheelhouse.prefetch(['alpha', 'broken', 'alpha'], runner, jobs=2)
+
+        assert {'alpha': 0, 'broken': 1} == results
+        assert runner.call_count == 2
+        assert ['pip', 'wheel', '--wheel-dir'] == runner.call_args[0][0][2:5]
+        assert ['--find-links', str(path)] == runner.call_args[0][0][6:8]
+        assert {'alpha'} == Wheelhouse.load(path).requirements
+        assert ['alpha-1.0-py3-none-any.whl'] == wheelhouse.wheels
+        assert ['alpha-1.0-py3-none-any.whl', 'sv_wheelhouse.txt'] == sorted(p.name for p in path.iterdir())
+
+    def test_wheels(self, path: Path) -> None:
+        path.mkdir()
+        (path / 'alpha-1.0-py3-none-any.whl').touch()
+
+        assert ['alpha-1.0-py3-none-any.whl'] == Wheelhouse(path).wheels
+
+    def test_wheelhouse_path_env(self, monkeypatch) -> None:
+        monkeypatch.setenv('SV_WHEELHOUSE', '/tmp/wheels')
+
+        assert Path('/tmp/wheels') == wheelhouse_path()
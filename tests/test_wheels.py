@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+""" In-process wheel installer tests """
+
+import csv
+import hashlib
+import os
+import sys
+import zipfile
+from pathlib2 import Path
+from typing import Dict
+
+import pytest
+
+from script_venv.distributions import find_dist_info, package_scripts, parse_entry_points, python_version, \
+    site_packages
+from script_venv.wheels import install_wheel, pinned, pinned_hashes, pinned_wheels, pure_wheel
+
+_METADATA = "Metadata-Version: 2.1\nName: %s\nVersion: %s\n"
+
+
+def make_wheel(wheel_dir: Path, name: str, version: str, files: Dict[str, str],
+               requires: str = '', tag: str = 'py3-none-any') -> Path:
+    wheel_dir.mkdir(parents=True, exist_ok=True)
+    wheel = wheel_dir / ('%s-%s-%s.whl' % (name, version, tag))
+    dist_info = '%s-%s.dist-info' % (name, version)
+    with zipfile.ZipFile(str(wheel), 'w') as wheel_zip:
+        for member, text in files.items():
+            wheel_zip.writestr(member, text)
+        wheel_zip.writestr(dist_info + '/METADATA', _METADATA % (name, version) + requires)
+        wheel_zip.writestr(dist_info + '/RECORD', '')
+    return wheel
+
+
+class TestWheelNames(object):
+    def test_pinned(self) -> None:
+        assert ('sample-pkg', '1.0') == pinned('Sample_Pkg==1.0')
+        assert pinned('sample>=1.0') is None
+        assert pinned('-r') is None
+
+    def test_pinned_hashes(self) -> None:
+        assert (('sample', '1.0'), ['ab', 'cd']) == pinned_hashes('sample==1.0 --hash=sha256:ab --hash=sha256:cd')
+        assert (('sample', '1.0'), []) == pinned_hashes('sample==1.0')
+        assert pinned_hashes('sample==1.0 --hash=md5:ab') is None
+        assert pinned_hashes('sample @ https://example.com/sample.whl') is None
+
+    def test_pure_wheel(self) -> None:
+        assert ('sample', '1.0') == pure_wheel('sample-1.0-py3-none-any.whl')
+        assert ('sample', '1.0') == pure_wheel('sample-1.0-py2.py3-none-any.whl')
+        assert pure_wheel('sample-1.0-cp38-cp38-linux_x86_64.whl') is None
+        assert pure_wheel('sample-1.0.tar.gz') is None
+
+
+class TestPinnedWheels(object):
+    @pytest.fixture
+    def wheel_dir(self, tmp_path) -> Path:
+        return Path(str(tmp_path)) / 'wheels'
+
+    def test_pinned_wheels(self, wheel_dir: Path) -> None:
+        wheel = make_wheel(wheel_dir, 'sample', '1.0', {})
+
+        assert {wheel: []} == pinned_wheels(wheel_dir, ['-U', 'sample==1.0'])
+        assert pinned_wheels(wheel_dir, ['sample==2.0']) is None
+        assert pinned_wheels(wheel_dir, ['sample']) is None
+        assert pinned_wheels(wheel_dir, ['-U']) is None
+
+    def test_pinned_wheels_dependencies(self, wheel_dir: Path) -> None:
+        requires = 'Requires-Dist: other (>=1)\nRequires-Dist: extra; extra == "test"\n'
+        wheel = make_wheel(wheel_dir, 'sample', '1.0', {}, requires=requires)
+        other = make_wheel(wheel_dir, 'other', '1.1', {})
+
+        assert pinned_wheels(wheel_dir, ['sample==1.0']) is None
+        assert {wheel: []} == pinned_wheels(wheel_dir, ['--no-deps', 'sample==1.0'])
+        assert [wheel, other] == list(pinned_wheels(wheel_dir, ['sample==1.0', 'other==1.1']) or {})
+
+    def test_pinned_wheels_lock(self, wheel_dir: Path, tmp_path) -> None:
+        wheel = make_wheel(wheel_dir, 'sample', '1.0', {})
+        lock = tmp_path / 'lock.txt'
+        lock.write_text('# Locked by sv :lock for venv test (requirements)\nsample==1.0 --hash=sha256:ab\n')
+
+        assert {wheel: ['ab']} == pinned_wheels(wheel_dir, ['--no-deps', '--require-hashes', '-r', str(lock)])
+        assert pinned_wheels(wheel_dir, ['-r', str(tmp_path / 'missing.txt')]) is None
+
+    def test_pinned_wheels_lock_unhashed(self, wheel_dir: Path, tmp_path) -> None:
+        make_wheel(wheel_dir, 'sample', '1.0', {})
+        lock = tmp_path / 'lock.txt'
+        lock.write_text('sample==1.0\n')
+
+        assert pinned_wheels(wheel_dir, ['--no-deps', '--require-hashes', '-r', str(lock)]) is None
+
+
+class TestInstallWheel(object):
+    @pytest.fixture
+    def venv_path(self, tmp_path) -> Path:
+        path = Path(str(tmp_path)) / 'venv'
+        path.mkdir()
+        (path / 'pyvenv.cfg').write_text('home = /usr/bin\nversion = 3.7.4\n')
+        return path
+
+    def test_python_version(self, venv_path: Path, tmp_path) -> None:
+        assert '3.7' == python_version(venv_path)
+        assert python_version(Path(str(tmp_path)) / 'missing') is None
+        assert venv_path / 'lib' / 'python3.7' / 'site-packages' == site_packages(venv_path)
+
+    def test_install_wheel(self, venv_path: Path, tmp_path) -> None:
+        wheel = make_wheel(Path(str(tmp_path)) / 'wheels', 'sample', '1.0', {
+            'sample/__init__.py': 'def main():\n    return 0\n',
+            'sample-1.0.dist-info/entry_points.txt': '[console_scripts]\nsample-cmd = sample:main\n',
+            'sample-1.0.data/scripts/sample-tool': '#!python\nprint("tool")\n',
+        })
+
+        install_wheel(wheel, venv_path)
+
+        site_path = site_packages(venv_path)
+        assert (site_path / 'sample' / '__init__.py').exists()
+        python = str(venv_path / 'bin' / os.path.basename(sys.executable))
+        script = (venv_path / 'bin' / 'sample-cmd').read_text()
+        assert script.startswith('#!%s\n' % python)
+        assert 'from sample import main' in script
+        assert os.access(str(venv_path / 'bin' / 'sample-cmd'), os.X_OK)
+        assert (venv_path / 'bin' / 'sample-tool').read_text().startswith('#!%s\n' % python)
+
+        dist_info = find_dist_info(site_path, 'Sample')
+        assert dist_info is not None
+        assert 'sv\n' == (dist_info / 'INSTALLER').read_text()
+        with (dist_info / 'RECORD').open() as in_record:
+            records = {row[0]: row for row in csv.reader(in_record)}
+        assert records['sample/__init__.py'][1].startswith('sha256=')
+        assert '../../../bin/sample-cmd' in records
+        assert ['sample-1.0.dist-info/RECORD', '', ''] == records['sample-1.0.dist-info/RECORD']
+
+    def test_install_wheel_upgrade(self, venv_path: Path, tmp_path) -> None:
+        wheel_dir = Path(str(tmp_path)) / 'wheels'
+        install_wheel(make_wheel(wheel_dir, 'sample', '1.0', {'sample/old.py': ''}), venv_path)
+        install_wheel(make_wheel(wheel_dir, 'sample', '2.0', {'sample/new.py': ''}), venv_path)
+
+        site_path = site_packages(venv_path)
+        assert not (site_path / 'sample' / 'old.py').exists()
+        assert (site_path / 'sample' / 'new.py').exists()
+        assert not (site_path / 'sample-1.0.dist-info').exists()
+
+    def test_install_wheel_hashes(self, venv_path: Path, tmp_path) -> None:
+        wheel = make_wheel(Path(str(tmp_path)) / 'wheels', 'sample', '1.0', {'sample/__init__.py': ''})
+        digest = hashlib.sha256(wheel.read_bytes()).hexdigest()
+
+        with pytest.raises(ValueError):
+            install_wheel(wheel, venv_path, ['0' * 64])
+        assert not (site_packages(venv_path) / 'sample').exists()
+
+        install_wheel(wheel, venv_path, ['0' * 64, digest])
+        assert (site_packages(venv_path) / 'sample' / '__init__.py').exists()
+
+    def test_install_wheel_unsafe(self, venv_path: Path, tmp_path) -> None:
+        wheel = make_wheel(Path(str(tmp_path)) / 'wheels', 'sample', '1.0', {'../evil.py': ''})
+
+        with pytest.raises(ValueError):
+            install_wheel(wheel, venv_path)
+
+    def test_parse_entry_points(self) -> None:
+        assert {'console_scripts': {'Cmd': 'mod:func'}} == parse_entry_points('[console_scripts]\nCmd = mod:func\n')
+
+
+class TestPackageScripts(object):
+    @pytest.fixture
+    def venv_path(self, tmp_path) -> Path:
+        path = Path(str(tmp_path)) / 'venv'
+        site_path = path / 'lib' / 'python3.7' / 'site-packages'
+        site_path.mkdir(parents=True)
+        (path / 'pyvenv.cfg').write_text('home = /usr/bin\nversion = 3.7.4\n')
+
+        sample = site_path / 'Sample_Pkg-1.0.dist-info'
+        sample.mkdir()
+        (sample / 'entry_points.txt').write_text('[console_scripts]\nsample-cmd = sample:main\n'
+                                                 '[gui_scripts]\nsample-gui = sample:gui\n')
+        (sample / 'RECORD').write_text('sample/__init__.py,,\n../../../bin/sample-cmd,,\n'
+                                       '../../../bin/sample-tool,,\n')
+        (site_path / 'other-2.0.dist-info').mkdir()
+        return path
+
+    def test_package_scripts(self, venv_path: Path) -> None:
+        assert [('sample-pkg', 'sample-cmd'), ('sample-pkg', 'sample-tool')] == \
+            package_scripts(venv_path, ['sample-pkg'])
+
+    def test_package_scripts_requirement(self, venv_path: Path) -> None:
+        assert [('Sample.Pkg>=1.0', 'sample-cmd'), ('Sample.Pkg>=1.0', 'sample-tool')] == \
+            package_scripts(venv_path, ['Sample.Pkg>=1.0'])
+
+    def test_package_scripts_none(self, venv_path: Path) -> None:
+        assert [] == package_scripts(venv_path, ['other', 'missing'])
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+""" Zygote server and pool tests """
+
+import os
+import sys
+import time
+from pathlib2 import Path
+from typing import Dict, Iterator, List, Tuple  # noqa: F401
+from unittest.mock import patch
+
+import pytest
+
+from script_venv.zygote import ZygotePool, script_argv
+
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason="No fork or unix sockets on Windows")
+
+
+def _wait_for(condition, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class TestScriptArgv(object):
+    def test_python_script(self, tmp_path) -> None:
+        script = tmp_path / 'tool.py'
+        script.write_text('pass\n')
+
+        assert ('/venv/bin/python', [str(script), 'arg']) == script_argv(['/venv/bin/python', str(script), 'arg'])
+
+    @pytest.mark.parametrize('cmd', [['/venv/bin/python', '-m', 'tool'], ['/venv/bin/python', 'missing.py'],
+                                     ['/venv/bin/python'], []])
+    def test_python_not_script(self, cmd: List[str]) -> None:
+        assert script_argv(cmd) is None
+
+    def test_shebang(self, tmp_path) -> None:
+        script = tmp_path / 'tool'
+        script.write_text('#!/venv/bin/python3.11\nimport tool\n')
+
+        assert ('/venv/bin/python3.11', [str(script), 'arg']) == script_argv([str(script), 'arg'])
+
+    @pytest.mark.parametrize('first_line', ['#!/bin/sh', '#!/usr/bin/env python', 'python', ''])
+    def test_shebang_not_python(self, tmp_path, first_line: str) -> None:
+        script = tmp_path / 'tool'
+        script.write_text(first_line + '\nexit 0\n')
+
+        assert script_argv([str(script)]) is None
+
+    def test_missing(self, tmp_path) -> None:
+        assert script_argv([str(tmp_path / 'missing')]) is None
+
+
+class TestZygotePool(object):
+    def test_base(self, tmp_path) -> None:
+        pool = ZygotePool(Path(str(tmp_path)))
+
+        base = pool.base('/venv/bin/python', ['json'], {})
+
+        assert str(tmp_path) == os.path.dirname(base)
+        assert base == pool.base('/venv/bin/python', ['json'], dict(HOME='/home'))
+        assert base != pool.base('/venv/bin/python', [], {})
+        assert base != pool.base('/other/bin/python', ['json'], {})
+        assert base != pool.base('/venv/bin/python', ['json'], dict(PYTHONPATH='/src'))
+
+    def test_from_env(self, tmp_path, monkeypatch) -> None:
+        monkeypatch.setenv('SV_ZYGOTES', '2')
+        monkeypatch.setenv('SV_ZYGOTE_MEMORY', '64')
+        monkeypatch.setenv('SV_ZYGOTE_IDLE', 'soon')
+
+        pool = ZygotePool.from_env(Path(str(tmp_path)))
+
+        assert (2, 64 * 1024, 600) == (pool.max_zygotes, pool.max_rss_kb, pool.idle_timeout)
+
+    def test_run_starts(self, tmp_path) -> None:
+        script = tmp_path / 'tool.py'
+        script.write_text('pass\n')
+        pool = ZygotePool(Path(str(tmp_path / 'pool')))
+
+        with patch.object(pool, 'start') as start:
+            assert pool.run([sys.executable, str(script)], dict(os.environ), ['json']) is None
+
+        start.assert_called_once_with(sys.executable, ['json'], dict(os.environ))
+
+    def test_run_not_python(self, tmp_path) -> None:
+        pool = ZygotePool(Path(str(tmp_path / 'pool')))
+
+        with patch.object(pool, 'start') as start:
+            assert pool.run(['/bin/sh', '-c', 'exit 0'], dict(os.environ), []) is None
+
+        start.assert_not_called()
+
+    def test_zygotes_stale(self, tmp_path) -> None:
+        (tmp_path / 'abc.pid').write_text('%d 1000\n' % os.getpid())
+        (tmp_path / 'abc.sock').touch()
+
+        assert [] == ZygotePool(Path(str(tmp_path))).zygotes()
+
+
+class TestZygoteServer(object):
+    @pytest.fixture
+    def pool(self, tmp_path) -> Iterator[ZygotePool]:
+        pool = ZygotePool(Path(str(tmp_path / 'pool')), idle_timeout=60)
+        yield pool
+        pool.max_zygotes = 0
+        pool.evict()
+        assert _wait_for(lambda: not pool.zygotes())
+
+    @pytest.fixture
+    def env(self) -> Dict[str, str]:
+        return dict(os.environ, SV_TEST='zygote')
+
+    @pytest.fixture
+    def started(self, pool: ZygotePool, env: Dict[str, str]) -> str:
+        pool.start(sys.executable, ['json'], env)
+        base = pool.base(sys.executable, ['json'], env)
+        assert _wait_for(lambda: os.path.exists(base + '.sock')), Path(base + '.log').read_text()
+        return base
+
+    @staticmethod
+    def _run(pool: ZygotePool, tmp_path, code: str, env: Dict[str, str], *args: str) -> Tuple[int, str, str]:
+        script = tmp_path / 'tool.py'
+        script.write_text(code)
+        with (tmp_path / 'out').open('w+') as out, (tmp_path / 'err').open('w+') as err, \
+                open(os.devnull) as null:
+            result = pool.run([sys.executable, str(script)] + list(args), env, ['json'], cwd=str(tmp_path),
+                              fds=[null.fileno(), out.fileno(), err.fileno()])
+        return result, (tmp_path / 'out').read_text(), (tmp_path / 'err').read_text()
+
+    def test_run(self, pool: ZygotePool, started: str, env: Dict[str, str], tmp_path) -> None:
+        code = ("import os, sys\n"
+                "print(sys.argv[1:], os.getcwd(), os.environ['SV_TEST'], 'json' in sys.modules, sys.path[0])\n"
+                "sys.exit(3)\n")
+
+        result, out, _ = self._run(pool, tmp_path, code, env, 'arg')
+
+        assert 3 == result
+        assert "['arg'] %s zygote True %s\n" % (tmp_path, tmp_path) == out
+
+    def test_run_error(self, pool: ZygotePool, started: str, env: Dict[str, str], tmp_path) -> None:
+        result, _, err = self._run(pool, tmp_path, "raise RuntimeError('broken')\n", env)
+
+        assert 1 == result
+        assert 'RuntimeError: broken' in err
+
+    def test_run_atexit(self, pool: ZygotePool, started: str, env: Dict[str, str], tmp_path) -> None:
+        code = "import atexit, sys\natexit.register(print, 'exiting')\nsys.exit('failed')\n"
+
+        result, out, err = self._run(pool, tmp_path, code, env)
+
+        assert (1, 'exiting\n', 'failed\n') == (result, out, err)
+
+    def test_zygotes(self, pool: ZygotePool, started: str) -> None:
+        (_, pid, rss_kb, base), = pool.zygotes()
+
+        assert started == base
+        assert pid != os.getpid()
+        assert rss_kb > 0
+
+    def test_evict(self, pool: ZygotePool, started: str) -> None:
+        pool.max_zygotes = 1
+
+        pool.evict()
+
+        assert _wait_for(lambda: not os.path.exists(started + '.sock'))
+        assert [] == pool.zygotes()
+
+    def test_evict_memory(self, pool: ZygotePool, started: str) -> None:
+        pool.max_rss_kb = 1
+
+        pool.evict(keep='other')
+
+        assert _wait_for(lambda: not pool.zygotes())
+
+    def test_evict_keep(self, pool: ZygotePool, started: str) -> None:
+        pool.max_zygotes = 1
+
+        pool.evict(keep=started)
+
+        assert 1 == len(pool.zygotes())
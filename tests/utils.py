@@ -10,6 +10,8 @@ from pathlib2 import Path
 from typing import Dict
 from unittest.mock import Mock
 
+from script_venv.venv import VEnv, _STAMP
+
 
 def config_read(config_deps: Mock, mock_files: Dict[str, str]):
     def exists_callback(file: Path):
@@ -41,6 +43,15 @@ def venv_exists(venv_deps: Mock, *mock_dirs: str):
     venv_deps.exists.side_effect = exists_callback
 
 
+def venv_ready(venv_deps: Mock, *venvs: VEnv):
+    stamps = {str(v.abs_path / _STAMP): v.fingerprint() for v in venvs}
+
+    def read_text_callback(file: Path):
+        return stamps.get(str(file))
+
+    venv_deps.read_text.side_effect = read_text_callback
+
+
 def config_scripts(config_deps: Mock):
     def scripts_callback(_, packages):
         return [(p, '%s.script' % p) for p in packages]